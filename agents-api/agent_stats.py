@@ -0,0 +1,113 @@
+"""
+CivicShield Agent Statistics
+Incrementally maintained aggregates over registered agents so that the
+summary and health endpoints never have to scan every agent status
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+
+class RateWindow:
+    """Ring buffer of per-second counts covering a sliding time window"""
+
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.buckets = [0] * window_seconds
+        self.last_tick = int(time.time())
+        self.total = 0
+
+    def _advance(self, now: int):
+        """Zero every bucket that fell out of the window since the last tick"""
+        if now <= self.last_tick:
+            return
+
+        steps = min(now - self.last_tick, self.window_seconds)
+        for offset in range(1, steps + 1):
+            index = (self.last_tick + offset) % self.window_seconds
+            self.total -= self.buckets[index]
+            self.buckets[index] = 0
+        self.last_tick = now
+
+    def add(self, count: int = 1, now: Optional[float] = None):
+        """Record count items at the given time (defaults to now)"""
+        tick = int(now if now is not None else time.time())
+        self._advance(tick)
+        self.buckets[tick % self.window_seconds] += count
+        self.total += count
+
+    def count(self, now: Optional[float] = None) -> int:
+        """Items recorded within the window"""
+        self._advance(int(now if now is not None else time.time()))
+        return self.total
+
+    def per_minute(self, now: Optional[float] = None) -> float:
+        """Items per minute averaged over the window"""
+        return self.count(now) * 60 / self.window_seconds
+
+
+class AgentAggregates:
+    """Running totals over all registered agents, updated on every change"""
+
+    def __init__(self, rate_window_seconds: int = 60):
+        self.rate_window_seconds = rate_window_seconds
+        self.total = 0
+        self.by_status: Dict[str, int] = defaultdict(int)
+        self.total_processed = 0
+        self.total_errors = 0
+        # Items received from submissions, and processed_items growth reported in status updates
+        self.rates: Dict[str, RateWindow] = {}
+        self.processed_rates: Dict[str, RateWindow] = {}
+
+    def add(self, agent):
+        """Account for a newly registered agent"""
+        self.total += 1
+        self.by_status[agent.status] += 1
+        self.total_processed += agent.processed_items
+        self.total_errors += agent.error_count
+
+    def remove(self, agent):
+        """Stop accounting for an agent that is being replaced"""
+        self.total -= 1
+        self.by_status[agent.status] -= 1
+        self.total_processed -= agent.processed_items
+        self.total_errors -= agent.error_count
+
+    def replace(self, old, new):
+        """Swap an agent's previous status report for a new one"""
+        if old is not None:
+            self.remove(old)
+            processed_delta = new.processed_items - old.processed_items
+            if processed_delta > 0:
+                self._record(self.processed_rates, new.agent_type, processed_delta)
+        self.add(new)
+
+    def change_status(self, old_status: str, new_status: str):
+        """Move one agent between status buckets"""
+        if old_status == new_status:
+            return
+        self.by_status[old_status] -= 1
+        self.by_status[new_status] += 1
+
+    def _record(self, rates: Dict[str, RateWindow], agent_type: str, count: int):
+        window = rates.get(agent_type)
+        if window is None:
+            window = rates[agent_type] = RateWindow(self.rate_window_seconds)
+        window.add(count)
+
+    def record_items(self, agent_type: str, count: int = 1):
+        """Record items submitted by an agent of the given type"""
+        self._record(self.rates, agent_type, count)
+
+    def items_per_minute(self) -> Dict[str, float]:
+        """Recent submission throughput per agent type"""
+        return {agent_type: window.per_minute() for agent_type, window in self.rates.items()}
+
+    def processed_per_minute(self) -> Dict[str, float]:
+        """Recent growth of reported processed_items per agent type"""
+        return {agent_type: window.per_minute() for agent_type, window in self.processed_rates.items()}
+
+    def count(self, status: str) -> int:
+        """Number of agents currently in the given status"""
+        return self.by_status.get(status, 0)
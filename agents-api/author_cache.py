@@ -0,0 +1,87 @@
+"""
+CivicShield Author Cache
+Bounded LRU cache of author documents for the network analyzer. Entries
+expire after a TTL, the least recently used entry is evicted once the entry
+budget is reached, and every MongoDB update is applied to the cached copy
+with the same operators so the cache never drifts from the database
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def apply_update(document: dict, update: Dict[str, dict]):
+    """Apply the $inc, $max and $set parts of a MongoDB update document in place"""
+    for field, value in update.get("$inc", {}).items():
+        document[field] = document.get(field, 0) + value
+    for field, value in update.get("$max", {}).items():
+        if field not in document or value > document[field]:
+            document[field] = value
+    for field, value in update.get("$set", {}).items():
+        document[field] = value
+
+
+class AuthorCache:
+    """LRU + TTL cache of author documents keyed by handle"""
+
+    def __init__(self, max_entries: int = 50000, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()  # handle -> (expires_at, author)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, handle: str) -> bool:
+        return self.get(handle, count=False) is not None
+
+    def get(self, handle: str, count: bool = True) -> Optional[dict]:
+        entry = self.entries.get(handle)
+        if entry is None:
+            if count:
+                self.misses += 1
+            return None
+        if entry[0] <= time.monotonic():
+            del self.entries[handle]
+            self.expirations += 1
+            if count:
+                self.misses += 1
+            return None
+        self.entries.move_to_end(handle)
+        if count:
+            self.hits += 1
+        return entry[1]
+
+    def put(self, handle: str, author: dict):
+        self.entries[handle] = (time.monotonic() + self.ttl_seconds, author)
+        self.entries.move_to_end(handle)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def apply(self, handle: str, update: Dict[str, dict]):
+        """Write an update through to the cached author, if it is cached"""
+        author = self.get(handle, count=False)
+        if author is not None:
+            apply_update(author, update)
+
+    def invalidate(self, handle: str):
+        self.entries.pop(handle, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+CivicShield Batch Claims Microbenchmark
+Compares the standard /submit/batch/claims processing path with the trusted
+fast path for one 100-item batch: body decode, validation, field mapping and
+the JSON encode used when forwarding upstream
+"""
+
+import json
+import timeit
+from typing import List
+
+from pydantic import TypeAdapter
+
+from main import ClaimSubmission, build_claim_data
+from fast_path import TRUSTED_CLAIMS_ADAPTER, transform_claim, loads_json, dumps_json, orjson
+
+BATCH_SIZE = 100
+ROUNDS = 200
+
+SAMPLE_CLAIM = {
+    "text": "BREAKING: Government secretly using voting machines to manipulate election results! Share before they delete this!",
+    "platform": "twitter",
+    "source_url": "https://twitter.com/truthteller2024/status/1728901234567890123",
+    "author": "truthteller2024",
+    "author_id": "truthteller2024",
+    "risk_level": "high",
+    "region": {"city": "Mumbai", "lat": 19.076, "lng": 72.8777},
+    "engagement": {"views": 0, "shares": 245, "likes": 890, "comments": 67},
+    "tags": ["twitter", "ai_detected", "social_media", "Election"],
+    "category": "election"
+}
+
+BODY = json.dumps([dict(SAMPLE_CLAIM, text=f"{SAMPLE_CLAIM['text']} #{i}") for i in range(BATCH_SIZE)]).encode()
+
+# FastAPI validates List[ClaimSubmission] bodies through an equivalent adapter
+STANDARD_ADAPTER = TypeAdapter(List[ClaimSubmission])
+
+
+def standard_path() -> bytes:
+    claims = STANDARD_ADAPTER.validate_python(json.loads(BODY))
+    processed_claims = [build_claim_data(claim) for claim in claims]
+    return json.dumps({"claims": processed_claims}).encode()
+
+
+def fast_path() -> bytes:
+    claims = TRUSTED_CLAIMS_ADAPTER.validate_python(loads_json(BODY))
+    processed_claims = [transform_claim(claim) for claim in claims]
+    return dumps_json({"claims": processed_claims})
+
+
+def main():
+    print(f"🚀 Batch claims microbenchmark ({BATCH_SIZE} claims per batch, {ROUNDS} rounds)")
+    print(f"   orjson available: {orjson is not None}")
+
+    # Both paths must produce the same upstream payload
+    assert json.loads(standard_path()) == json.loads(fast_path()), "fast path output differs from standard path"
+
+    standard = min(timeit.repeat(standard_path, number=ROUNDS, repeat=5)) / ROUNDS
+    fast = min(timeit.repeat(fast_path, number=ROUNDS, repeat=5)) / ROUNDS
+
+    print(f"   Standard path: {standard * 1e6:8.1f} µs per batch")
+    print(f"   Fast path:     {fast * 1e6:8.1f} µs per batch")
+    print(f"   Speedup:       {standard / fast:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+CivicShield Claim Search Benchmark
+Fills the claim index with 500k synthetic claims spread over 48 hours, the
+size /search/claims is configured for, and times cold and warm keyword
+queries
+"""
+
+import random
+import time
+import timeit
+
+from search_index import InvertedIndex
+
+DOCUMENTS = 500000
+HOURS = 48
+ROUNDS = 20
+
+COMMON = ["election", "vote", "evm", "booth", "result", "candidate", "rally", "poll", "counting", "ballot"]
+REGIONS = ["mumbai", "delhi", "chennai", "kolkata", "bengaluru", "hyderabad", "pune", "jaipur"]
+QUERIES = [
+    "evm hacked",
+    "booth capture OR ballot stuffing",
+    "election",
+    "fake video candidate mumbai",
+    "counting delayed OR result rigged",
+    "topic123 OR topic4567"
+]
+
+
+def build_index() -> InvertedIndex:
+    rng = random.Random(42)
+    rare = [f"topic{i}" for i in range(20000)]
+    extra = ["hacked", "capture", "stuffing", "fake", "video", "delayed", "rigged"]
+    index = InvertedIndex(retention_seconds=HOURS * 3600, max_documents=DOCUMENTS)
+    start = time.time() - HOURS * 3600
+    for i in range(DOCUMENTS):
+        words = rng.choices(COMMON, k=4) + rng.choices(extra, k=2) + rng.choices(rare, k=6)
+        text = " ".join(words) + f" claim {i}"
+        index.add(text, {"id": i}, extra_terms=[rng.choice(REGIONS)], now=start + i * HOURS * 3600 / DOCUMENTS)
+    return index
+
+
+def main():
+    print(f"🚀 Claim search benchmark ({DOCUMENTS} claims over {HOURS}h)")
+    build_start = time.perf_counter()
+    index = build_index()
+    print(f"   Indexed in {time.perf_counter() - build_start:.1f}s: {index.stats()}")
+
+    for query in QUERIES:
+        cold_start = time.perf_counter()
+        index.search(query)
+        cold = time.perf_counter() - cold_start
+        warm = min(timeit.repeat(lambda: index.search(query), number=1, repeat=ROUNDS))
+        print(f"   {query!r:40} cold {cold * 1e3:7.1f} ms   warm {warm * 1e3:7.1f} ms")
+
+    print(f"   Cache: {index.cached_postings} postings, {index.cache_hits} hits, {index.cache_misses} misses")
+
+
+if __name__ == "__main__":
+    main()
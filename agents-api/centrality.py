@@ -0,0 +1,246 @@
+"""
+CivicShield Network Centrality
+Background PageRank and local clustering coefficients over the in-memory
+connection graph. PageRank is a sparse power iteration warm-started from the
+previous run, so small graph changes converge in a few iterations. Scores
+that moved are written back to the authors collection largest change first,
+a bounded number per check, so the first run does not flood MongoDB
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+from scipy import sparse
+
+from graph_engine import CSRGraph
+
+
+def pagerank(matrix: sparse.csr_matrix, previous: Optional[np.ndarray] = None, damping: float = 0.85,
+             tolerance: float = 1e-6, max_iterations: int = 100) -> Tuple[np.ndarray, int]:
+    """Weighted PageRank by power iteration; returns (scores summing to 1, iterations)"""
+    n = matrix.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+
+    out_weight = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse_out = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    transpose = matrix.T.tocsr()
+
+    if previous is not None and len(previous) and previous.sum() > 0:
+        # Warm start: keep previous scores, give new nodes the uniform share
+        scores = np.full(n, 1.0 / n)
+        scores[:min(len(previous), n)] = previous[:n]
+        scores /= scores.sum()
+    else:
+        scores = np.full(n, 1.0 / n)
+
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        updated = damping * (transpose @ (scores * inverse_out))
+        updated += (damping * scores[dangling].sum() + 1 - damping) / n
+        delta = np.abs(updated - scores).sum()
+        scores = updated
+        if delta < tolerance:
+            break
+    return scores, iterations
+
+
+def clustering_coefficients(matrix: sparse.csr_matrix, chunk_entries: int = 1 << 22) -> np.ndarray:
+    """Local clustering coefficient of every node, treating edges as undirected
+
+    Edges are oriented from the lower- to the higher-degree endpoint, which
+    keeps every node's out-row short even next to hubs. Each triangle is then
+    found exactly once, as the overlap of the out-rows at its lowest edge;
+    edges are processed in chunks whose rows hold about chunk_entries
+    entries, so memory stays bounded
+    """
+    n = matrix.shape[0]
+    undirected = ((matrix + matrix.T) > 0).astype(np.float64).tocsr()
+    undirected.setdiag(0)
+    undirected.eliminate_zeros()
+    degree = np.diff(undirected.indptr)
+
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degree))] = np.arange(n)
+    pairs = sparse.triu(undirected, k=1).tocoo()
+    forward = rank[pairs.row] < rank[pairs.col]
+    oriented = sparse.csr_matrix(
+        (np.ones(len(pairs.row)), (np.where(forward, pairs.row, pairs.col), np.where(forward, pairs.col, pairs.row))),
+        shape=(n, n)
+    ).tocoo()
+    oriented_rows = oriented.tocsr()
+    out_degree = np.diff(oriented_rows.indptr)
+
+    sources, targets = oriented.row, oriented.col
+    cumulative_cost = np.cumsum(out_degree[sources] + out_degree[targets])
+    triangles = np.zeros(n)
+    start = 0
+    while start < len(sources):
+        spent = cumulative_cost[start - 1] if start else 0
+        end = max(int(np.searchsorted(cumulative_cost, spent + chunk_entries, side="right")), start + 1)
+        # Nonzeros are (edge, third node) for every triangle whose lowest edge is in this chunk
+        shared = oriented_rows[sources[start:end]].multiply(oriented_rows[targets[start:end]]).tocoo()
+        triangles += np.bincount(sources[start:end][shared.row], minlength=n)
+        triangles += np.bincount(targets[start:end][shared.row], minlength=n)
+        triangles += np.bincount(shared.col, minlength=n)
+        start = end
+
+    possible = degree * (degree - 1) / 2
+    return np.divide(triangles, possible, out=np.zeros(n), where=possible > 0)
+
+
+class CentralityJob:
+    """Recomputes PageRank and clustering on a schedule or after enough new edges"""
+
+    def __init__(self, graph: CSRGraph, write: Callable[[List[UpdateOne]], Awaitable[Any]],
+                 on_scores: Optional[Callable[[str, dict], None]] = None, interval_seconds: float = 300,
+                 min_new_edges: int = 10000, check_seconds: float = 5, damping: float = 0.85,
+                 tolerance: float = 1e-6, write_batch_size: int = 1000, max_writes_per_check: int = 5000,
+                 change_threshold: float = 0.005):
+        self.graph = graph
+        self.write = write
+        self.on_scores = on_scores
+        self.interval_seconds = interval_seconds
+        self.min_new_edges = min_new_edges
+        self.check_seconds = check_seconds
+        self.damping = damping
+        self.tolerance = tolerance
+        self.write_batch_size = write_batch_size
+        self.max_writes_per_check = max_writes_per_check
+        self.change_threshold = change_threshold
+
+        self.pagerank = np.zeros(0)
+        self.relative_pagerank = np.zeros(0)
+        self.centrality = np.zeros(0)
+        self.clustering = np.zeros(0)
+        self.written = np.zeros((0, 2))  # (centrality, clustering) last written per node
+        self.pending_writes = np.zeros(0, dtype=np.int64)  # nodes whose scores moved, largest change first
+        self.average_clustering = 0.0
+        self.edges_at_last_run = 0
+        self.last_run = 0.0
+        self.runs = 0
+        self.last_iterations = 0
+        self.last_duration_ms = 0.0
+        self.last_updates = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def scores(self, handle: str) -> Optional[Tuple[float, float]]:
+        """(normalized PageRank, clustering coefficient) from the last run"""
+        node = self.graph.ids.get(handle)
+        if node is None or node >= len(self.centrality):
+            return None
+        return float(self.centrality[node]), float(self.clustering[node])
+
+    def pagerank_scores(self, handle: str) -> Optional[Tuple[float, float]]:
+        """(PageRank probability, PageRank as a multiple of the average author's) from the last run"""
+        node = self.graph.ids.get(handle)
+        if node is None or node >= len(self.pagerank):
+            return None
+        return float(self.pagerank[node]), float(self.relative_pagerank[node])
+
+    def _compute(self, n: int, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray):
+        matrix = sparse.csr_matrix((weights.astype(np.float64), indices, indptr), shape=(n, n))
+        ranks, iterations = pagerank(matrix, self.pagerank, self.damping, self.tolerance)
+        return ranks, iterations, clustering_coefficients(matrix)
+
+    async def run_once(self):
+        """Recompute scores off the event loop and write back the ones that moved"""
+        start = time.perf_counter()
+        edge_count = self.graph.edge_count
+        n, indptr, indices, weights = await self.graph.snapshot()
+        ranks, iterations, clustering = await asyncio.to_thread(self._compute, n, indptr, indices, weights)
+
+        # Scale so the most central author is 1.0; raw PageRank shrinks with graph size
+        top = ranks.max() if n else 0
+        centrality = ranks / top if top > 0 else ranks
+        # Unlike centrality, this does not single out whoever ranks first: 1.0 is an average author
+        relative = ranks * n
+
+        written = np.full((n, 2), -1.0)
+        written[:len(self.written)] = self.written[:n]
+        change = np.maximum(np.abs(centrality - written[:, 0]), np.abs(clustering - written[:, 1]))
+        changed = np.flatnonzero(change > self.change_threshold)
+
+        self.pagerank = ranks
+        self.relative_pagerank = relative
+        self.centrality = centrality
+        self.clustering = clustering
+        self.written = written
+        self.pending_writes = changed[np.argsort(-change[changed], kind="stable")]
+        self.average_clustering = float(clustering.mean()) if n else 0.0
+        self.edges_at_last_run = edge_count
+        self.last_run = time.time()
+        self.runs += 1
+        self.last_iterations = iterations
+        self.last_duration_ms = (time.perf_counter() - start) * 1000
+        await self.write_pending()
+
+    async def write_pending(self):
+        """Write the next max_writes_per_check moved scores; the rest wait for later checks"""
+        nodes = self.pending_writes[:self.max_writes_per_check]
+        self.pending_writes = self.pending_writes[self.max_writes_per_check:]
+        now = datetime.utcnow()
+        operations = []
+        for node in nodes.tolist():
+            handle = self.graph.handles[node]
+            update = {"$set": {
+                "network_centrality": float(self.centrality[node]),
+                "relative_pagerank": float(self.relative_pagerank[node]),
+                "clustering_coefficient": float(self.clustering[node]),
+                "centrality_updated_at": now
+            }}
+            operations.append(UpdateOne({"handle": handle}, update))
+            if self.on_scores:
+                self.on_scores(handle, update)
+        for offset in range(0, len(operations), self.write_batch_size):
+            await self.write(operations[offset:offset + self.write_batch_size])
+        self.written[nodes, 0] = self.centrality[nodes]
+        self.written[nodes, 1] = self.clustering[nodes]
+        self.last_updates = len(operations)
+
+    def due(self) -> bool:
+        return (
+            time.time() - self.last_run >= self.interval_seconds
+            or self.graph.edge_count - self.edges_at_last_run >= self.min_new_edges
+        )
+
+    async def _run(self):
+        while True:
+            if self.due():
+                try:
+                    await self.run_once()
+                except Exception as e:
+                    print(f"Error computing network centrality: {e}")
+                    self.last_run = time.time()
+            elif len(self.pending_writes):
+                try:
+                    await self.write_pending()
+                except Exception as e:
+                    print(f"Error writing network centrality: {e}")
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_iterations": self.last_iterations,
+            "last_duration_ms": self.last_duration_ms,
+            "last_updates": self.last_updates,
+            "pending_writes": len(self.pending_writes),
+            "average_clustering": self.average_clustering,
+            "edges_since_last_run": self.graph.edge_count - self.edges_at_last_run
+        }
@@ -0,0 +1,88 @@
+"""
+CivicShield Claim Analytics
+Rolling per-minute counts of accepted claims by platform, category and risk
+level, kept in fixed ring buffers covering the last 24 hours
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+CLAIM_DIMENSIONS = ("platform", "category", "risk_level")
+
+
+class MinuteRing:
+    """Per-minute counters over a fixed horizon; stale slots are detected by stamp"""
+
+    def __init__(self, horizon_minutes: int):
+        self.horizon = horizon_minutes
+        self.counts = [0] * horizon_minutes
+        self.stamps = [-1] * horizon_minutes
+
+    def add(self, minute: int, count: int = 1):
+        index = minute % self.horizon
+        if self.stamps[index] != minute:
+            self.stamps[index] = minute
+            self.counts[index] = 0
+        self.counts[index] += count
+
+    def series(self, end_minute: int, window: int, step: int) -> List[int]:
+        """Counts for the window ending at end_minute, summed into step-minute buckets"""
+        buckets = []
+        for bucket_start in range(end_minute - window + 1, end_minute + 1, step):
+            total = 0
+            for minute in range(bucket_start, min(bucket_start + step, end_minute + 1)):
+                index = minute % self.horizon
+                if self.stamps[index] == minute:
+                    total += self.counts[index]
+            buckets.append(total)
+        return buckets
+
+
+class ClaimAggregates:
+    """Rolling claim counts keyed by dimension and value"""
+
+    def __init__(self, horizon_minutes: int = 1440):
+        self.horizon_minutes = horizon_minutes
+        self.total = MinuteRing(horizon_minutes)
+        self.rings: Dict[str, Dict[str, MinuteRing]] = {dimension: {} for dimension in CLAIM_DIMENSIONS}
+
+    def _ring(self, dimension: str, value: str) -> MinuteRing:
+        rings = self.rings[dimension]
+        ring = rings.get(value)
+        if ring is None:
+            ring = rings[value] = MinuteRing(self.horizon_minutes)
+        return ring
+
+    def record(self, claim_data: dict, now: Optional[float] = None):
+        """Count one accepted claim (main API claim schema)"""
+        minute = int((now if now is not None else time.time()) // 60)
+        self.total.add(minute)
+        self._ring("platform", claim_data["source"]["platform"] or "other").add(minute)
+        self._ring("category", claim_data["category"] or "other").add(minute)
+        self._ring("risk_level", claim_data["riskLevel"] or "medium").add(minute)
+
+    def query(self, window_minutes: int = 60, step_minutes: int = 1, group_by: Optional[str] = None,
+              now: Optional[float] = None) -> dict:
+        """Time series over the last window_minutes, optionally split by one dimension"""
+        window = max(1, min(window_minutes, self.horizon_minutes))
+        step = max(1, min(step_minutes, window))
+        end_minute = int((now if now is not None else time.time()) // 60)
+
+        if group_by:
+            rings = self.rings[group_by]
+        else:
+            rings = {"all": self.total}
+
+        series = {value: ring.series(end_minute, window, step) for value, ring in rings.items()}
+        totals = {value: sum(counts) for value, counts in series.items()}
+        series = {value: counts for value, counts in series.items() if totals[value]}
+
+        return {
+            "group_by": group_by,
+            "window_minutes": window,
+            "step_minutes": step,
+            "start": datetime.utcfromtimestamp((end_minute - window + 1) * 60).isoformat(),
+            "series": series,
+            "totals": {value: total for value, total in totals.items() if total}
+        }
@@ -0,0 +1,207 @@
+"""
+CivicShield Coordination Detector
+Flags groups of accounts that mention or retweet the same targets within a
+short time window more often than chance predicts. Each window becomes a
+sparse account x target incidence matrix; shared-target counts for every
+pair come from one sparse product, are compared against the overlap expected
+from target popularity, and pairs well above it are joined into clusters
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+def find_coordinated_clusters(accounts: List[str], targets: List[str], min_shared_targets: int = 3,
+                              min_lift: float = 5.0, max_target_accounts: int = 500,
+                              min_cluster_size: int = 3) -> List[Dict[str, Any]]:
+    """Clusters of accounts whose shared targets exceed chance by min_lift
+
+    accounts[i] interacted with targets[i]. Targets reached by more than
+    max_target_accounts accounts are ignored: everyone amplifies a viral post,
+    so sharing it says nothing about coordination
+    """
+    if not accounts:
+        return []
+    account_names, account_index = np.unique(np.asarray(accounts), return_inverse=True)
+    target_names, target_index = np.unique(np.asarray(targets), return_inverse=True)
+
+    incidence = sparse.csr_matrix(
+        (np.ones(len(account_index)), (account_index, target_index)),
+        shape=(len(account_names), len(target_names))
+    )
+    incidence.data[:] = 1  # repeated interactions count once
+
+    target_reach = np.asarray(incidence.sum(axis=0)).ravel()
+    informative = np.flatnonzero((target_reach >= 2) & (target_reach <= max_target_accounts))
+    if not len(informative):
+        return []
+    incidence = incidence[:, informative].tocsr()
+    target_names = target_names[informative]
+    target_reach = target_reach[informative]
+
+    # Chance that two independent accounts pick the same target, weighted by popularity
+    share = target_reach / target_reach.sum()
+    collision = float(np.square(share).sum())
+    degree = np.asarray(incidence.sum(axis=1)).ravel()
+
+    shared = sparse.triu(incidence @ incidence.T, k=1).tocoo()
+    expected = degree[shared.row] * degree[shared.col] * collision
+    lift = np.divide(shared.data, expected, out=np.zeros(len(shared.data)), where=expected > 0)
+    flagged = (shared.data >= min_shared_targets) & (lift >= min_lift)
+    if not flagged.any():
+        return []
+
+    rows, cols, pair_lift = shared.row[flagged], shared.col[flagged], lift[flagged]
+    n = len(account_names)
+    pairs = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(n, n))
+    _, labels = connected_components(pairs, directed=False)
+
+    flagged_accounts = np.zeros(n, dtype=bool)
+    flagged_accounts[rows] = True
+    flagged_accounts[cols] = True
+    sizes = np.bincount(labels[flagged_accounts], minlength=labels.max() + 1)
+    pair_labels = labels[rows]
+    pairs_per_cluster = np.bincount(pair_labels, minlength=len(sizes))
+    max_lift = np.zeros(len(sizes))
+    np.maximum.at(max_lift, pair_labels, pair_lift)
+
+    clusters = []
+    for label in np.flatnonzero(sizes >= min_cluster_size).tolist():
+        members = np.flatnonzero((labels == label) & flagged_accounts)
+        size = len(members)
+        density = pairs_per_cluster[label] / (size * (size - 1) / 2)
+        member_counts = np.asarray(incidence[members].sum(axis=0)).ravel()
+        top = np.argsort(-member_counts, kind="stable")[:10]
+        top = top[member_counts[top] >= 2]
+        clusters.append({
+            "accounts": account_names[members].tolist(),
+            "size": size,
+            "shared_targets": [
+                {"target": target, "accounts": int(count)}
+                for target, count in zip(target_names[top].tolist(), member_counts[top].tolist())
+            ],
+            "flagged_pairs": int(pairs_per_cluster[label]),
+            "pair_density": float(density),
+            "max_lift": float(max_lift[label]),
+            "score": float(0.5 + 0.5 * density)
+        })
+    clusters.sort(key=lambda cluster: (cluster["score"], cluster["size"]), reverse=True)
+    return clusters
+
+
+class CoordinationDetector:
+    """Hopping-window coordination detection over account -> target interactions"""
+
+    def __init__(self, window_seconds: float = 300, hop_seconds: float = 60, min_shared_targets: int = 3,
+                 min_lift: float = 5.0, max_target_accounts: int = 500, min_cluster_size: int = 3,
+                 flag_ttl_seconds: float = 3600, history: int = 200):
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.min_shared_targets = min_shared_targets
+        self.min_lift = min_lift
+        self.max_target_accounts = max_target_accounts
+        self.min_cluster_size = min_cluster_size
+        self.flag_ttl_seconds = flag_ttl_seconds
+        self.history = history
+
+        # Interactions grouped into hop-sized buckets: [start, accounts, targets]
+        self.buckets: deque = deque()
+        self.clusters: "OrderedDict[frozenset, Dict[str, Any]]" = OrderedDict()
+        self.flags: Dict[str, Tuple[float, float, str]] = {}  # account -> (score, expires_at, cluster_id)
+        self.next_cluster = 1
+        self.interactions = 0
+        self.windows = 0
+        self.last_window_ms = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def record(self, account: str, targets: List[str], now: Optional[float] = None):
+        """Note that account mentioned or retweeted each of targets"""
+        if not targets:
+            return
+        now = now if now is not None else time.time()
+        if not self.buckets or now >= self.buckets[-1][0] + self.hop_seconds:
+            self.buckets.append([now - now % self.hop_seconds, [], []])
+        bucket = self.buckets[-1]
+        for target in targets:
+            if target != account:
+                bucket[1].append(account)
+                bucket[2].append(target)
+                self.interactions += 1
+
+    async def analyze_window(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Detect clusters over the last window_seconds and refresh account flags"""
+        now = now if now is not None else time.time()
+        while self.buckets and self.buckets[0][0] + self.hop_seconds <= now - self.window_seconds:
+            self.buckets.popleft()
+        accounts = [account for bucket in self.buckets for account in bucket[1]]
+        targets = [target for bucket in self.buckets for target in bucket[2]]
+
+        start = time.perf_counter()
+        detected = await asyncio.to_thread(
+            find_coordinated_clusters, accounts, targets, self.min_shared_targets,
+            self.min_lift, self.max_target_accounts, self.min_cluster_size
+        )
+        self.last_window_ms = (time.perf_counter() - start) * 1000
+        self.windows += 1
+
+        for cluster in detected:
+            key = frozenset(cluster["accounts"])
+            previous = self.clusters.pop(key, None)
+            cluster["cluster_id"] = previous["cluster_id"] if previous else f"cluster-{self.next_cluster}"
+            if previous is None:
+                self.next_cluster += 1
+            cluster["first_detected"] = previous["first_detected"] if previous else now
+            cluster["last_detected"] = now
+            self.clusters[key] = cluster
+            for account in cluster["accounts"]:
+                current = self.flags.get(account)
+                score = max(cluster["score"], current[0]) if current and current[1] > now else cluster["score"]
+                self.flags[account] = (score, now + self.flag_ttl_seconds, cluster["cluster_id"])
+        while len(self.clusters) > self.history:
+            self.clusters.popitem(last=False)
+        self.flags = {account: flag for account, flag in self.flags.items() if flag[1] > now}
+        return detected
+
+    def account_flag(self, account: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Coordination score and cluster of a flagged account, if it is currently flagged"""
+        flag = self.flags.get(account)
+        if flag is None or flag[1] <= (now if now is not None else time.time()):
+            return None
+        return {"score": flag[0], "cluster_id": flag[2]}
+
+    def recent_clusters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        clusters = list(self.clusters.values())[-limit:]
+        return [{**cluster, "accounts": sorted(cluster["accounts"])} for cluster in reversed(clusters)]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.hop_seconds)
+            try:
+                await self.analyze_window()
+            except Exception as e:
+                print(f"Error detecting coordinated accounts: {e}")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interactions": self.interactions,
+            "window_interactions": sum(len(bucket[1]) for bucket in self.buckets),
+            "windows_analyzed": self.windows,
+            "last_window_ms": self.last_window_ms,
+            "clusters": len(self.clusters),
+            "flagged_accounts": len(self.flags)
+        }
@@ -629,6 +629,7 @@ async def submit_to_main_api(analysis_data: dict, request_obj: DeepfakeAnalysisR
             response = await client.post(
                 f"{AGENTS_API_URL}/submit/deepfake",
                 json=submission_data,
+                headers={"X-Agent-ID": AGENT_ID},
                 timeout=15.0
             )
             
@@ -0,0 +1,238 @@
+"""
+CivicShield Claim Enrichment
+Runs text, network and deepfake analysis for a claim concurrently, each
+under its own deadline, and merges whatever came back into one enriched
+record. Enrichment latency is the slowest branch rather than the sum, and a
+failed or late branch is recorded on the claim instead of blocking it.
+Every branch is read-only: the network branch looks the author up instead
+of recording the post, and attached media is only fetched from public
+http(s) hosts, re-checked on every redirect and capped in size
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import quote, urljoin, urlparse
+
+import httpx
+
+RISK_ORDER = ("low", "medium", "high", "critical")
+HANDLE_PATTERN = re.compile(r"^@?\w+$")
+MEDIA_SCHEMES = ("http", "https")
+
+
+async def check_public_url(url: str):
+    """Raise ValueError unless url is http(s) and its host only resolves to public addresses"""
+    parsed = urlparse(url)
+    if parsed.scheme not in MEDIA_SCHEMES or not parsed.hostname:
+        raise ValueError(f"Media URL must be http or https: {url}")
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        addresses = await asyncio.get_running_loop().getaddrinfo(parsed.hostname, port)
+    except OSError as e:
+        raise ValueError(f"Cannot resolve media host {parsed.hostname}: {e}")
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if getattr(address, "ipv4_mapped", None):
+            address = address.ipv4_mapped
+        # Private, loopback, link-local, multicast and reserved ranges are all non-global
+        if not address.is_global:
+            raise ValueError(f"Media host {parsed.hostname} resolves to non-public address {address}")
+
+
+class BranchStats:
+    """Outcome counters and latency for one enrichment branch"""
+
+    def __init__(self):
+        self.outcomes: Dict[str, int] = {"ok": 0, "timeout": 0, "error": 0, "skipped": 0}
+        self.total_ms = 0.0
+
+    def record(self, status: str, elapsed_ms: float):
+        self.outcomes[status] += 1
+        self.total_ms += elapsed_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        ran = self.outcomes["ok"] + self.outcomes["timeout"] + self.outcomes["error"]
+        return {**self.outcomes, "avg_ms": self.total_ms / ran if ran else 0.0}
+
+
+class ClaimEnricher:
+    """Fans a claim out to the analysis agents and merges their verdicts"""
+
+    def __init__(self, text_analyzer_url: str, network_analyzer_url: str, deepfake_detector_url: str,
+                 text_timeout: float = 3.0, network_timeout: float = 2.0, deepfake_timeout: float = 20.0,
+                 concurrency: int = 32, media_max_bytes: int = 50 * 1024 * 1024, max_redirects: int = 3):
+        self.text_analyzer_url = text_analyzer_url
+        self.network_analyzer_url = network_analyzer_url
+        self.deepfake_detector_url = deepfake_detector_url
+        self.timeouts = {"text": text_timeout, "network": network_timeout, "deepfake": deepfake_timeout}
+        self.stats: Dict[str, BranchStats] = {name: BranchStats() for name in self.timeouts}
+        self.media_max_bytes = media_max_bytes  # The deepfake detector rejects files over 50MB
+        self.max_redirects = max_redirects
+        self.client: Optional[httpx.AsyncClient] = None
+        # Bounds claims enriched at once so a large batch cannot flood the agents
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    # Branches
+    async def analyze_text(self, claim_data: dict) -> dict:
+        response = await self.client.post(
+            f"{self.text_analyzer_url}/analyze/text",
+            json={"text": claim_data["text"]}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def analyze_network(self, claim_data: dict) -> dict:
+        response = await self.client.get(
+            f"{self.network_analyzer_url}/network/authors/{quote(claim_data['source']['author'].lstrip('@'))}"
+        )
+        if response.status_code == 404:
+            return {"known": False}
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch_media(self, url: str) -> Tuple[bytes, str]:
+        """Download media from a public host, following at most max_redirects, up to media_max_bytes"""
+        for _ in range(self.max_redirects + 1):
+            await check_public_url(url)
+            async with self.client.stream("GET", url, follow_redirects=False) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers.get("location", ""))
+                    continue
+                response.raise_for_status()
+                if int(response.headers.get("content-length") or 0) > self.media_max_bytes:
+                    raise ValueError(f"Media exceeds {self.media_max_bytes} bytes")
+                content = bytearray()
+                async for chunk in response.aiter_bytes():
+                    content.extend(chunk)
+                    if len(content) > self.media_max_bytes:
+                        raise ValueError(f"Media exceeds {self.media_max_bytes} bytes")
+                return bytes(content), response.headers.get("content-type", "application/octet-stream")
+        raise ValueError(f"Media URL redirected more than {self.max_redirects} times")
+
+    async def analyze_media(self, claim_data: dict) -> dict:
+        media = claim_data["media"]
+        content, content_type = await self.fetch_media(media["url"])
+
+        is_video = media.get("type") == "video"
+        filename = os.path.basename(urlparse(media["url"]).path) or ("media.mp4" if is_video else "media.jpg")
+        analysis_request = {
+            "analysis_type": "frame_anomaly" if is_video else "image_classification",
+            "priority": claim_data.get("riskLevel") or "medium",
+            "source_platform": claim_data["source"]["platform"],
+            "source_url": claim_data["source"]["url"],
+            "author_handle": claim_data["source"]["author"]
+        }
+        response = await self.client.post(
+            f"{self.deepfake_detector_url}/analyze/{'video' if is_video else 'image'}",
+            files={"file": (filename, content, content_type)},
+            data={"analysis_request": json.dumps(analysis_request)}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def run_branch(self, name: str, branch: Optional[Callable[[dict], Awaitable[dict]]], claim_data: dict) -> dict:
+        """Run one branch under its deadline, converting failures into a status"""
+        if branch is None:
+            self.stats[name].record("skipped", 0.0)
+            return {"status": "skipped"}
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(branch(claim_data), self.timeouts[name])
+            outcome = {"status": "ok", "result": result}
+        except asyncio.TimeoutError:
+            outcome = {"status": "timeout"}
+        except Exception as e:
+            outcome = {"status": "error", "error": str(e)}
+        outcome["elapsed_ms"] = (time.perf_counter() - start) * 1000
+        self.stats[name].record(outcome["status"], outcome["elapsed_ms"])
+        return outcome
+
+    async def enrich(self, claim_data: dict) -> dict:
+        """Return the claim merged with every branch that finished in time"""
+        await self.start()
+        author = claim_data["source"].get("author")
+        media = claim_data.get("media") or {}
+
+        async with self.semaphore:
+            text, network, deepfake = await asyncio.gather(
+                self.run_branch("text", self.analyze_text, claim_data),
+                self.run_branch("network", self.analyze_network if author and HANDLE_PATTERN.match(author) else None, claim_data),
+                self.run_branch("deepfake", self.analyze_media if media.get("url") else None, claim_data)
+            )
+        return merge_enrichment(claim_data, text, network, deepfake)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+
+def escalate(current: Optional[str], candidate: Optional[str]) -> Optional[str]:
+    """The higher of two risk levels"""
+    if candidate not in RISK_ORDER:
+        return current
+    if current not in RISK_ORDER:
+        return candidate
+    return max(current, candidate, key=RISK_ORDER.index)
+
+
+def merge_enrichment(claim_data: dict, text: dict, network: dict, deepfake: dict) -> dict:
+    """Fold branch results into a copy of the claim; missing branches only leave a status"""
+    enriched = dict(claim_data)
+    risk_level = claim_data.get("riskLevel")
+    summary: Dict[str, Any] = {}
+
+    for name, outcome in (("text", text), ("network", network), ("deepfake", deepfake)):
+        summary[name] = {key: value for key, value in outcome.items() if key != "result"}
+
+    if text["status"] == "ok":
+        result = text["result"]
+        summary["text"].update({
+            "label": result.get("label"),
+            "confidence": result.get("confidence"),
+            "verdict": result.get("combined_verdict")
+        })
+        if result.get("label") == "fake":
+            risk_level = escalate(risk_level, "high" if result.get("confidence", 0) >= 0.8 else "medium")
+
+    if network["status"] == "ok":
+        result = network["result"]
+        coordination = result.get("coordination") or {}
+        summary["network"].update({
+            "known_author": result.get("known", True),
+            "author_credibility": result.get("credibilityScore"),
+            "author_risk_level": result.get("riskLevel"),
+            "coordination_score": coordination.get("score")
+        })
+        risk_level = escalate(risk_level, result.get("riskLevel"))
+
+    if deepfake["status"] == "ok":
+        result = deepfake["result"]
+        confidence = result.get("overall_confidence", 0)
+        summary["deepfake"].update({
+            "analysis_id": result.get("analysis_id"),
+            "is_deepfake": result.get("is_deepfake"),
+            "confidence": confidence
+        })
+        if result.get("is_deepfake"):
+            enriched["deepfakeStatus"] = "confirmed" if confidence >= 0.8 else "suspected"
+        else:
+            enriched["deepfakeStatus"] = "none"
+        risk_level = escalate(risk_level, result.get("risk_level"))
+
+    enriched["riskLevel"] = risk_level
+    enriched["enrichment"] = summary
+    return enriched
@@ -0,0 +1,131 @@
+"""
+CivicShield Live Event Fan-out
+Pushes accepted claims and alerts to dashboard subscribers. Every subscriber
+owns a bounded buffer that drops its oldest events when full, so a slow
+client only loses its own backlog and never stalls the publisher
+"""
+
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+
+class EventFilter:
+    """Subscriber-side filter on event type, severity, category and platform"""
+
+    def __init__(self, types: Optional[Set[str]] = None, severities: Optional[Set[str]] = None,
+                 categories: Optional[Set[str]] = None, platforms: Optional[Set[str]] = None):
+        self.types = types
+        self.severities = severities
+        self.categories = categories
+        self.platforms = platforms
+
+    @classmethod
+    def from_params(cls, types: Optional[str] = None, severity: Optional[str] = None,
+                    category: Optional[str] = None, platform: Optional[str] = None) -> "EventFilter":
+        """Build a filter from comma-separated query parameters"""
+        def parse(value: Optional[str]) -> Optional[Set[str]]:
+            if not value:
+                return None
+            return {part.strip().lower() for part in value.split(",") if part.strip()}
+
+        return cls(parse(types), parse(severity), parse(category), parse(platform))
+
+    def matches(self, event: dict) -> bool:
+        """Check an event envelope against every configured criterion"""
+        if self.types and event["type"] not in self.types:
+            return False
+        if self.severities and event.get("severity") not in self.severities:
+            return False
+        if self.categories and event.get("category") not in self.categories:
+            return False
+        if self.platforms and event.get("platform") not in self.platforms:
+            return False
+        return True
+
+
+class Subscriber:
+    """One connected dashboard client with its own bounded event buffer"""
+
+    def __init__(self, event_filter: EventFilter, buffer_size: int):
+        self.filter = event_filter
+        self.buffer = deque(maxlen=buffer_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.delivered = 0
+
+    def offer(self, event: dict):
+        """Queue an event without blocking, evicting the oldest one when full"""
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(event)
+        self.ready.set()
+
+    async def next_batch(self, timeout: float) -> list:
+        """Wait up to timeout seconds and drain everything buffered so far"""
+        if not self.buffer:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+
+        events = list(self.buffer)
+        self.buffer.clear()
+        self.delivered += len(events)
+        return events
+
+
+class FanoutHub:
+    """Registry of live subscribers and the publish side of the stream"""
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0  # Events emitted, whether or not anyone was listening
+        self.offered = 0  # Event copies queued to matching subscribers
+        # Deliveries and drops of subscribers that have since disconnected
+        self.departed_delivered = 0
+        self.departed_dropped = 0
+
+    def subscribe(self, event_filter: EventFilter) -> Subscriber:
+        subscriber = Subscriber(event_filter, self.buffer_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            self.departed_delivered += subscriber.delivered
+            self.departed_dropped += subscriber.dropped
+
+    def publish(self, event_type: str, data: dict, severity: Optional[str] = None,
+                category: Optional[str] = None, platform: Optional[str] = None):
+        """Offer an event to every matching subscriber; never awaits"""
+        self.published += 1
+        if not self.subscribers:
+            return
+
+        # Filters are parsed lowercase, so envelope fields are lowercased to match
+        event = {
+            "type": event_type,
+            "severity": severity.lower() if severity else None,
+            "category": category.lower() if category else None,
+            "platform": platform.lower() if platform else None,
+            "data": data,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        for subscriber in self.subscribers:
+            if subscriber.filter.matches(event):
+                subscriber.offer(event)
+                self.offered += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "offered": self.offered,
+            "delivered": self.departed_delivered + sum(subscriber.delivered for subscriber in self.subscribers),
+            "dropped": self.departed_dropped + sum(subscriber.dropped for subscriber in self.subscribers)
+        }
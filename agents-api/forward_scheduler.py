@@ -0,0 +1,194 @@
+"""
+CivicShield Forwarding Scheduler
+Priority lanes for work forwarded to the main API. Lanes are served by
+smooth weighted round-robin so critical items go first without starving
+the rest. Lower lanes whose head has waited past the starvation limit earn
+extra round-robin credit while the critical lane is empty, so they catch up
+without ever jumping ahead of queued critical work. Each lane is bounded; a
+job offered to a full lane is refused with LaneFull and counted as dropped
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+PRIORITY_LANES = ("critical", "high", "medium", "low")
+DEFAULT_LANE_WEIGHTS = {"critical": 8, "high": 4, "medium": 2, "low": 1}
+
+
+def lane_for(level: Optional[str]) -> str:
+    """Map a severity / risk level onto a lane, defaulting to medium"""
+    return level if level in PRIORITY_LANES else "medium"
+
+
+class LaneFull(Exception):
+    """Raised when a job is offered to a lane that is already at its maximum size"""
+
+    def __init__(self, lane: str):
+        super().__init__(f"Forwarding lane '{lane}' is full")
+        self.lane = lane
+
+
+class LaneStats:
+    """Queue-wait statistics for one lane"""
+
+    def __init__(self, sample_size: int = 1000):
+        self.forwarded = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent = deque(maxlen=sample_size)
+
+    def record(self, wait: float):
+        self.forwarded += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent.append(wait)
+
+    def snapshot(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+
+        def percentile(fraction: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(int(len(recent) * fraction), len(recent) - 1)]
+
+        return {
+            "forwarded": self.forwarded,
+            "avg_wait_ms": self.total_wait / self.forwarded * 1000 if self.forwarded else 0.0,
+            "p50_wait_ms": percentile(0.5) * 1000,
+            "p95_wait_ms": percentile(0.95) * 1000,
+            "max_wait_ms": self.max_wait * 1000
+        }
+
+
+class PriorityForwarder:
+    """Weighted fair queue of forwarding jobs drained by a pool of workers"""
+
+    def __init__(self, send: Callable[[str, dict], Awaitable[None]], workers: int = 4,
+                 weights: Optional[Dict[str, int]] = None, starvation_seconds: float = 5.0,
+                 max_lane_items: int = 10000):
+        self.send = send
+        self.worker_count = workers
+        self.weights = weights or dict(DEFAULT_LANE_WEIGHTS)
+        self.starvation_seconds = starvation_seconds
+        self.max_lane_items = max_lane_items
+        self.lanes: Dict[str, deque] = {lane: deque() for lane in PRIORITY_LANES}
+        self.credits: Dict[str, int] = {lane: 0 for lane in PRIORITY_LANES}
+        self.stats: Dict[str, LaneStats] = {lane: LaneStats() for lane in PRIORITY_LANES}
+        self.dropped: Dict[str, int] = {lane: 0 for lane in PRIORITY_LANES}
+        self.pending = asyncio.Semaphore(0)
+        self.workers = []
+        self.closing = False
+        self.starvation_promotions = 0
+
+    def submit(self, endpoint: str, data: dict, priority: Optional[str] = None):
+        """Queue a forwarding job on the lane for its priority, or raise LaneFull"""
+        self.submit_all([(endpoint, data, priority)])
+
+    def submit_all(self, jobs: Iterable[Tuple[str, dict, Optional[str]]]):
+        """Queue several jobs, or none of them when any of their lanes lacks room"""
+        jobs = [(endpoint, data, lane_for(priority)) for endpoint, data, priority in jobs]
+        needed: Dict[str, int] = {}
+        for _, _, lane in jobs:
+            needed[lane] = needed.get(lane, 0) + 1
+        full = [lane for lane, count in needed.items() if len(self.lanes[lane]) + count > self.max_lane_items]
+        if full:
+            for lane, count in needed.items():
+                self.dropped[lane] += count
+            raise LaneFull(full[0])
+        now = time.monotonic()
+        for endpoint, data, lane in jobs:
+            self.lanes[lane].append((now, endpoint, data))
+            self.pending.release()
+
+    def _effective_weight(self, lane: str, now: float, critical_waiting: bool) -> int:
+        """Lane weight, aged up towards the critical weight once its head is starving"""
+        weight = self.weights[lane]
+        if lane == PRIORITY_LANES[0] or critical_waiting:
+            return weight
+        waited = now - self.lanes[lane][0][0]
+        if waited < self.starvation_seconds:
+            return weight
+        periods = int(waited // self.starvation_seconds)
+        return max(weight, min(weight << periods, self.weights[PRIORITY_LANES[0]]))
+
+    def _next_lane(self, now: float) -> str:
+        """Pick the lane to serve next by smooth weighted round-robin over the non-empty lanes"""
+        active = [lane for lane in PRIORITY_LANES if self.lanes[lane]]
+        critical_waiting = active[0] == PRIORITY_LANES[0]
+
+        total_weight = 0
+        aged = False
+        for lane in active:
+            weight = self._effective_weight(lane, now, critical_waiting)
+            aged = aged or weight > self.weights[lane]
+            self.credits[lane] += weight
+            total_weight += weight
+        chosen = max(active, key=lambda lane: self.credits[lane])
+        self.credits[chosen] -= total_weight
+        if aged and chosen != active[0]:
+            self.starvation_promotions += 1
+        return chosen
+
+    def _dequeue(self):
+        now = time.monotonic()
+        lane = self._next_lane(now)
+        enqueued_at, endpoint, data = self.lanes[lane].popleft()
+        self.stats[lane].record(now - enqueued_at)
+        return endpoint, data
+
+    async def _worker(self):
+        while True:
+            await self.pending.acquire()
+            if self.closing:
+                return
+            endpoint, data = self._dequeue()
+            try:
+                await self.send(endpoint, data)
+            except Exception as e:
+                print(f"Error in forwarding worker: {str(e)}")
+
+    def start(self):
+        """Start the worker pool on the running event loop"""
+        if not self.workers:
+            self.closing = False
+            self.pending = asyncio.Semaphore(self.depth())
+            self.workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def stop(self, drain_seconds: float = 5.0):
+        """Give queued jobs a bounded chance to drain, then wait for in-flight sends and stop the workers"""
+        deadline = time.monotonic() + drain_seconds
+        while self.depth() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        # Workers finish the send they are on and exit at their next dequeue
+        self.closing = True
+        for _ in self.workers:
+            self.pending.release()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.depth():
+            print(f"Forwarding stopped with {self.depth()} jobs still queued")
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.lanes.values())
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-lane depth and queue latency for export"""
+        now = time.monotonic()
+        lanes = {}
+        for lane in PRIORITY_LANES:
+            queue = self.lanes[lane]
+            lanes[lane] = {
+                "depth": len(queue),
+                "oldest_wait_ms": (now - queue[0][0]) * 1000 if queue else 0.0,
+                "weight": self.weights[lane],
+                "max_items": self.max_lane_items,
+                "dropped": self.dropped[lane],
+                **self.stats[lane].snapshot()
+            }
+        return {
+            "lanes": lanes,
+            "workers": len(self.workers),
+            "starvation_promotions": self.starvation_promotions
+        }
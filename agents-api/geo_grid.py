@@ -0,0 +1,218 @@
+"""
+CivicShield Geo Grid
+Multi-resolution geohash aggregation of claim locations for the heatmap.
+Each claim is hashed once at full precision; every coarser cell is a prefix
+of that hash. Counts per cell and risk level are kept in hourly ring buckets,
+and viewport queries only look up the cells that cover the viewport
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+RISK_LEVELS = ("low", "medium", "high", "critical")
+MAX_PRECISION = 7
+
+
+def geohash_encode(lat: float, lng: float, precision: int = MAX_PRECISION) -> str:
+    """Standard geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(lat, lng) size in degrees of a geohash cell at the given precision"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def cell_center(geohash: str) -> Tuple[float, float]:
+    """Center point of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+
+def precision_for_zoom(zoom: int, cells_per_tile: int = 16) -> int:
+    """Coarsest precision whose cells are at most 1/cells_per_tile of a map tile wide"""
+    target_width = 360.0 / (1 << max(zoom, 0)) / cells_per_tile
+    for precision in range(1, MAX_PRECISION + 1):
+        if cell_size(precision)[1] <= target_width:
+            return precision
+    return MAX_PRECISION
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """(south, west, north, east) of a slippy-map tile"""
+    n = 1 << z
+
+    def tile_lat(tile_y: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return tile_lat(y + 1), x / n * 360.0 - 180.0, tile_lat(y), (x + 1) / n * 360.0 - 180.0
+
+
+def claim_coordinates(region: Optional[dict]) -> Optional[Tuple[float, float]]:
+    """Extract (lat, lng) from a claim region, flat or under "coordinates" """
+    if not region:
+        return None
+    coordinates = region.get("coordinates")
+    source = coordinates if isinstance(coordinates, dict) else region
+    lat = source.get("lat", source.get("latitude"))
+    lng = source.get("lng", source.get("lon", source.get("longitude")))
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+class GeoGrid:
+    """Per-cell risk counts for every precision, in hourly ring buckets"""
+
+    def __init__(self, bucket_seconds: int = 3600, bucket_count: int = 24, max_cells_per_query: int = 4096):
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = bucket_count
+        self.max_cells_per_query = max_cells_per_query
+        self.stamps = [-1] * bucket_count
+        # bucket -> precision -> geohash -> counts per risk level
+        self.buckets: List[List[Dict[str, List[int]]]] = [self._empty_bucket() for _ in range(bucket_count)]
+        self.located = 0
+        self.unlocated = 0
+
+    @staticmethod
+    def _empty_bucket() -> List[Dict[str, List[int]]]:
+        return [{} for _ in range(MAX_PRECISION + 1)]
+
+    def record(self, region: Optional[dict], risk_level: Optional[str], now: Optional[float] = None):
+        """Count one claim in every resolution of the cell it falls in"""
+        point = claim_coordinates(region)
+        if point is None:
+            self.unlocated += 1
+            return
+        self.located += 1
+
+        stamp = int((now if now is not None else time.time()) // self.bucket_seconds)
+        index = stamp % self.bucket_count
+        if self.stamps[index] != stamp:
+            self.stamps[index] = stamp
+            self.buckets[index] = self._empty_bucket()
+
+        risk_index = RISK_LEVELS.index(risk_level) if risk_level in RISK_LEVELS else 1
+        geohash = geohash_encode(point[0], point[1], MAX_PRECISION)
+        bucket = self.buckets[index]
+        for precision in range(1, MAX_PRECISION + 1):
+            cells = bucket[precision]
+            prefix = geohash[:precision]
+            counts = cells.get(prefix)
+            if counts is None:
+                counts = cells[prefix] = [0, 0, 0, 0]
+            counts[risk_index] += 1
+
+    def covering_cells(self, south: float, west: float, north: float, east: float, precision: int) -> List[str]:
+        """Geohashes of every cell intersecting the bounding box"""
+        lat_step, lng_step = cell_size(precision)
+        south, north = max(south, -90.0), min(north, 90.0)
+        west, east = max(west, -180.0), min(east, 180.0)
+        lat_start = math.floor((south + 90) / lat_step)
+        lat_end = min(math.floor((north + 90) / lat_step), int(180 / lat_step) - 1)
+        lng_start = math.floor((west + 180) / lng_step)
+        lng_end = min(math.floor((east + 180) / lng_step), int(360 / lng_step) - 1)
+
+        cells = []
+        for lat_index in range(lat_start, lat_end + 1):
+            center_lat = -90 + (lat_index + 0.5) * lat_step
+            for lng_index in range(lng_start, lng_end + 1):
+                center_lng = -180 + (lng_index + 0.5) * lng_step
+                cells.append(geohash_encode(center_lat, center_lng, precision))
+        return cells
+
+    def query(self, south: float, west: float, north: float, east: float, precision: int,
+              window_hours: int = 24, now: Optional[float] = None) -> dict:
+        """Non-empty cells inside the viewport, summed over the last window_hours buckets"""
+        precision = max(1, min(precision, MAX_PRECISION))
+        # Coarsen until the viewport fits the per-query cell budget
+        while precision > 1:
+            lat_step, lng_step = cell_size(precision)
+            estimate = (math.ceil((north - south) / lat_step) + 1) * (math.ceil((east - west) / lng_step) + 1)
+            if estimate <= self.max_cells_per_query:
+                break
+            precision -= 1
+
+        current = int((now if now is not None else time.time()) // self.bucket_seconds)
+        live_buckets = []
+        for stamp in range(current - min(window_hours, self.bucket_count) + 1, current + 1):
+            index = stamp % self.bucket_count
+            if self.stamps[index] == stamp:
+                live_buckets.append(self.buckets[index][precision])
+
+        cells = []
+        if live_buckets:
+            for geohash in self.covering_cells(south, west, north, east, precision):
+                counts = [0, 0, 0, 0]
+                for bucket in live_buckets:
+                    cell_counts = bucket.get(geohash)
+                    if cell_counts:
+                        for risk_index in range(4):
+                            counts[risk_index] += cell_counts[risk_index]
+                total = sum(counts)
+                if total:
+                    lat, lng = cell_center(geohash)
+                    cells.append({
+                        "geohash": geohash,
+                        "lat": lat,
+                        "lng": lng,
+                        "total": total,
+                        "by_risk": dict(zip(RISK_LEVELS, counts))
+                    })
+
+        return {
+            "precision": precision,
+            "window_hours": min(window_hours, self.bucket_count),
+            "cells": cells
+        }
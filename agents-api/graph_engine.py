@@ -0,0 +1,500 @@
+"""
+CivicShield Graph Engine
+In-process mirror of the connections collection for the network analyzer.
+Handles map to dense int ids; edges live in compressed sparse row arrays
+(int32 indices, float32 weights) for both directions, plus a small delta of
+edges upserted since the last compaction. Compaction freezes the delta,
+merges it into new CSR arrays on a worker thread and swaps them in, so the
+event loop never sorts the edge list. Degree, reach and neighbour queries
+are answered from memory instead of MongoDB. Weakly connected components
+are tracked incrementally with union-find
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+CSRArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def build_csr(n: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray) -> CSRArrays:
+    """(indptr, indices, weights) for both directions from COO arrays, summing duplicate edges"""
+    keys, inverse = np.unique(sources * n + targets, return_inverse=True)
+    summed = np.bincount(inverse, weights=weights, minlength=len(keys)).astype(np.float32)
+    sources = keys // n
+    targets = keys % n
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+
+    order = np.lexsort((sources, targets))
+    t_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=n), out=t_indptr[1:])
+    return indptr, targets.astype(np.int32), summed, t_indptr, sources[order].astype(np.int32), summed[order]
+
+
+def merge_csr(n: int, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray,
+              delta_out: Dict[int, Dict[int, float]]) -> CSRArrays:
+    """Fold a frozen delta into an out-CSR; safe to run on a worker thread since nothing is mutated"""
+    base_sources = np.repeat(np.arange(len(indptr) - 1, dtype=np.int64), np.diff(indptr))
+    delta_sources, delta_targets, delta_weights = [], [], []
+    for source, targets in delta_out.items():
+        for target, weight in targets.items():
+            delta_sources.append(source)
+            delta_targets.append(target)
+            delta_weights.append(weight)
+    return build_csr(
+        n,
+        np.concatenate([base_sources, np.asarray(delta_sources, dtype=np.int64)]),
+        np.concatenate([indices.astype(np.int64), np.asarray(delta_targets, dtype=np.int64)]),
+        np.concatenate([weights.astype(np.float64), np.asarray(delta_weights, dtype=np.float64)])
+    )
+
+
+class UnionFind:
+    """Disjoint sets with union by size and path halving, plus a component-size histogram"""
+
+    def __init__(self):
+        self.parent: List[int] = []
+        self.size: List[int] = []
+        self.components = 0
+        self.histogram: Dict[int, int] = {}  # component size -> number of components
+        self.largest_root = -1
+
+    def _count_size(self, size: int, delta: int):
+        remaining = self.histogram.get(size, 0) + delta
+        if remaining:
+            self.histogram[size] = remaining
+        else:
+            del self.histogram[size]
+
+    def add(self) -> int:
+        """New singleton set; returns its element id"""
+        element = len(self.parent)
+        self.parent.append(element)
+        self.size.append(1)
+        self.components += 1
+        self._count_size(1, 1)
+        if self.largest_root < 0:
+            self.largest_root = element
+        return element
+
+    def find(self, element: int) -> int:
+        parent = self.parent
+        while parent[element] != element:
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, a: int, b: int) -> int:
+        """Merge the sets containing a and b; returns the surviving root"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        size_a, size_b = self.size[root_a], self.size[root_b]
+        self.parent[root_b] = root_a
+        self.size[root_a] = size_a + size_b
+        self.components -= 1
+        self._count_size(size_a, -1)
+        self._count_size(size_b, -1)
+        self._count_size(size_a + size_b, 1)
+        if size_a + size_b > self.size[self.find(self.largest_root)]:
+            self.largest_root = root_a
+        return root_a
+
+    def load_labels(self, labels: np.ndarray):
+        """Replace the sets with precomputed component labels (one per element)"""
+        n = len(labels)
+        if not n:
+            return
+        # The first element carrying each label becomes that component's root
+        _, first, inverse, counts = np.unique(labels, return_index=True, return_inverse=True, return_counts=True)
+        sizes = np.ones(n, dtype=np.int64)
+        sizes[first] = counts
+        self.parent = first[inverse].tolist()
+        self.size = sizes.tolist()
+        self.components = len(first)
+        histogram_sizes, frequency = np.unique(counts, return_counts=True)
+        self.histogram = dict(zip(histogram_sizes.tolist(), frequency.tolist()))
+        self.largest_root = int(first[np.argmax(counts)])
+
+    def largest(self) -> Tuple[int, int]:
+        """(root, size) of the largest component"""
+        if self.largest_root < 0:
+            return -1, 0
+        root = self.find(self.largest_root)
+        return root, self.size[root]
+
+
+class CSRGraph:
+    """Directed weighted graph in CSR form with an incremental edge delta"""
+
+    def __init__(self, compact_threshold: int = 50000):
+        self.compact_threshold = compact_threshold
+        self.ids: Dict[str, int] = {}
+        self.handles: List[str] = []
+
+        # Per-node arrays, grown by doubling
+        self.followers = np.zeros(1024, dtype=np.float64)
+        self.out_degree = np.zeros(1024, dtype=np.int32)
+        self.in_degree = np.zeros(1024, dtype=np.int32)
+        # Ego-network visit marks: a node is visited when its stamp equals the current epoch
+        self.visit_stamp = np.zeros(1024, dtype=np.int64)
+        self.visit_epoch = 0
+
+        # Compacted edges: out-CSR and its transpose (in-CSR) over the first base_nodes ids
+        self.base_nodes = 0
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.t_indptr = np.zeros(1, dtype=np.int64)
+        self.t_indices = np.zeros(0, dtype=np.int32)
+        self.t_weights = np.zeros(0, dtype=np.float32)
+
+        # Weight added since the last compaction: source -> target -> weight (and reverse)
+        self.delta_out: Dict[int, Dict[int, float]] = {}
+        self.delta_in: Dict[int, Dict[int, float]] = {}
+        self.delta_size = 0
+        # Delta being merged by a running compaction; read alongside the live delta until the swap
+        self.frozen_out: Dict[int, Dict[int, float]] = {}
+        self.frozen_in: Dict[int, Dict[int, float]] = {}
+        self.frozen_size = 0
+        self.compact_lock = asyncio.Lock()
+        self.compaction_task: Optional[asyncio.Task] = None
+        self.edge_count = 0
+        self.compactions = 0
+        self.components = UnionFind()
+
+    @property
+    def node_count(self) -> int:
+        return len(self.handles)
+
+    def _grow(self, size: int):
+        capacity = len(self.followers)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name in ("followers", "out_degree", "in_degree", "visit_stamp"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add_node(self, handle: str) -> int:
+        node = self.ids.get(handle)
+        if node is None:
+            node = self.ids[handle] = len(self.handles)
+            self.handles.append(handle)
+            self._grow(len(self.handles))
+            self.components.add()
+        return node
+
+    def update_followers(self, handle: str, followers: float):
+        """Raise a node's followers estimate (mirrors the $max update in MongoDB)"""
+        node = self.add_node(handle)
+        if followers > self.followers[node]:
+            self.followers[node] = followers
+
+    def _base_row(self, node: int, transpose: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        if node >= self.base_nodes:
+            return self.indices[:0], self.weights[:0]
+        if transpose:
+            start, end = self.t_indptr[node], self.t_indptr[node + 1]
+            return self.t_indices[start:end], self.t_weights[start:end]
+        start, end = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def has_edge(self, source: int, target: int) -> bool:
+        if target in self.delta_out.get(source, ()) or target in self.frozen_out.get(source, ()):
+            return True
+        row, _ = self._base_row(source)
+        position = np.searchsorted(row, target)
+        return position < len(row) and row[position] == target
+
+    def add_edge(self, source: str, target: str, weight: float):
+        """Add weight to the source -> target edge, creating nodes and edge as needed"""
+        source_id = self.add_node(source)
+        target_id = self.add_node(target)
+        if not self.has_edge(source_id, target_id):
+            self.out_degree[source_id] += 1
+            self.in_degree[target_id] += 1
+            self.edge_count += 1
+            self.components.union(source_id, target_id)
+
+        targets = self.delta_out.setdefault(source_id, {})
+        if target_id not in targets:
+            self.delta_size += 1
+        targets[target_id] = targets.get(target_id, 0.0) + weight
+        sources = self.delta_in.setdefault(target_id, {})
+        sources[source_id] = sources.get(source_id, 0.0) + weight
+
+        if self.delta_size >= self.compact_threshold:
+            self._schedule_compaction()
+
+    def _schedule_compaction(self):
+        """Start a background compaction unless one is already pending"""
+        if self.compaction_task is not None:
+            return
+        try:
+            self.compaction_task = asyncio.get_running_loop().create_task(self.compact())
+        except RuntimeError:
+            return  # No event loop; the delta is folded in by the next compact()
+        self.compaction_task.add_done_callback(self._compaction_done)
+
+    def _compaction_done(self, task: asyncio.Task):
+        self.compaction_task = None
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error compacting network graph: {task.exception()!r}")
+        elif self.delta_size >= self.compact_threshold:
+            self._schedule_compaction()
+
+    def load(self, nodes: Iterable[Tuple[str, float]], edges: Iterable[Tuple[str, str, float]]):
+        """Bulk-load nodes (handle, followers) and edges (source, target, weight), then compact"""
+        for handle, followers in nodes:
+            self.update_followers(handle, followers or 0)
+
+        sources, targets, weights = [], [], []
+        for source, target, weight in edges:
+            sources.append(self.add_node(source))
+            targets.append(self.add_node(target))
+            weights.append(weight)
+        self._swap(self.node_count, build_csr(
+            self.node_count,
+            np.asarray(sources, dtype=np.int64),
+            np.asarray(targets, dtype=np.int64),
+            np.asarray(weights, dtype=np.float64)
+        ))
+        self.edge_count = len(self.indices)
+        self.out_degree[:self.node_count] = np.diff(self.indptr)
+        self.in_degree[:self.node_count] = np.diff(self.t_indptr)
+
+        n = self.node_count
+        matrix = sparse.csr_matrix((np.ones(len(self.indices)), self.indices, self.indptr), shape=(n, n))
+        self.components.load_labels(connected_components(matrix, directed=True, connection="weak")[1])
+
+    async def compact(self):
+        """Fold the delta into fresh CSR arrays built on a worker thread, then swap them in"""
+        async with self.compact_lock:
+            if not self.delta_size:
+                return
+            # Freeze the delta: new edges go to a fresh one while the merge runs
+            self.frozen_out, self.frozen_in, self.frozen_size = self.delta_out, self.delta_in, self.delta_size
+            self.delta_out, self.delta_in, self.delta_size = {}, {}, 0
+            n = self.node_count
+            try:
+                arrays = await asyncio.to_thread(merge_csr, n, self.indptr, self.indices, self.weights, self.frozen_out)
+            except BaseException:
+                # Put the frozen edges back under the live delta so nothing is lost
+                for source, targets in self.frozen_out.items():
+                    for target, weight in targets.items():
+                        live = self.delta_out.setdefault(source, {})
+                        if target not in live:
+                            self.delta_size += 1
+                        live[target] = live.get(target, 0.0) + weight
+                        sources = self.delta_in.setdefault(target, {})
+                        sources[source] = sources.get(source, 0.0) + weight
+                self.frozen_out, self.frozen_in, self.frozen_size = {}, {}, 0
+                raise
+            self._swap(n, arrays)
+            self.frozen_out, self.frozen_in, self.frozen_size = {}, {}, 0
+            self.compactions += 1
+
+    def _swap(self, n: int, arrays: CSRArrays):
+        """Install CSR arrays covering the first n nodes in one step
+
+        New arrays are assigned rather than filled in place, so snapshots taken
+        by background jobs stay valid while the graph keeps changing
+        """
+        self.indptr, self.indices, self.weights, self.t_indptr, self.t_indices, self.t_weights = arrays
+        self.base_nodes = n
+
+    async def snapshot(self) -> Tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+        """Compact and return (node_count, indptr, indices, weights) covering every node
+
+        The arrays are never modified in place, so they can be read from
+        another thread while the graph keeps changing. Edges added while the
+        compaction runs are left for the next one
+        """
+        await self.compact()
+        n = self.node_count
+        indptr = self.indptr
+        if len(indptr) < n + 1:
+            indptr = np.concatenate([indptr, np.full(n + 1 - len(indptr), indptr[-1], dtype=np.int64)])
+        return n, indptr, self.indices, self.weights
+
+    def neighbors(self, node: int, transpose: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, weights) of out-neighbours, or in-neighbours when transpose is set"""
+        row, row_weights = self._base_row(node, transpose)
+        delta = (self.delta_in if transpose else self.delta_out).get(node)
+        frozen = (self.frozen_in if transpose else self.frozen_out).get(node)
+        if not delta and not frozen:
+            return row, row_weights
+        combined = dict(zip(row.tolist(), row_weights.tolist()))
+        for pending in (frozen, delta):
+            for other, weight in (pending or {}).items():
+                combined[other] = combined.get(other, 0.0) + weight
+        return (
+            np.fromiter(combined.keys(), dtype=np.int32, count=len(combined)),
+            np.fromiter(combined.values(), dtype=np.float32, count=len(combined))
+        )
+
+    def _adjacent(self, node: int, direction: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Neighbours in the given direction ("out", "in" or "both", weights summed)"""
+        if direction == "out":
+            return self.neighbors(node)
+        if direction == "in":
+            return self.neighbors(node, transpose=True)
+        out_ids, out_weights = self.neighbors(node)
+        in_ids, in_weights = self.neighbors(node, transpose=True)
+        ids = np.concatenate([out_ids, in_ids]).astype(np.int64)
+        weights = np.concatenate([out_weights, in_weights]).astype(np.float64)
+        if not len(ids):
+            return ids, weights
+        unique, inverse = np.unique(ids, return_inverse=True)
+        return unique, np.bincount(inverse, weights=weights)
+
+    def ego_network(self, handle: str, hops: int = 2, fan_out: int = 25, max_nodes: int = 500,
+                    max_edges: int = 2000, direction: str = "both") -> Optional[Dict[str, Any]]:
+        """Bounded k-hop neighbourhood of a node
+
+        Each hop keeps at most fan_out of every frontier node's heaviest
+        unvisited neighbours, then admits candidates across the whole frontier in weight
+        order until max_nodes is reached. Edges are those among the admitted
+        nodes, heaviest first, up to max_edges
+        """
+        center = self.ids.get(handle)
+        if center is None:
+            return None
+
+        distance: Dict[int, int] = {center: 0}
+        # A fresh epoch clears every visit mark without touching the O(n) array
+        self.visit_epoch += 1
+        epoch = self.visit_epoch
+        stamp = self.visit_stamp
+        stamp[center] = epoch
+        frontier = [center]
+        truncated = False
+        for hop in range(1, hops + 1):
+            if not frontier or len(distance) >= max_nodes:
+                break
+            candidates: Dict[int, float] = {}
+            for node in frontier:
+                ids, weights = self._adjacent(node, direction)
+                unvisited = stamp[ids] != epoch
+                ids, weights = ids[unvisited], weights[unvisited]
+                if len(ids) > fan_out:
+                    keep = np.argpartition(-weights, fan_out - 1)[:fan_out]
+                    ids, weights = ids[keep], weights[keep]
+                    truncated = True
+                for other, weight in zip(ids.tolist(), weights.tolist()):
+                    if weight > candidates.get(other, -1.0):
+                        candidates[other] = weight
+
+            frontier = []
+            for other in sorted(candidates, key=candidates.get, reverse=True):
+                if len(distance) >= max_nodes:
+                    truncated = True
+                    break
+                distance[other] = hop
+                stamp[other] = epoch
+                frontier.append(other)
+
+        # Induced edges among admitted nodes
+        sources, targets, weights = [], [], []
+        for node in distance:
+            ids, row_weights = self.neighbors(node)
+            inside = stamp[ids] == epoch
+            count = int(inside.sum())
+            if count:
+                sources.append(np.full(count, node, dtype=np.int64))
+                targets.append(ids[inside].astype(np.int64))
+                weights.append(row_weights[inside].astype(np.float64))
+        edges = []
+        if sources:
+            sources = np.concatenate(sources)
+            targets = np.concatenate(targets)
+            weights = np.concatenate(weights)
+            if len(weights) > max_edges:
+                keep = np.argsort(-weights, kind="stable")[:max_edges]
+                sources, targets, weights = sources[keep], targets[keep], weights[keep]
+                truncated = True
+            edges = [
+                {"source": self.handles[source], "target": self.handles[target], "weight": weight}
+                for source, target, weight in zip(sources.tolist(), targets.tolist(), weights.tolist())
+            ]
+
+        nodes = [
+            {
+                "id": self.handles[node],
+                "hop": hop,
+                "followers_estimate": float(self.followers[node]),
+                "out_degree": int(self.out_degree[node]),
+                "in_degree": int(self.in_degree[node])
+            }
+            for node, hop in distance.items()
+        ]
+        return {"center": handle, "nodes": nodes, "edges": edges, "truncated": truncated}
+
+    def metrics(self, handle: str) -> Optional[Dict[str, Any]]:
+        """Degree centrality, reach and connection counts of a node"""
+        node = self.ids.get(handle)
+        if node is None:
+            return None
+        outgoing = int(self.out_degree[node])
+        incoming = int(self.in_degree[node])
+        targets, _ = self.neighbors(node)
+        n = self.node_count
+        return {
+            "centrality": (outgoing + incoming) / max(n - 1, 1) if n > 1 else 0,
+            "network_reach": float(self.followers[targets].sum()),
+            "connections": outgoing + incoming,
+            "outgoing_connections": outgoing,
+            "incoming_connections": incoming
+        }
+
+    def component_of(self, handle: str) -> Optional[Dict[str, Any]]:
+        """Component id (the root node's handle) and size for a node"""
+        node = self.ids.get(handle)
+        if node is None:
+            return None
+        root = self.components.find(node)
+        return {"component_id": self.handles[root], "component_size": self.components.size[root]}
+
+    def isolated_handles(self) -> List[str]:
+        """Handles of nodes with no incoming or outgoing edges"""
+        n = self.node_count
+        isolated = np.flatnonzero((self.out_degree[:n] == 0) & (self.in_degree[:n] == 0))
+        return [self.handles[node] for node in isolated.tolist()]
+
+    def component_summary(self) -> Dict[str, Any]:
+        root, size = self.components.largest()
+        return {
+            "connected_components": self.components.components,
+            "isolated_nodes": self.components.histogram.get(1, 0),
+            "largest_component": {
+                "component_id": self.handles[root] if root >= 0 else None,
+                "size": size
+            },
+            "size_histogram": dict(sorted(self.components.histogram.items()))
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "pending_edges": self.delta_size + self.frozen_size,
+            "compacting": self.compact_lock.locked(),
+            "compactions": self.compactions,
+            "components": self.components.components,
+            "csr_bytes": int(
+                self.indptr.nbytes + self.indices.nbytes + self.weights.nbytes
+                + self.t_indptr.nbytes + self.t_indices.nbytes + self.t_weights.nbytes
+            )
+        }
@@ -0,0 +1,90 @@
+"""
+CivicShield Idempotency Store
+Bounded, TTL-evicted map of idempotency keys so that agent retries get the
+original response back instead of forwarding duplicates upstream
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class IdempotencyStore:
+    """Insertion-ordered key store with a shared TTL and a hard size cap
+
+    Every entry gets the same TTL, so the oldest entry is always at the front
+    and expiry only ever has to look there
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expire(self, now: float):
+        while self.entries:
+            key, (expires_at, _) = next(iter(self.entries.items()))
+            if expires_at > now:
+                break
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored for key, or None if unseen or expired"""
+        now = time.monotonic()
+        self._expire(now)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, value: Any):
+        """Store value under key, evicting the oldest entries beyond the cap"""
+        now = time.monotonic()
+        self._expire(now)
+        self.entries[key] = (now + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def add_if_absent(self, key: str) -> bool:
+        """Record key and return True, or return False if it was already seen"""
+        if self.get(key) is not None:
+            return False
+        self.put(key, True)
+        return True
+
+    def discard(self, key: str):
+        self.entries.pop(key, None)
+
+    def reserve(self, key: str, fingerprint: str) -> Optional[Tuple[str, Any]]:
+        """Reserve key for a request with this body fingerprint before processing it
+
+        Returns None when the key was free, otherwise the stored
+        (fingerprint, response) pair; response is None while the first
+        request is still in flight
+        """
+        existing = self.get(key)
+        if existing is not None:
+            return existing
+        self.put(key, (fingerprint, None))
+        return None
+
+    def complete(self, key: str, response: Any):
+        """Attach the response to a reserved key so later retries replay it"""
+        entry = self.entries.get(key)
+        self.put(key, (entry[1][0] if entry else None, response))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
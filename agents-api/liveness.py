@@ -0,0 +1,94 @@
+"""
+CivicShield Agent Liveness
+Hashed timing wheel for heartbeat expiry. Scheduling, rescheduling and
+cancelling a timer are O(1); each tick only touches the timers hashed into
+the current slot, so tens of thousands of agents never need a full scan
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TimingWheel:
+    """Single-level hashed timing wheel with per-timer round counters"""
+
+    def __init__(self, tick_seconds: float = 1.0, slot_count: int = 512):
+        self.tick_seconds = tick_seconds
+        self.slots: List[Dict[Hashable, list]] = [{} for _ in range(slot_count)]
+        self.location: Dict[Hashable, int] = {}
+        self.cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.location)
+
+    def schedule(self, key: Hashable, delay_seconds: float, payload: Any = None):
+        """(Re)arm the timer for key to fire after delay_seconds"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay_seconds / self.tick_seconds))
+        slot = (self.cursor + ticks) % len(self.slots)
+        self.slots[slot][key] = [(ticks - 1) // len(self.slots), payload]
+        self.location[key] = slot
+
+    def cancel(self, key: Hashable):
+        slot = self.location.pop(key, None)
+        if slot is not None:
+            del self.slots[slot][key]
+
+    def advance(self) -> List[Tuple[Hashable, Any]]:
+        """Move one tick forward and return the timers that fired"""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        bucket = self.slots[self.cursor]
+        fired = []
+        for key, entry in list(bucket.items()):
+            if entry[0] > 0:
+                entry[0] -= 1
+                continue
+            del bucket[key]
+            del self.location[key]
+            fired.append((key, entry[1]))
+        return fired
+
+
+class HeartbeatMonitor:
+    """Drives a timing wheel from wall-clock time and hands expirations to a callback"""
+
+    def __init__(self, on_expire: Callable[[Hashable, Any], None], tick_seconds: float = 1.0,
+                 slot_count: int = 512):
+        self.wheel = TimingWheel(tick_seconds, slot_count)
+        self.on_expire = on_expire
+        self.task: Optional[asyncio.Task] = None
+        self.expired = 0
+
+    def arm(self, key: Hashable, delay_seconds: float, payload: Any = None):
+        self.wheel.schedule(key, delay_seconds, payload)
+
+    def disarm(self, key: Hashable):
+        self.wheel.cancel(key)
+
+    async def _run(self):
+        next_tick = time.monotonic() + self.wheel.tick_seconds
+        while True:
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0))
+            # Catch up on every tick that elapsed if the loop was delayed
+            while next_tick <= time.monotonic():
+                for key, payload in self.wheel.advance():
+                    self.expired += 1
+                    try:
+                        self.on_expire(key, payload)
+                    except Exception as e:
+                        print(f"Error handling heartbeat expiry for {key}: {str(e)}")
+                next_tick += self.wheel.tick_seconds
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"tracked": len(self.wheel), "expired": self.expired}
@@ -1,14 +1,36 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, WebSocket, Request, Header, Query
+from fastapi.responses import StreamingResponse, Response, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 import uvicorn
 import httpx
 import asyncio
+import hashlib
+import json
 import os
+import secrets
 from dotenv import load_dotenv
 
+# MessagePack is used for binary agent frames (install with: pip install msgpack)
+try:
+    import msgpack
+except ImportError:
+    print("⚠️  msgpack not installed. Binary WebSocket submissions are disabled")
+    msgpack = None
+
+from agent_stats import AgentAggregates
+from fanout import EventFilter, FanoutHub
+from forward_scheduler import LaneFull, PriorityForwarder, lane_for, PRIORITY_LANES
+from fast_path import TRUSTED_CLAIMS_ADAPTER, transform_claim, loads_json, dumps_json
+from idempotency import IdempotencyStore
+from liveness import HeartbeatMonitor
+from claim_analytics import ClaimAggregates
+from geo_grid import GeoGrid, precision_for_zoom, tile_bounds
+from search_index import InvertedIndex
+from enrichment import ClaimEnricher
+
 load_dotenv()
 
 app = FastAPI(
@@ -31,6 +53,36 @@ app.add_middleware(
 # Configuration
 MAIN_API_URL = os.getenv("MAIN_API_URL", "http://localhost:3000")
 AGENT_API_KEY = os.getenv("AGENT_API_KEY", "agent-secret-key")
+RATE_WINDOW_SECONDS = int(os.getenv("RATE_WINDOW_SECONDS", "60"))
+WS_ACK_EVERY_FRAMES = int(os.getenv("WS_ACK_EVERY_FRAMES", "10"))
+WS_MAX_FRAME_ITEMS = int(os.getenv("WS_MAX_FRAME_ITEMS", "1000"))
+WS_SEQUENCE_MAX_AGENTS = int(os.getenv("WS_SEQUENCE_MAX_AGENTS", "10000"))
+WS_SEQUENCE_TTL_SECONDS = float(os.getenv("WS_SEQUENCE_TTL_SECONDS", "86400"))
+WS_REPLAY_WINDOW = int(os.getenv("WS_REPLAY_WINDOW", "100"))
+MAX_BATCH_CLAIMS = 100
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "256"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+FORWARD_WORKERS = int(os.getenv("FORWARD_WORKERS", "4"))
+FORWARD_STARVATION_SECONDS = float(os.getenv("FORWARD_STARVATION_SECONDS", "5"))
+FORWARD_LANE_MAX_ITEMS = int(os.getenv("FORWARD_LANE_MAX_ITEMS", "10000"))
+FORWARD_RETRY_AFTER_SECONDS = int(os.getenv("FORWARD_RETRY_AFTER_SECONDS", "5"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000"))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+HEARTBEAT_IDLE_SECONDS = float(os.getenv("HEARTBEAT_IDLE_SECONDS", "60"))
+HEARTBEAT_OFFLINE_SECONDS = float(os.getenv("HEARTBEAT_OFFLINE_SECONDS", "300"))
+HEARTBEAT_TICK_SECONDS = float(os.getenv("HEARTBEAT_TICK_SECONDS", "1"))
+SEARCH_RETENTION_HOURS = float(os.getenv("SEARCH_RETENTION_HOURS", "48"))
+SEARCH_MAX_DOCUMENTS = int(os.getenv("SEARCH_MAX_DOCUMENTS", "500000"))
+SEARCH_CACHE_POSTINGS = int(os.getenv("SEARCH_CACHE_POSTINGS", "2000000"))
+ENRICHMENT_ENABLED = os.getenv("ENRICHMENT_ENABLED", "false").lower() == "true"
+ENRICHMENT_CONCURRENCY = int(os.getenv("ENRICHMENT_CONCURRENCY", "32"))
+TEXT_ANALYZER_URL = os.getenv("TEXT_ANALYZER_URL", "http://localhost:8001")
+NETWORK_ANALYZER_URL = os.getenv("NETWORK_ANALYZER_URL", "http://localhost:8003")
+DEEPFAKE_DETECTOR_URL = os.getenv("DEEPFAKE_DETECTOR_URL", "http://localhost:8004")
+ENRICHMENT_TEXT_TIMEOUT = float(os.getenv("ENRICHMENT_TEXT_TIMEOUT", "3"))
+ENRICHMENT_NETWORK_TIMEOUT = float(os.getenv("ENRICHMENT_NETWORK_TIMEOUT", "2"))
+ENRICHMENT_DEEPFAKE_TIMEOUT = float(os.getenv("ENRICHMENT_DEEPFAKE_TIMEOUT", "20"))
+ENRICHMENT_MEDIA_MAX_BYTES = int(os.getenv("ENRICHMENT_MEDIA_MAX_BYTES", str(50 * 1024 * 1024)))
 
 # Pydantic models for request/response
 class ClaimSubmission(BaseModel):
@@ -44,6 +96,9 @@ class ClaimSubmission(BaseModel):
     engagement: Optional[Dict[str, int]] = None
     tags: Optional[List[str]] = None
     category: Optional[str] = Field("other", pattern="^(election|candidate|voting_process|evm|results|other)$")
+    idempotency_key: Optional[str] = Field(None, max_length=200, description="Per-item key for replay-safe batch retries")
+    media_url: Optional[str] = Field(None, description="Attached image or video, checked by the deepfake detector")
+    media_type: Optional[str] = Field("image", pattern="^(image|video)$")
 
 class DeepfakeSubmission(BaseModel):
     analysis_id: str
@@ -87,6 +142,197 @@ class AgentStatus(BaseModel):
 # In-memory storage for agent statuses (use Redis in production)
 agent_statuses: Dict[str, AgentStatus] = {}
 
+# Aggregates over agent_statuses, kept in step on every register/update/status change
+agent_aggregates = AgentAggregates(rate_window_seconds=RATE_WINDOW_SECONDS)
+
+def set_agent_status(agent_id: str, status: str):
+    """Change a registered agent's status and keep the aggregates in step"""
+    agent = agent_statuses[agent_id]
+    agent_aggregates.change_status(agent.status, status)
+    agent.status = status
+
+# Heartbeat expiry: silent agents go active -> idle after HEARTBEAT_IDLE_SECONDS
+# and -> offline after HEARTBEAT_OFFLINE_SECONDS
+demoted_agents: set = set()
+
+def expire_agent(agent_id: str, phase: str):
+    """Demote an agent whose heartbeat timer fired"""
+    agent = agent_statuses.get(agent_id)
+    if agent is None:
+        return
+    if phase == "idle":
+        if agent.status == "active":
+            set_agent_status(agent_id, "idle")
+            demoted_agents.add(agent_id)
+        heartbeats.arm(agent_id, max(HEARTBEAT_OFFLINE_SECONDS - HEARTBEAT_IDLE_SECONDS, 0), "offline")
+    elif agent.status != "offline":
+        set_agent_status(agent_id, "offline")
+        demoted_agents.add(agent_id)
+
+heartbeats = HeartbeatMonitor(on_expire=expire_agent, tick_seconds=HEARTBEAT_TICK_SECONDS)
+
+def record_heartbeat(agent_id: str):
+    """Re-arm an agent's liveness timer, reviving it if it was demoted for silence"""
+    if agent_id in demoted_agents:
+        demoted_agents.discard(agent_id)
+        set_agent_status(agent_id, "active")
+    heartbeats.arm(agent_id, HEARTBEAT_IDLE_SECONDS, "idle")
+
+def record_submitted_items(agent_id: Optional[str], count: int):
+    """Count accepted items towards the submitting agent type's items-per-minute rate"""
+    if count <= 0:
+        return
+    agent = agent_statuses.get(agent_id) if agent_id else None
+    agent_aggregates.record_items(agent.agent_type if agent else "unidentified", count)
+
+# Idempotency-Key responses per endpoint, and per-item keys seen in batches
+request_keys = IdempotencyStore(max_entries=IDEMPOTENCY_MAX_KEYS, ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+item_keys = IdempotencyStore(max_entries=IDEMPOTENCY_MAX_KEYS, ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+
+def claim_request_key(scope: str, idempotency_key: Optional[str], body: bytes):
+    """Reserve an Idempotency-Key for this request body, or replay the original response
+
+    A key still being processed gets 409, and a key reused with a different
+    body gets 422, so neither runs a second time
+    """
+    if not idempotency_key:
+        return None
+    fingerprint = hashlib.sha256(body).hexdigest()
+    existing = request_keys.reserve(f"{scope}:{idempotency_key}", fingerprint)
+    if existing is None:
+        return None
+    original_fingerprint, cached = existing
+    if original_fingerprint != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+    if cached is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+    headers = {"Idempotent-Replayed": "true"}
+    if isinstance(cached, bytes):
+        return Response(content=cached, media_type="application/json", headers=headers)
+    return JSONResponse(content=cached, headers=headers)
+
+def remember_response(scope: str, idempotency_key: Optional[str], response):
+    """Keep a successful response so retries with the same key can replay it"""
+    if idempotency_key:
+        request_keys.complete(f"{scope}:{idempotency_key}", response)
+    return response
+
+def release_request_key(scope: str, idempotency_key: Optional[str]):
+    """Free a reserved key after a failed request so the client can retry it"""
+    if idempotency_key:
+        request_keys.discard(f"{scope}:{idempotency_key}")
+
+# (session, last processed binary frame) per agent, so frames re-sent after a reconnect are not forwarded twice
+agent_sequences = IdempotencyStore(max_entries=WS_SEQUENCE_MAX_AGENTS, ttl_seconds=WS_SEQUENCE_TTL_SECONDS)
+
+def reserve_new_claims(claims: list, key_of) -> Tuple[list, List[str]]:
+    """Claims whose per-item key has not been accepted yet, plus the keys reserved for them"""
+    new_claims, reserved = [], []
+    for claim in claims:
+        item_key = key_of(claim)
+        if item_key:
+            if not item_keys.add_if_absent(item_key):
+                continue
+            reserved.append(item_key)
+        new_claims.append(claim)
+    return new_claims, reserved
+
+def release_item_keys(reserved: List[str]):
+    """Forget per-item keys of claims that were not forwarded, so retries are accepted"""
+    for item_key in reserved:
+        item_keys.discard(item_key)
+
+# Live fan-out of accepted claims and alerts to dashboard subscribers
+event_hub = FanoutHub(buffer_size=STREAM_BUFFER_SIZE)
+
+# Rolling per-minute claim counts by platform, category and risk level (24h)
+claim_aggregates = ClaimAggregates(horizon_minutes=1440)
+
+# Geohash heatmap cells with per-risk counts in hourly buckets (24h)
+claim_grid = GeoGrid(bucket_seconds=3600, bucket_count=24)
+
+# Keyword index over recent claim text and tags
+claim_index = InvertedIndex(
+    retention_seconds=SEARCH_RETENTION_HOURS * 3600,
+    max_documents=SEARCH_MAX_DOCUMENTS,
+    max_cached_postings=SEARCH_CACHE_POSTINGS
+)
+
+def publish_claim(claim_data: dict):
+    """Push an accepted claim to live subscribers and the in-memory aggregates"""
+    claim_aggregates.record(claim_data)
+    claim_grid.record(claim_data["region"], claim_data["riskLevel"])
+    claim_index.add(claim_data["text"], claim_data, extra_terms=claim_data["tags"])
+    event_hub.publish(
+        "claim", claim_data,
+        severity=claim_data["riskLevel"],
+        category=claim_data["category"],
+        platform=claim_data["source"]["platform"]
+    )
+
+def publish_alert(alert_data: dict):
+    """Push an accepted alert to live subscribers"""
+    event_hub.publish(
+        "alert", alert_data,
+        severity=alert_data["severity"],
+        category=alert_data["category"],
+        platform=alert_data["platform"]
+    )
+
+# Payload builders shared by REST and WebSocket submissions
+def build_claim_data(claim: ClaimSubmission) -> dict:
+    """Map a claim submission onto the main API claim schema"""
+    claim_data = {
+        "text": claim.text,
+        "source": {
+            "platform": claim.platform,
+            "url": claim.source_url,
+            "author": claim.author,
+            "authorId": claim.author_id
+        },
+        "riskLevel": claim.risk_level,
+        "region": claim.region or {},
+        "engagement": claim.engagement or {},
+        "tags": claim.tags or [],
+        "category": claim.category
+    }
+    # Only claims with attached media carry the field, so the main API schema is otherwise unchanged
+    if claim.media_url:
+        claim_data["media"] = {"url": claim.media_url, "type": claim.media_type}
+    return claim_data
+
+def build_deepfake_data(deepfake: DeepfakeSubmission) -> dict:
+    """Map a deepfake submission onto the main API deepfake schema"""
+    return {
+        "analysisId": deepfake.analysis_id,
+        "filename": deepfake.filename,
+        "fileType": deepfake.file_type,
+        "analysisCategory": deepfake.analysis_category,
+        "confidence": deepfake.confidence,
+        "isDeepfake": deepfake.is_deepfake,
+        "riskLevel": deepfake.risk_level,
+        "detailedResults": deepfake.detailed_results,
+        "processingTime": deepfake.processing_time,
+        "source": deepfake.source or {},
+        "metadata": deepfake.metadata or {},
+        "timestamp": deepfake.timestamp,
+        "detectedAt": datetime.utcnow().isoformat(),
+        "agentId": "deepfake-detector-1"
+    }
+
+def build_alert_data(alert: AlertSubmission) -> dict:
+    """Map an alert submission onto the main API alert schema"""
+    return {
+        "title": alert.title,
+        "description": alert.description,
+        "severity": alert.severity,
+        "category": alert.category,
+        "location": alert.location or {},
+        "affectedUsers": alert.affected_users,
+        "platform": alert.platform,
+        "relatedClaims": alert.related_claims or []
+    }
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -104,14 +350,17 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow(),
-        "active_agents": len([a for a in agent_statuses.values() if a.status == "active"])
+        "active_agents": agent_aggregates.count("active")
     }
 
 # Agent registration and status
 @app.post("/agents/register")
 async def register_agent(agent: AgentStatus):
     """Register a new monitoring agent"""
+    agent_aggregates.replace(agent_statuses.get(agent.agent_id), agent)
     agent_statuses[agent.agent_id] = agent
+    demoted_agents.discard(agent.agent_id)
+    record_heartbeat(agent.agent_id)
     return {
         "message": f"Agent {agent.agent_id} registered successfully",
         "agent_id": agent.agent_id,
@@ -123,8 +372,8 @@ async def get_all_agents():
     """Get status of all registered agents"""
     return {
         "agents": list(agent_statuses.values()),
-        "total_count": len(agent_statuses),
-        "active_count": len([a for a in agent_statuses.values() if a.status == "active"])
+        "total_count": agent_aggregates.total,
+        "active_count": agent_aggregates.count("active")
     }
 
 @app.get("/agents/status/{agent_id}")
@@ -140,78 +389,96 @@ async def update_agent_status(agent_id: str, status: AgentStatus):
     if agent_id not in agent_statuses:
         raise HTTPException(status_code=404, detail="Agent not found")
     
+    agent_aggregates.replace(agent_statuses[agent_id], status)
     agent_statuses[agent_id] = status
+    demoted_agents.discard(agent_id)
+    record_heartbeat(agent_id)
     return {
         "message": f"Agent {agent_id} status updated",
         "status": status.status
     }
 
+@app.post("/agents/heartbeat/{agent_id}")
+async def agent_heartbeat(agent_id: str):
+    """Lightweight liveness signal for agents that do not hold a WebSocket open"""
+    if agent_id not in agent_statuses:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    record_heartbeat(agent_id)
+    agent_statuses[agent_id].last_activity = datetime.utcnow()
+    return {
+        "agent_id": agent_id,
+        "status": agent_statuses[agent_id].status
+    }
+
 # Data submission endpoints
 @app.post("/submit/claim")
-async def submit_claim(claim: ClaimSubmission, background_tasks: BackgroundTasks):
+async def submit_claim(claim: ClaimSubmission, request: Request, idempotency_key: Optional[str] = Header(None),
+                       x_agent_id: Optional[str] = Header(None)):
     """Submit a new claim from monitoring agents"""
+    replay = claim_request_key("claim", idempotency_key, await request.body())
+    if replay:
+        return replay
+
+    new_claims, reserved = reserve_new_claims([claim], lambda item: item.idempotency_key)
+    if not new_claims:
+        # Already accepted under its per-item key, from this endpoint, a batch or a frame
+        return remember_response("claim", idempotency_key, {
+            "message": "Claim already submitted",
+            "status": "duplicate",
+            "claim_preview": claim.text[:100] + "..." if len(claim.text) > 100 else claim.text
+        })
+
     try:
         # Process claim data
-        claim_data = {
-            "text": claim.text,
-            "source": {
-                "platform": claim.platform,
-                "url": claim.source_url,
-                "author": claim.author,
-                "authorId": claim.author_id
-            },
-            "riskLevel": claim.risk_level,
-            "region": claim.region or {},
-            "engagement": claim.engagement or {},
-            "tags": claim.tags or [],
-            "category": claim.category
-        }
+        claim_data = build_claim_data(claim)
         
-        # Add background task to forward to main API
-        background_tasks.add_task(forward_to_main_api, "/api/claims", claim_data)
+        # Enrich, then publish and queue for forwarding to main API on the claim's priority lane
+        forward_claim(claim_data)
+        record_submitted_items(x_agent_id, 1)
         
-        return {
+        return remember_response("claim", idempotency_key, {
             "message": "Claim submitted successfully",
             "status": "processing",
             "claim_preview": claim.text[:100] + "..." if len(claim.text) > 100 else claim.text
-        }
+        })
+    except LaneFull as e:
+        release_item_keys(reserved)
+        release_request_key("claim", idempotency_key)
+        raise forwarding_full(e)
     except Exception as e:
+        release_item_keys(reserved)
+        release_request_key("claim", idempotency_key)
         raise HTTPException(status_code=500, detail=f"Error processing claim: {str(e)}")
 
 @app.post("/submit/deepfake")
-async def submit_deepfake(deepfake: DeepfakeSubmission, background_tasks: BackgroundTasks):
+async def submit_deepfake(deepfake: DeepfakeSubmission, request: Request, idempotency_key: Optional[str] = Header(None),
+                          x_agent_id: Optional[str] = Header(None)):
     """Submit deepfake detection analysis result"""
+    replay = claim_request_key("deepfake", idempotency_key, await request.body())
+    if replay:
+        return replay
+
     try:
         # Process deepfake analysis data
-        deepfake_data = {
-            "analysisId": deepfake.analysis_id,
-            "filename": deepfake.filename,
-            "fileType": deepfake.file_type,
-            "analysisCategory": deepfake.analysis_category,
-            "confidence": deepfake.confidence,
-            "isDeepfake": deepfake.is_deepfake,
-            "riskLevel": deepfake.risk_level,
-            "detailedResults": deepfake.detailed_results,
-            "processingTime": deepfake.processing_time,
-            "source": deepfake.source or {},
-            "metadata": deepfake.metadata or {},
-            "timestamp": deepfake.timestamp,
-            "detectedAt": datetime.utcnow().isoformat(),
-            "agentId": "deepfake-detector-1"
-        }
+        deepfake_data = build_deepfake_data(deepfake)
         
-        # Add background task to forward to main API
-        background_tasks.add_task(forward_to_main_api, "/api/deepfakes", deepfake_data)
+        # Queue for forwarding to main API on the analysis' priority lane
+        forwarder.submit("/api/deepfakes", deepfake_data, deepfake_data["riskLevel"])
+        record_submitted_items(x_agent_id, 1)
         
-        return {
+        return remember_response("deepfake", idempotency_key, {
             "message": "Deepfake analysis submitted successfully",
             "status": "processing",
             "analysis_id": deepfake.analysis_id,
             "confidence": deepfake.confidence,
             "is_deepfake": deepfake.is_deepfake,
             "risk_level": deepfake.risk_level
-        }
+        })
+    except LaneFull as e:
+        release_request_key("deepfake", idempotency_key)
+        raise forwarding_full(e)
     except Exception as e:
+        release_request_key("deepfake", idempotency_key)
         raise HTTPException(status_code=500, detail=f"Error processing deepfake analysis: {str(e)}")
         return {
             "message": "Deepfake analysis submitted successfully",
@@ -222,68 +489,131 @@ async def submit_deepfake(deepfake: DeepfakeSubmission, background_tasks: Backgr
         raise HTTPException(status_code=500, detail=f"Error processing deepfake: {str(e)}")
 
 @app.post("/submit/alert")
-async def submit_alert(alert: AlertSubmission, background_tasks: BackgroundTasks):
+async def submit_alert(alert: AlertSubmission, request: Request, idempotency_key: Optional[str] = Header(None),
+                       x_agent_id: Optional[str] = Header(None)):
     """Submit a new crisis alert"""
+    replay = claim_request_key("alert", idempotency_key, await request.body())
+    if replay:
+        return replay
+
     try:
-        alert_data = {
-            "title": alert.title,
-            "description": alert.description,
-            "severity": alert.severity,
-            "category": alert.category,
-            "location": alert.location or {},
-            "affectedUsers": alert.affected_users,
-            "platform": alert.platform,
-            "relatedClaims": alert.related_claims or []
-        }
+        alert_data = build_alert_data(alert)
         
-        # Add background task to forward to main API
-        background_tasks.add_task(forward_to_main_api, "/api/alerts", alert_data)
+        # Queue for forwarding to main API on the alert's priority lane, then publish it
+        forwarder.submit("/api/alerts", alert_data, alert_data["severity"])
+        publish_alert(alert_data)
+        record_submitted_items(x_agent_id, 1)
         
-        return {
+        return remember_response("alert", idempotency_key, {
             "message": "Alert submitted successfully",
             "severity": alert.severity,
             "title": alert.title
-        }
+        })
+    except LaneFull as e:
+        release_request_key("alert", idempotency_key)
+        raise forwarding_full(e)
     except Exception as e:
+        release_request_key("alert", idempotency_key)
         raise HTTPException(status_code=500, detail=f"Error processing alert: {str(e)}")
 
 # Batch submission endpoints for high-volume agents
 @app.post("/submit/batch/claims")
-async def submit_batch_claims(claims: List[ClaimSubmission], background_tasks: BackgroundTasks):
+async def submit_batch_claims(claims: List[ClaimSubmission], request: Request, idempotency_key: Optional[str] = Header(None),
+                              x_agent_id: Optional[str] = Header(None)):
     """Submit multiple claims in batch"""
-    if len(claims) > 100:
-        raise HTTPException(status_code=400, detail="Batch size cannot exceed 100 claims")
+    if len(claims) > MAX_BATCH_CLAIMS:
+        raise HTTPException(status_code=400, detail=f"Batch size cannot exceed {MAX_BATCH_CLAIMS} claims")
     
+    replay = claim_request_key("batch_claims", idempotency_key, await request.body())
+    if replay:
+        return replay
+
+    new_claims, reserved = reserve_new_claims(claims, lambda claim: claim.idempotency_key)
     try:
-        processed_claims = []
-        for claim in claims:
-            claim_data = {
-                "text": claim.text,
-                "source": {
-                    "platform": claim.platform,
-                    "url": claim.source_url,
-                    "author": claim.author,
-                    "authorId": claim.author_id
-                },
-                "riskLevel": claim.risk_level,
-                "region": claim.region or {},
-                "engagement": claim.engagement or {},
-                "tags": claim.tags or [],
-                "category": claim.category
-            }
-            processed_claims.append(claim_data)
+        processed_claims = [build_claim_data(claim) for claim in new_claims]
         
-        # Add background task to forward batch to main API
-        background_tasks.add_task(forward_to_main_api, "/api/claims/batch", {"claims": processed_claims})
+        # Publish and forward batch to main API, split so each risk level rides its own lane
+        forward_claim_batch(processed_claims)
+        record_submitted_items(x_agent_id, len(processed_claims))
         
-        return {
-            "message": f"Batch of {len(claims)} claims submitted successfully",
-            "count": len(claims),
+        return remember_response("batch_claims", idempotency_key, {
+            "message": f"Batch of {len(processed_claims)} claims submitted successfully",
+            "count": len(processed_claims),
+            "duplicates": len(claims) - len(processed_claims),
             "status": "processing"
-        }
+        })
+    except LaneFull as e:
+        release_item_keys(reserved)
+        release_request_key("batch_claims", idempotency_key)
+        raise forwarding_full(e)
     except Exception as e:
+        release_item_keys(reserved)
+        release_request_key("batch_claims", idempotency_key)
         raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
 
+def verify_agent_token(authorization: Optional[str]):
+    """Reject requests that do not carry the shared agent API key"""
+    expected = f"Bearer {AGENT_API_KEY}"
+    if not authorization or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(status_code=401, detail="Invalid or missing agent token")
+
+@app.post("/submit/batch/claims/trusted")
+async def submit_batch_claims_trusted(
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+    x_agent_id: Optional[str] = Header(None)
+):
+    """Fast-path batch submission for authenticated agents
+
+    Same body and limits as /submit/batch/claims, but validated in one
+    TypeAdapter call, mapped by a precompiled transform and encoded with orjson
+    """
+    verify_agent_token(authorization)
+
+    body = await request.body()
+    replay = claim_request_key("batch_claims", idempotency_key, body)
+    if replay:
+        return replay
+
+    try:
+        try:
+            raw_claims = loads_json(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+        if isinstance(raw_claims, list) and len(raw_claims) > MAX_BATCH_CLAIMS:
+            raise HTTPException(status_code=400, detail=f"Batch size cannot exceed {MAX_BATCH_CLAIMS} claims")
+
+        try:
+            claims = TRUSTED_CLAIMS_ADAPTER.validate_python(raw_claims)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    except HTTPException:
+        release_request_key("batch_claims", idempotency_key)
+        raise
+
+    new_claims, reserved = reserve_new_claims(claims, lambda claim: claim.get("idempotency_key"))
+    try:
+        processed_claims = [transform_claim(claim) for claim in new_claims]
+        forward_claim_batch(processed_claims)
+        record_submitted_items(x_agent_id, len(processed_claims))
+    except LaneFull as e:
+        release_item_keys(reserved)
+        release_request_key("batch_claims", idempotency_key)
+        raise forwarding_full(e)
+    except Exception as e:
+        release_item_keys(reserved)
+        release_request_key("batch_claims", idempotency_key)
+        raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
+    response_body = remember_response("batch_claims", idempotency_key, dumps_json({
+        "message": f"Batch of {len(processed_claims)} claims submitted successfully",
+        "count": len(processed_claims),
+        "duplicates": len(claims) - len(processed_claims),
+        "status": "processing"
+    }))
+    return Response(content=response_body, media_type="application/json")
+
 # Analytics endpoints for agents
 @app.get("/analytics/summary")
 async def get_analytics_summary():
@@ -291,17 +621,152 @@ async def get_analytics_summary():
     return {
         "timestamp": datetime.utcnow(),
         "agents": {
-            "total": len(agent_statuses),
-            "active": len([a for a in agent_statuses.values() if a.status == "active"]),
-            "idle": len([a for a in agent_statuses.values() if a.status == "idle"]),
-            "error": len([a for a in agent_statuses.values() if a.status == "error"])
+            "total": agent_aggregates.total,
+            "active": agent_aggregates.count("active"),
+            "idle": agent_aggregates.count("idle"),
+            "error": agent_aggregates.count("error")
         },
         "processing_stats": {
-            "total_processed": sum(a.processed_items for a in agent_statuses.values()),
-            "total_errors": sum(a.error_count for a in agent_statuses.values())
+            "total_processed": agent_aggregates.total_processed,
+            "total_errors": agent_aggregates.total_errors,
+            "items_per_minute": agent_aggregates.items_per_minute(),
+            "processed_per_minute": agent_aggregates.processed_per_minute()
+        },
+        "stream": event_hub.stats(),
+        "liveness": heartbeats.stats(),
+        "idempotency": {
+            "requests": request_keys.stats(),
+            "items": item_keys.stats()
         }
     }
 
+@app.get("/analytics/claims")
+async def get_claim_analytics(
+    window: int = Query(60, ge=1, le=1440, description="Window length in minutes"),
+    step: int = Query(1, ge=1, le=1440, description="Bucket size in minutes"),
+    group_by: Optional[str] = Query(None, pattern="^(platform|category|risk_level)$")
+):
+    """Pre-aggregated claim counts over the last 24 hours"""
+    return {
+        "timestamp": datetime.utcnow(),
+        **claim_aggregates.query(window_minutes=window, step_minutes=step, group_by=group_by)
+    }
+
+@app.get("/search/claims")
+async def search_claims(
+    q: str = Query(..., min_length=1, max_length=500, description="Terms are AND-ed; separate alternatives with OR"),
+    limit: int = Query(20, ge=1, le=200),
+    window_hours: Optional[float] = Query(None, gt=0, le=SEARCH_RETENTION_HOURS)
+):
+    """BM25-ranked keyword search over recently accepted claims"""
+    results = claim_index.search(q, limit=limit, window_seconds=window_hours * 3600 if window_hours else None)
+    return {
+        "query": q,
+        "total_results": len(results),
+        "results": [
+            {
+                "score": result["score"],
+                "indexed_at": datetime.utcfromtimestamp(result["indexed_at"]).isoformat(),
+                "claim": result["document"]
+            }
+            for result in results
+        ],
+        "index": claim_index.stats()
+    }
+
+# Heatmap aggregation endpoints
+@app.get("/heatmap/cells")
+async def get_heatmap_cells(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(10, ge=0, le=22),
+    precision: Optional[int] = Query(None, ge=1, le=7),
+    window: int = Query(24, ge=1, le=24, description="Window length in hours")
+):
+    """Claim counts per geohash cell inside a map viewport"""
+    if south > north or west > east:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return claim_grid.query(south, west, north, east, precision or precision_for_zoom(zoom), window_hours=window)
+
+@app.get("/heatmap/tiles/{z}/{x}/{y}")
+async def get_heatmap_tile(z: int, x: int, y: int, window: int = Query(24, ge=1, le=24)):
+    """Claim counts per geohash cell inside one slippy-map tile"""
+    if not (0 <= z <= 22 and 0 <= x < (1 << z) and 0 <= y < (1 << z)):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+    south, west, north, east = tile_bounds(z, x, y)
+    return claim_grid.query(south, west, north, east, precision_for_zoom(z), window_hours=window)
+
+# Live event stream for dashboards
+@app.get("/stream/events")
+async def stream_events(
+    request: Request,
+    types: Optional[str] = None,
+    severity: Optional[str] = None,
+    category: Optional[str] = None,
+    platform: Optional[str] = None
+):
+    """Server-Sent Events stream of accepted claims and alerts
+
+    Filters are comma-separated lists, e.g. ?types=alert&severity=high,critical
+    """
+    subscriber = event_hub.subscribe(EventFilter.from_params(types, severity, category, platform))
+
+    async def event_stream():
+        reported_dropped = 0
+        try:
+            while not await request.is_disconnected():
+                events = await subscriber.next_batch(STREAM_HEARTBEAT_SECONDS)
+                if subscriber.dropped > reported_dropped:
+                    yield f"event: dropped\ndata: {json.dumps({'dropped': subscriber.dropped - reported_dropped})}\n\n"
+                    reported_dropped = subscriber.dropped
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                for event in events:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/stream")
+async def websocket_stream(
+    websocket: WebSocket,
+    types: Optional[str] = None,
+    severity: Optional[str] = None,
+    category: Optional[str] = None,
+    platform: Optional[str] = None
+):
+    """WebSocket stream of accepted claims and alerts, sent as JSON event batches"""
+    await websocket.accept()
+    subscriber = event_hub.subscribe(EventFilter.from_params(types, severity, category, platform))
+    reported_dropped = 0
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    disconnect_watcher = asyncio.create_task(wait_for_disconnect())
+    try:
+        while not disconnect_watcher.done():
+            events = await subscriber.next_batch(STREAM_HEARTBEAT_SECONDS)
+            message = {"type": "events" if events else "heartbeat", "events": events}
+            if subscriber.dropped > reported_dropped:
+                message["dropped"] = subscriber.dropped - reported_dropped
+                reported_dropped = subscriber.dropped
+            await websocket.send_text(json.dumps(message, default=str))
+    except Exception as e:
+        print(f"Stream WebSocket closed: {str(e)}")
+    finally:
+        disconnect_watcher.cancel()
+        event_hub.unsubscribe(subscriber)
+
 # Background task to forward data to main API
 async def forward_to_main_api(endpoint: str, data: dict):
     """Forward data to main Node.js API"""
@@ -309,8 +774,8 @@ async def forward_to_main_api(endpoint: str, data: dict):
         async with httpx.AsyncClient() as client:
             response = await client.post(
                 f"{MAIN_API_URL}{endpoint}",
-                json=data,
-                headers={"Authorization": f"Bearer {AGENT_API_KEY}"},
+                content=dumps_json(data),
+                headers={"Authorization": f"Bearer {AGENT_API_KEY}", "Content-Type": "application/json"},
                 timeout=30.0
             )
             if response.status_code not in [200, 201]:
@@ -318,32 +783,330 @@ async def forward_to_main_api(endpoint: str, data: dict):
     except Exception as e:
         print(f"Error forwarding to main API: {str(e)}")
 
+# Priority lanes in front of the main API so critical items are forwarded first
+forwarder = PriorityForwarder(
+    send=lambda endpoint, data: forward_to_main_api(endpoint, data),
+    workers=FORWARD_WORKERS,
+    starvation_seconds=FORWARD_STARVATION_SECONDS,
+    max_lane_items=FORWARD_LANE_MAX_ITEMS
+)
+
+def forwarding_full(error: LaneFull) -> HTTPException:
+    """503 for a submission whose forwarding lane is full, so the agent backs off and retries"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(FORWARD_RETRY_AFTER_SECONDS)}
+    )
+
+# Text, network and deepfake verdicts are merged into claims before forwarding
+enricher = ClaimEnricher(
+    TEXT_ANALYZER_URL, NETWORK_ANALYZER_URL, DEEPFAKE_DETECTOR_URL,
+    text_timeout=ENRICHMENT_TEXT_TIMEOUT,
+    network_timeout=ENRICHMENT_NETWORK_TIMEOUT,
+    deepfake_timeout=ENRICHMENT_DEEPFAKE_TIMEOUT,
+    concurrency=ENRICHMENT_CONCURRENCY,
+    media_max_bytes=ENRICHMENT_MEDIA_MAX_BYTES
+)
+enrichment_tasks = set()
+
+def spawn_enrichment(coroutine):
+    """Run enrichment off the request path, tracked so shutdown can wait for it"""
+    task = asyncio.create_task(coroutine)
+    enrichment_tasks.add(task)
+    task.add_done_callback(enrichment_tasks.discard)
+
+async def enrich_and_forward(endpoint: str, processed_claims: List[dict]):
+    """Enrich claims concurrently, then publish them and queue them on their (possibly escalated) lanes"""
+    enriched = await asyncio.gather(*(enricher.enrich(claim_data) for claim_data in processed_claims))
+    try:
+        if endpoint == "/api/claims":
+            forwarder.submit(endpoint, enriched[0], enriched[0]["riskLevel"])
+        else:
+            queue_claim_batch(list(enriched))
+    except LaneFull as e:
+        # Already acknowledged to the agent, so the claims can only be counted as dropped
+        print(f"Dropped {len(enriched)} enriched claims: {str(e)}")
+        return
+    for claim_data in enriched:
+        publish_claim(claim_data)
+
+def forward_claim(claim_data: dict):
+    """Publish and queue a single claim, after enriching it when enrichment is enabled"""
+    if ENRICHMENT_ENABLED:
+        spawn_enrichment(enrich_and_forward("/api/claims", [claim_data]))
+    else:
+        forwarder.submit("/api/claims", claim_data, claim_data["riskLevel"])
+        publish_claim(claim_data)
+
+def forward_claim_batch(processed_claims: List[dict]):
+    """Publish and queue a claim batch, after enriching it when enrichment is enabled"""
+    if not processed_claims:
+        return
+    if ENRICHMENT_ENABLED:
+        spawn_enrichment(enrich_and_forward("/api/claims/batch", processed_claims))
+    else:
+        queue_claim_batch(processed_claims)
+        for claim_data in processed_claims:
+            publish_claim(claim_data)
+
+def queue_claim_batch(processed_claims: List[dict]):
+    """Queue a claim batch as one upstream batch per risk-level lane, all or nothing"""
+    by_lane: Dict[str, List[dict]] = {}
+    for claim_data in processed_claims:
+        by_lane.setdefault(lane_for(claim_data["riskLevel"]), []).append(claim_data)
+    forwarder.submit_all(
+        ("/api/claims/batch", {"claims": by_lane[lane]}, lane) for lane in PRIORITY_LANES if lane in by_lane
+    )
+
+@app.on_event("startup")
+async def start_forwarder():
+    """Start the forwarding workers"""
+    forwarder.start()
+
+@app.on_event("shutdown")
+async def stop_forwarder():
+    """Finish in-flight enrichment and drain queued forwarding work before exiting"""
+    if enrichment_tasks:
+        await asyncio.gather(*enrichment_tasks, return_exceptions=True)
+    await forwarder.stop()
+    await enricher.close()
+
+@app.on_event("startup")
+async def start_heartbeat_monitor():
+    """Start expiring silent agents"""
+    heartbeats.start()
+
+@app.on_event("shutdown")
+async def stop_heartbeat_monitor():
+    heartbeats.stop()
+
+@app.get("/analytics/forwarding")
+async def get_forwarding_stats():
+    """Per-lane queue depth and queue latency of the forwarding scheduler"""
+    return {
+        "timestamp": datetime.utcnow(),
+        **forwarder.snapshot()
+    }
+
+@app.get("/analytics/enrichment")
+async def get_enrichment_stats():
+    """Per-branch outcomes and latency of claim enrichment"""
+    return {
+        "timestamp": datetime.utcnow(),
+        "enabled": ENRICHMENT_ENABLED,
+        "in_flight": len(enrichment_tasks),
+        "branches": enricher.snapshot()
+    }
+
+def validate_frame_items(frame: dict, kind: str, model, seq: int, rejected: list) -> list:
+    """Validate one item list of a submission frame, collecting per-item rejections"""
+    items = []
+    for index, raw in enumerate(frame.get(kind) or []):
+        try:
+            items.append(model(**raw))
+        except (ValidationError, TypeError) as e:
+            rejected.append({"seq": seq, "kind": kind, "index": index, "error": str(e)})
+    return items
+
+def process_submission_frame(frame: dict, seq: int, rejected: list, agent_id: Optional[str] = None) -> int:
+    """Validate a binary submission frame and forward its items like the REST endpoints"""
+    for kind in ("claims", "alerts", "deepfakes"):
+        if not isinstance(frame.get(kind) or [], list):
+            rejected.append({"seq": seq, "kind": "frame", "index": -1, "error": f"'{kind}' must be a list"})
+            return 0
+    item_count = sum(len(frame.get(kind) or []) for kind in ("claims", "alerts", "deepfakes"))
+    if item_count > WS_MAX_FRAME_ITEMS:
+        rejected.append({"seq": seq, "kind": "frame", "index": -1, "error": f"Frame cannot exceed {WS_MAX_FRAME_ITEMS} items"})
+        return 0
+    if len(frame.get("claims") or []) > MAX_BATCH_CLAIMS:
+        rejected.append({"seq": seq, "kind": "frame", "index": -1, "error": f"Frame cannot exceed {MAX_BATCH_CLAIMS} claims"})
+        return 0
+
+    claims, reserved = reserve_new_claims(
+        validate_frame_items(frame, "claims", ClaimSubmission, seq, rejected),
+        lambda claim: claim.idempotency_key
+    )
+    alerts = validate_frame_items(frame, "alerts", AlertSubmission, seq, rejected)
+    deepfakes = validate_frame_items(frame, "deepfakes", DeepfakeSubmission, seq, rejected)
+
+    if claims:
+        try:
+            forward_claim_batch([build_claim_data(claim) for claim in claims])
+        except Exception as e:
+            # Keys of claims that were not forwarded are released so the agent can resend them
+            release_item_keys(reserved)
+            rejected.append({"seq": seq, "kind": "claims", "index": -1, "error": f"Error processing claims: {str(e)}"})
+            claims = []
+    accepted = len(claims)
+    for index, alert in enumerate(alerts):
+        alert_data = build_alert_data(alert)
+        try:
+            forwarder.submit("/api/alerts", alert_data, alert_data["severity"])
+        except LaneFull as e:
+            rejected.append({"seq": seq, "kind": "alerts", "index": index, "error": str(e)})
+            continue
+        publish_alert(alert_data)
+        accepted += 1
+    for index, deepfake in enumerate(deepfakes):
+        deepfake_data = build_deepfake_data(deepfake)
+        try:
+            forwarder.submit("/api/deepfakes", deepfake_data, deepfake_data["riskLevel"])
+        except LaneFull as e:
+            rejected.append({"seq": seq, "kind": "deepfakes", "index": index, "error": str(e)})
+            continue
+        accepted += 1
+
+
+    record_submitted_items(agent_id, accepted)
+    return accepted
+
+def apply_status_update(agent_id: str, update: dict, seq: int, rejected: list) -> int:
+    """Validate a socket status update with the AgentStatus model and apply it like PUT /agents/status"""
+    current = agent_statuses.get(agent_id)
+    if current is None:
+        rejected.append({"seq": seq, "kind": "status", "index": -1, "error": "Agent is not registered"})
+        return 0
+    if not isinstance(update, dict):
+        rejected.append({"seq": seq, "kind": "status", "index": -1, "error": "Status update must be a map"})
+        return 0
+    fields = {field: update[field] for field in ("processed_items", "error_count", "metadata") if field in update}
+    try:
+        status = AgentStatus(**{
+            **current.model_dump(),
+            **fields,
+            "status": update.get("status", "active"),
+            "last_activity": datetime.utcnow()
+        })
+    except ValidationError as e:
+        rejected.append({"seq": seq, "kind": "status", "index": -1, "error": str(e)})
+        return 0
+    agent_aggregates.replace(current, status)
+    agent_statuses[agent_id] = status
+    demoted_agents.discard(agent_id)
+    return 1
+
 # WebSocket endpoint for real-time agent communication
 @app.websocket("/ws/agent/{agent_id}")
-async def websocket_agent(websocket, agent_id: str):
-    """WebSocket endpoint for real-time agent communication"""
+async def websocket_agent(websocket: WebSocket, agent_id: str):
+    """WebSocket endpoint for real-time agent communication
+
+    Binary frames are MessagePack maps {"seq": int, "session": str, "claims": [...],
+    "alerts": [...], "deepfakes": [...], "status": {...}, "ack": bool}; text frames
+    carry JSON {"type": "status_update", ...} or heartbeats. Everything is
+    acknowledged cumulatively with {"type": "ack", "seq": n, "accepted": k,
+    "status_updates": u, "rejected": [...]} every WS_ACK_EVERY_FRAMES frames, on
+    request, on rejections or on replays.
+
+    The last processed seq is kept per agent and session across connections,
+    so frames re-sent after a reconnect are acknowledged but not forwarded
+    again. A new session id or "reset": true starts a new sequence. A frame
+    more than WS_REPLAY_WINDOW below the last seq of the same session is
+    neither processed nor acknowledged; the agent gets a sequence_regressed
+    error instead, since it most likely restarted without resetting.
+    """
     await websocket.accept()
+    session, last_seq = agent_sequences.get(agent_id) or (None, 0)
+    unacked_frames = 0
+    accepted = 0
+    status_updates = 0
+    rejected = []
+
+    async def send(message: dict):
+        if msgpack is not None:
+            await websocket.send_bytes(msgpack.packb(message))
+        else:
+            await websocket.send_json(message)
+
     try:
         while True:
-            data = await websocket.receive_json()
-            # Handle real-time agent updates
-            if data.get("type") == "status_update":
-                if agent_id in agent_statuses:
-                    agent_statuses[agent_id].status = data.get("status", "active")
-                    agent_statuses[agent_id].last_activity = datetime.utcnow()
-            
-            # Echo back confirmation
-            await websocket.send_json({
-                "type": "confirmation",
-                "message": "Status updated",
-                "timestamp": datetime.utcnow().isoformat()
-            })
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if agent_id in agent_statuses:
+                record_heartbeat(agent_id)
+
+            replay = False
+            ack_requested = False
+
+            # Binary submission frames
+            if message.get("bytes") is not None:
+                if msgpack is None:
+                    await websocket.send_json({"type": "error", "message": "Binary frames require msgpack on the server"})
+                    continue
+                try:
+                    frame = msgpack.unpackb(message["bytes"], raw=False)
+                    frame_session = frame.get("session")
+                    if frame.get("reset") or (frame_session is not None and frame_session != session):
+                        frame_last_seq = 0
+                    else:
+                        frame_last_seq = last_seq
+                    seq = int(frame.get("seq", frame_last_seq + 1))
+                except Exception as e:
+                    await websocket.send_json({"type": "error", "message": f"Malformed frame: {str(e)}"})
+                    continue
+
+                if frame_last_seq - seq >= WS_REPLAY_WINDOW:
+                    # Acknowledging this frame would tell the agent data was kept that never will be
+                    await send({
+                        "type": "error",
+                        "code": "sequence_regressed",
+                        "seq": seq,
+                        "last_seq": frame_last_seq,
+                        "message": "seq is far below the last processed seq; start a new session or send reset"
+                    })
+                    continue
+
+                session, last_seq = (frame_session if frame_session is not None else session), frame_last_seq
+                replay = seq <= last_seq
+                if not replay:
+                    accepted += process_submission_frame(frame, seq, rejected, agent_id)
+                    if frame.get("status") is not None:
+                        status_updates += apply_status_update(agent_id, frame["status"], seq, rejected)
+                    last_seq = seq
+                    agent_sequences.put(agent_id, (session, last_seq))
+                    unacked_frames += 1
+                    if agent_id in agent_statuses:
+                        agent_statuses[agent_id].last_activity = datetime.utcnow()
+                ack_requested = bool(frame.get("ack"))
+            else:
+                try:
+                    data = json.loads(message["text"])
+                except (TypeError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "message": f"Malformed message: {str(e)}"})
+                    continue
+                # Plain heartbeats need no confirmation
+                if data.get("type") == "heartbeat":
+                    if agent_id in agent_statuses:
+                        agent_statuses[agent_id].last_activity = datetime.utcnow()
+                    continue
+
+                # Status updates are covered by the next cumulative ack instead of a reply each
+                if data.get("type") == "status_update":
+                    status_updates += apply_status_update(agent_id, data, last_seq, rejected)
+                    unacked_frames += 1
+                ack_requested = bool(data.get("ack"))
+
+            if replay or rejected or ack_requested or unacked_frames >= WS_ACK_EVERY_FRAMES:
+                await send({
+                    "type": "ack",
+                    "seq": last_seq,
+                    "accepted": accepted,
+                    "status_updates": status_updates,
+                    "rejected": rejected
+                })
+                unacked_frames = 0
+                accepted = 0
+                status_updates = 0
+                rejected = []
     except Exception as e:
         print(f"WebSocket error for agent {agent_id}: {str(e)}")
     finally:
         # Mark agent as offline when disconnected
         if agent_id in agent_statuses:
-            agent_statuses[agent_id].status = "offline"
+            heartbeats.disarm(agent_id)
+            demoted_agents.discard(agent_id)
+            set_agent_status(agent_id, "offline")
 
 if __name__ == "__main__":
     uvicorn.run(
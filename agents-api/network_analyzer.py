@@ -1,10 +1,11 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional, Set
 import asyncio
 import uvicorn
 import httpx
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
 import os
 from dotenv import load_dotenv
@@ -12,10 +13,21 @@ import numpy as np
 from collections import defaultdict, Counter
 import hashlib
 import re
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from bson import ObjectId
 from datetime import timedelta
 
+from author_cache import AuthorCache, apply_update
+from write_behind import WriteBehindBuffer
+from graph_engine import CSRGraph
+from centrality import CentralityJob
+from coordination import CoordinationDetector
+from response_cache import ResponseCache
+from news_store import NewsStore, NewsPrefetcher, normalize_article
+
 load_dotenv()
 
 app = FastAPI(
@@ -31,6 +43,40 @@ NEWS_API_BASE_URL = "https://api.newsapi.ai/v1"
 AGENT_ID = "network-analyzer-1"
 MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DATABASE_NAME = "civic_shield_network"
+AUTHOR_CACHE_MAX_ENTRIES = int(os.getenv("AUTHOR_CACHE_MAX_ENTRIES", "50000"))
+AUTHOR_CACHE_TTL_SECONDS = float(os.getenv("AUTHOR_CACHE_TTL_SECONDS", "600"))
+AUTHOR_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUTHOR_FLUSH_INTERVAL_SECONDS", "1"))
+AUTHOR_FLUSH_MAX_DIRTY = int(os.getenv("AUTHOR_FLUSH_MAX_DIRTY", "1000"))
+GRAPH_COMPACT_THRESHOLD = int(os.getenv("GRAPH_COMPACT_THRESHOLD", "50000"))
+CENTRALITY_INTERVAL_SECONDS = float(os.getenv("CENTRALITY_INTERVAL_SECONDS", "300"))
+CENTRALITY_MIN_NEW_EDGES = int(os.getenv("CENTRALITY_MIN_NEW_EDGES", "10000"))
+NETWORK_HUB_MIN_RELATIVE_PAGERANK = float(os.getenv("NETWORK_HUB_MIN_RELATIVE_PAGERANK", "20"))
+GRAPH_EXPORT_CHUNK_SIZE = int(os.getenv("GRAPH_EXPORT_CHUNK_SIZE", "1000"))
+EGO_MAX_HOPS = int(os.getenv("EGO_MAX_HOPS", "3"))
+EGO_MAX_NODES = int(os.getenv("EGO_MAX_NODES", "1000"))
+EGO_MAX_EDGES = int(os.getenv("EGO_MAX_EDGES", "5000"))
+NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "1000"))
+NEWS_CACHE_TTL_SECONDS = float(os.getenv("NEWS_CACHE_TTL_SECONDS", "300"))
+NEWS_CACHE_STALE_SECONDS = float(os.getenv("NEWS_CACHE_STALE_SECONDS", "1800"))
+NEWS_STORE_RETENTION_HOURS = float(os.getenv("NEWS_STORE_RETENTION_HOURS", "168"))
+NEWS_STORE_MAX_DOCUMENTS = int(os.getenv("NEWS_STORE_MAX_DOCUMENTS", "200000"))
+NEWS_LOCAL_MIN_RESULTS = int(os.getenv("NEWS_LOCAL_MIN_RESULTS", "3"))
+NEWS_PREFETCH_INTERVAL_SECONDS = float(os.getenv("NEWS_PREFETCH_INTERVAL_SECONDS", "900"))
+NEWS_PREFETCH_MAX_KEYWORDS = int(os.getenv("NEWS_PREFETCH_MAX_KEYWORDS", "10"))
+NEWS_PREFETCH_ARTICLES = int(os.getenv("NEWS_PREFETCH_ARTICLES", "50"))
+NEWS_PREFETCH_KEYWORDS = [keyword.strip() for keyword in os.getenv("NEWS_PREFETCH_KEYWORDS", "").split(",") if keyword.strip()]
+NEWS_DROP_PATH = os.getenv("NEWS_DROP_PATH")
+NETWORK_BATCH_MAX_ITEMS = int(os.getenv("NETWORK_BATCH_MAX_ITEMS", "10000"))
+RELATED_CLAIMS_LIMIT = int(os.getenv("RELATED_CLAIMS_LIMIT", "5"))
+RELATED_CLAIMS_PER_AUTHOR = int(os.getenv("RELATED_CLAIMS_PER_AUTHOR", "3"))
+RELATED_CLAIMS_WINDOW_DAYS = float(os.getenv("RELATED_CLAIMS_WINDOW_DAYS", "7"))
+COORDINATION_WINDOW_SECONDS = float(os.getenv("COORDINATION_WINDOW_SECONDS", "300"))
+COORDINATION_HOP_SECONDS = float(os.getenv("COORDINATION_HOP_SECONDS", "60"))
+COORDINATION_MIN_SHARED_TARGETS = int(os.getenv("COORDINATION_MIN_SHARED_TARGETS", "3"))
+COORDINATION_MIN_LIFT = float(os.getenv("COORDINATION_MIN_LIFT", "5"))
+COORDINATION_MAX_TARGET_ACCOUNTS = int(os.getenv("COORDINATION_MAX_TARGET_ACCOUNTS", "500"))
+COORDINATION_MIN_CLUSTER_SIZE = int(os.getenv("COORDINATION_MIN_CLUSTER_SIZE", "3"))
+COORDINATION_FLAG_TTL_SECONDS = float(os.getenv("COORDINATION_FLAG_TTL_SECONDS", "3600"))
 
 # MongoDB client
 mongo_client = None
@@ -40,11 +86,63 @@ db = None
 # - authors: Author profiles and stats
 # - connections: Network edges/relationships  
 # - viral_patterns: Track viral content patterns
-# - claims: Store claim relationships
+# - claims: Flagged posts, read back as neighbours' related claims
+
+# Cache for frequent lookups; bounded, and kept in step with every author update
+author_cache = AuthorCache(max_entries=AUTHOR_CACHE_MAX_ENTRIES, ttl_seconds=AUTHOR_CACHE_TTL_SECONDS)
+
+# In-memory mirror of the connections collection, loaded at startup
+connection_graph = CSRGraph(compact_threshold=GRAPH_COMPACT_THRESHOLD)
+
+# PageRank and clustering recomputed in the background and written back to authors
+centrality_job = CentralityJob(
+    connection_graph,
+    write=lambda operations: db.authors.bulk_write(operations, ordered=False),
+    on_scores=author_cache.apply,
+    interval_seconds=CENTRALITY_INTERVAL_SECONDS,
+    min_new_edges=CENTRALITY_MIN_NEW_EDGES
+)
+
+# Accounts that mention or retweet the same targets together more often than chance
+coordination_detector = CoordinationDetector(
+    window_seconds=COORDINATION_WINDOW_SECONDS,
+    hop_seconds=COORDINATION_HOP_SECONDS,
+    min_shared_targets=COORDINATION_MIN_SHARED_TARGETS,
+    min_lift=COORDINATION_MIN_LIFT,
+    max_target_accounts=COORDINATION_MAX_TARGET_ACCOUNTS,
+    min_cluster_size=COORDINATION_MIN_CLUSTER_SIZE,
+    flag_ttl_seconds=COORDINATION_FLAG_TTL_SECONDS
+)
 
-# Cache for frequent lookups
-author_cache = {}
-connection_cache = {}
+# NewsAPI responses by normalized query, shared by /search/news and /verify/claim
+news_cache = ResponseCache(
+    max_entries=NEWS_CACHE_MAX_ENTRIES,
+    ttl_seconds=NEWS_CACHE_TTL_SECONDS,
+    stale_seconds=NEWS_CACHE_STALE_SECONDS
+)
+news_client: Optional[httpx.AsyncClient] = None
+
+# Local article corpus searched before NewsAPI, kept filled by the prefetcher
+news_store = NewsStore(
+    retention_seconds=NEWS_STORE_RETENTION_HOURS * 3600,
+    max_documents=NEWS_STORE_MAX_DOCUMENTS
+)
+news_prefetcher = NewsPrefetcher(
+    news_store,
+    fetch=lambda keyword: prefetch_news(keyword),
+    interval_seconds=NEWS_PREFETCH_INTERVAL_SECONDS,
+    max_keywords=NEWS_PREFETCH_MAX_KEYWORDS,
+    seed_keywords=NEWS_PREFETCH_KEYWORDS,
+    drop_path=NEWS_DROP_PATH
+)
+
+# Author stat updates are merged per handle and flushed as one bulk write
+author_updates = WriteBehindBuffer(
+    write=lambda operations: db.authors.bulk_write(operations, ordered=False),
+    key_field="handle",
+    flush_interval=AUTHOR_FLUSH_INTERVAL_SECONDS,
+    max_dirty=AUTHOR_FLUSH_MAX_DIRTY
+)
 
 class NetworkAnalysisRequest(BaseModel):
     authorHandle: str = Field(..., pattern=r"^@?\w+$", description="Author's social media handle")
@@ -71,6 +169,7 @@ class NetworkAnalysisResponse(BaseModel):
     networkInsights: Dict[str, Any] = {}
     riskAssessment: Dict[str, Any] = {}
     relatedClaims: List[Dict[str, Any]] = []
+    stageTimings: Dict[str, float] = {}
 
 class NewsSearchRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=200)
@@ -97,39 +196,71 @@ async def root():
         "mongodb_connected": mongo_client is not None
     }
 
+@app.get("/stats")
+async def get_runtime_stats():
+    """In-memory cache statistics"""
+    return {
+        "author_cache": author_cache.stats(),
+        "author_writes": author_updates.stats(),
+        "graph": connection_graph.stats(),
+        "centrality": centrality_job.stats(),
+        "coordination": coordination_detector.stats(),
+        "news_cache": news_cache.stats(),
+        "news_store": {**news_store.stats(), "prefetch": news_prefetcher.stats()},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 # MongoDB Helper Functions
+def new_author_document(handle: str) -> dict:
+    """Initial profile for an author seen for the first time"""
+    now = datetime.utcnow()
+    return {
+        "handle": handle,
+        "total_posts": 0,
+        "total_reach": 0,
+        "total_mentions": 0,
+        "credibility_score": 0.5,  # Start neutral
+        "risk_indicators": 0,
+        "first_seen": now,
+        "last_activity": now,
+        "followers_estimate": 0,
+        "network_centrality": 0.0,
+        "relative_pagerank": 0.0,
+        "clustering_coefficient": 0.0,
+        "created_at": now,
+        "updated_at": now
+    }
+
 async def get_or_create_author(handle: str) -> dict:
     """Get author from MongoDB or create new one"""
     try:
         # Check cache first
-        if handle in author_cache:
-            return author_cache[handle]
+        author = author_cache.get(handle)
+        if author is not None:
+            return author
         
-        # Get from database
+        # Get from database, creating it atomically if missing; ensure_authors or a
+        # concurrent request for the same handle may be inserting it right now
         author = await db.authors.find_one({"handle": handle})
-        
         if not author:
-            # Create new author
-            author = {
-                "handle": handle,
-                "total_posts": 0,
-                "total_reach": 0,
-                "total_mentions": 0,
-                "credibility_score": 0.5,  # Start neutral
-                "risk_indicators": 0,
-                "first_seen": datetime.utcnow(),
-                "last_activity": datetime.utcnow(),
-                "followers_estimate": 0,
-                "network_centrality": 0.0,
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            
-            result = await db.authors.insert_one(author)
-            author["_id"] = result.inserted_id
+            try:
+                author = await db.authors.find_one_and_update(
+                    {"handle": handle},
+                    {"$setOnInsert": new_author_document(handle)},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                author = await db.authors.find_one({"handle": handle})
+            connection_graph.add_node(handle)
+        
+        # Include updates still waiting in the write-behind buffer
+        pending = author_updates.pending(handle)
+        if pending:
+            apply_update(author, pending)
         
         # Cache the result
-        author_cache[handle] = author
+        author_cache.put(handle, author)
         return author
         
     except Exception as e:
@@ -160,119 +291,173 @@ async def update_author_stats(handle: str, request: NetworkAnalysisRequest):
         if request.reachEstimate > author.get("followers_estimate", 0):
             updates["$max"] = {"followers_estimate": request.reachEstimate // 10}
         
-        await db.authors.update_one({"handle": handle}, updates)
+        author_updates.add(handle, updates)
         
-        # Update cache
-        if handle in author_cache:
-            author_cache[handle]["total_posts"] += 1
-            author_cache[handle]["total_reach"] += request.reachEstimate
-            author_cache[handle]["total_mentions"] += len(request.mentions)
-            author_cache[handle]["last_activity"] = datetime.utcnow()
+        # Write through to the cache and graph with the same operators
+        author_cache.apply(handle, updates)
+        if "$max" in updates:
+            connection_graph.update_followers(handle, updates["$max"]["followers_estimate"])
         
     except Exception as e:
         print(f"Error updating author stats for {handle}: {e}")
 
 async def update_network_connections(handle: str, request: NetworkAnalysisRequest):
-    """Update network connections in MongoDB"""
+    """Update network connections in MongoDB with one bulk upsert per collection"""
     try:
-        # Add mention relationships
-        for mention in request.mentions:
-            clean_mention = clean_handle(mention)
-            await upsert_connection(handle, clean_mention, "mentions", 1.0)
-        
-        # Add retweet relationships
-        if request.retweetOf:
-            original_author = clean_handle(request.retweetOf)
-            await upsert_connection(handle, original_author, "retweets", 0.5)
+        # Aggregate edges first so repeated mentions become one upsert per edge
+        edges: Dict[tuple, List[float]] = {}
+        targets = collect_edges(edges, handle, request)
+        if not edges:
+            return
+        coordination_detector.record(handle, targets)
+        
+        # The author itself is created by get_or_create_author, which may be running concurrently
+        await write_edges(edges, exclude={handle})
             
     except Exception as e:
         print(f"Error updating network connections for {handle}: {e}")
 
-async def upsert_connection(source: str, target: str, connection_type: str, weight: float):
-    """Insert or update a connection between two users"""
+def collect_edges(edges: Dict[tuple, List[float]], handle: str, request: NetworkAnalysisRequest) -> List[str]:
+    """Add a post's mention and retweet edges to edges; returns the accounts it targets"""
+    targets = []
+    for mention in request.mentions:
+        target = clean_handle(mention)
+        edge = edges.setdefault((handle, target, "mentions"), [0.0, 0])
+        edge[0] += 1.0
+        edge[1] += 1
+        targets.append(target)
+    
+    # Add retweet relationships
+    if request.retweetOf:
+        target = clean_handle(request.retweetOf)
+        edge = edges.setdefault((handle, target, "retweets"), [0.0, 0])
+        edge[0] += 0.5
+        edge[1] += 1
+        targets.append(target)
+    return targets
+
+async def write_edges(edges: Dict[tuple, List[float]], exclude: Set[str] = frozenset()):
+    """Upsert aggregated edges and their target authors, then mirror them in the graph"""
+    # Ensure every mentioned or retweeted account exists as an author
+    await ensure_authors({target for _, target, _ in edges} - exclude)
+    
+    now = datetime.utcnow()
+    await db.connections.bulk_write([
+        connection_upsert(source, target, connection_type, weight, count, now)
+        for (source, target, connection_type), (weight, count) in edges.items()
+    ], ordered=False)
+    
+    for (source, target, _), (weight, _) in edges.items():
+        connection_graph.add_edge(source, target, weight)
+
+async def preload_authors(handles: Set[str]):
+    """Cache every uncached author with one $in query, creating the missing ones in one bulk upsert"""
+    missing = [handle for handle in handles if handle not in author_cache]
+    if not missing:
+        return
+    
+    found = set()
+    async for author in db.authors.find({"handle": {"$in": missing}}):
+        pending = author_updates.pending(author["handle"])
+        if pending:
+            apply_update(author, pending)
+        author_cache.put(author["handle"], author)
+        found.add(author["handle"])
+    
+    # Authors another request inserted between the find and the upsert are read back
+    absent = [handle for handle in missing if handle not in found]
+    created = await create_authors(absent)
+    raced = [handle for handle in absent if handle not in created]
+    if raced:
+        async for author in db.authors.find({"handle": {"$in": raced}}):
+            pending = author_updates.pending(author["handle"])
+            if pending:
+                apply_update(author, pending)
+            author_cache.put(author["handle"], author)
+
+async def ensure_authors(handles: Set[str]):
+    """Create any missing authors in a single bulk upsert"""
+    missing = [handle for handle in handles if handle not in author_cache]
+    if missing:
+        await create_authors(missing)
+
+async def create_authors(handles: List[str]) -> Set[str]:
+    """Upsert new author documents in one bulk write and cache the ones it inserted
+
+    Returns the handles this call created; authors that already existed, or
+    that a concurrent upsert inserted first, are left alone
+    """
+    if not handles:
+        return set()
+    documents = [new_author_document(handle) for handle in handles]
     try:
-        # Ensure both users exist
-        await get_or_create_author(source)
-        await get_or_create_author(target)
-        
-        # Check if connection exists
-        existing = await db.connections.find_one({
-            "source": source,
-            "target": target,
-            "type": connection_type
-        })
-        
-        if existing:
-            # Update existing connection
-            await db.connections.update_one(
-                {"_id": existing["_id"]},
-                {
-                    "$inc": {"weight": weight, "interaction_count": 1},
-                    "$set": {"last_interaction": datetime.utcnow()}
-                }
-            )
-        else:
-            # Create new connection
-            connection = {
-                "source": source,
-                "target": target,
-                "type": connection_type,
-                "weight": weight,
-                "interaction_count": 1,
-                "first_interaction": datetime.utcnow(),
-                "last_interaction": datetime.utcnow(),
-                "created_at": datetime.utcnow()
-            }
-            await db.connections.insert_one(connection)
-            
-    except Exception as e:
-        print(f"Error upserting connection {source} -> {target}: {e}")
+        result = await db.authors.bulk_write([
+            UpdateOne({"handle": document["handle"]}, {"$setOnInsert": document}, upsert=True)
+            for document in documents
+        ], ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        upserted = {entry["index"]: entry["_id"] for entry in e.details.get("upserted", [])}
+    
+    created = set()
+    for index, author_id in upserted.items():
+        document = documents[index]
+        document["_id"] = author_id
+        pending = author_updates.pending(document["handle"])
+        if pending:
+            apply_update(document, pending)
+        author_cache.put(document["handle"], document)
+        connection_graph.add_node(document["handle"])
+        created.add(document["handle"])
+    return created
+
+def connection_upsert(source: str, target: str, connection_type: str, weight: float,
+                      count: int, now: datetime) -> UpdateOne:
+    """Upsert operation adding weight and interactions to a connection"""
+    return UpdateOne(
+        {"source": source, "target": target, "type": connection_type},
+        {
+            "$inc": {"weight": weight, "interaction_count": count},
+            "$set": {"last_interaction": now},
+            "$setOnInsert": {"first_interaction": now, "created_at": now}
+        },
+        upsert=True
+    )
 
 async def calculate_network_metrics(handle: str) -> dict:
-    """Calculate network metrics for an author"""
-    try:
-        # Get all connections for this author
-        outgoing = await db.connections.count_documents({"source": handle})
-        incoming = await db.connections.count_documents({"target": handle})
-        
-        # Calculate total network reach (sum of connected users' followers)
-        pipeline = [
-            {"$match": {"source": handle}},
-            {"$lookup": {
-                "from": "authors",
-                "localField": "target",
-                "foreignField": "handle",
-                "as": "target_author"
-            }},
-            {"$unwind": "$target_author"},
-            {"$group": {
-                "_id": None,
-                "total_reach": {"$sum": "$target_author.followers_estimate"}
-            }}
-        ]
-        
-        reach_result = await db.connections.aggregate(pipeline).to_list(1)
-        network_reach = reach_result[0]["total_reach"] if reach_result else 0
-        
-        # Simple centrality calculation (degree centrality)
-        total_connections = outgoing + incoming
-        
-        # Get total network size for normalization
-        total_authors = await db.authors.count_documents({})
-        centrality = total_connections / max(total_authors - 1, 1) if total_authors > 1 else 0
-        
-        return {
-            "centrality": centrality,
-            "clustering": 0.0,  # Would need more complex calculation
-            "network_reach": network_reach,
-            "connections": total_connections,
-            "outgoing_connections": outgoing,
-            "incoming_connections": incoming
-        }
-        
-    except Exception as e:
-        print(f"Error calculating network metrics for {handle}: {e}")
+    """Calculate network metrics for an author from the in-memory graph"""
+    metrics = connection_graph.metrics(handle)
+    if metrics is None:
         return {"centrality": 0, "clustering": 0, "network_reach": 0, "connections": 0}
+    network_centrality, clustering = centrality_job.scores(handle) or (0.0, 0.0)
+    pagerank, relative_pagerank = centrality_job.pagerank_scores(handle) or (0.0, 0.0)
+    return {
+        "centrality": metrics["centrality"],
+        "pagerank": pagerank,
+        "relative_pagerank": relative_pagerank,
+        "network_centrality": network_centrality,
+        "clustering": clustering,
+        "network_reach": metrics["network_reach"],
+        "connections": metrics["connections"],
+        "outgoing_connections": metrics["outgoing_connections"],
+        "incoming_connections": metrics["incoming_connections"],
+        "component_size": connection_graph.component_of(handle)["component_size"]
+    }
+
+async def load_connection_graph():
+    """Mirror the authors and connections collections into the in-memory graph"""
+    nodes = [
+        (author["handle"], author.get("followers_estimate", 0))
+        async for author in db.authors.find({}, {"_id": 0, "handle": 1, "followers_estimate": 1})
+    ]
+    edges = [
+        (connection["source"], connection["target"], connection.get("weight", 1))
+        async for connection in db.connections.find({}, {"_id": 0, "source": 1, "target": 1, "weight": 1})
+    ]
+    connection_graph.load(nodes, edges)
+    print(f"✅ Loaded network graph: {connection_graph.node_count} nodes, {connection_graph.edge_count} edges")
 
 async def get_network_size() -> int:
     """Get total number of nodes in network"""
@@ -289,31 +474,37 @@ async def get_total_authors() -> int:
         return 0
 
 @app.post("/analyze/network", response_model=NetworkAnalysisResponse)
-async def analyze_network(request: NetworkAnalysisRequest):
+async def analyze_network(request: NetworkAnalysisRequest, background_tasks: BackgroundTasks):
     """Analyze social network patterns and compute viral score"""
     try:
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        
         # Clean and normalize handle
         author_handle = clean_handle(request.authorHandle)
+        news_prefetcher.note(request.hashtags or [])
         
-        # Update author statistics
-        await update_author_stats(author_handle, request)
-        
-        # Update network connections
-        await update_network_connections(author_handle, request)
-        
-        # Get author data
-        author = await get_or_create_author(author_handle)
-        if not author:
-            raise HTTPException(status_code=500, detail="Failed to get author data")
-        
-        # Calculate viral score
-        viral_score = await calculate_viral_score(author, request)
+        async def author_stages():
+            # Stats first so the fetched author includes this post
+            await timed_stage(timings, "author_stats", update_author_stats(author_handle, request))
+            author = await timed_stage(timings, "author_fetch", get_or_create_author(author_handle))
+            if not author:
+                raise HTTPException(status_code=500, detail="Failed to get author data")
+            viral_score = await timed_stage(timings, "viral_score", calculate_viral_score(author, request))
+            credibility = await timed_stage(timings, "credibility", update_credibility_score(author, request))
+            return author, viral_score, credibility
         
-        # Update and get credibility score
-        credibility_score, risk_level = await update_credibility_score(author, request)
+        async def connection_stages():
+            # Metrics read the in-memory graph, so they wait for this post's edges
+            await timed_stage(timings, "connections", update_network_connections(author_handle, request))
+            return await timed_stage(timings, "network_metrics", calculate_network_metrics(author_handle))
         
-        # Calculate network metrics
-        network_metrics = await calculate_network_metrics(author_handle)
+        # Author, connection and related-claim round-trips are independent of each other
+        (author, viral_score, (credibility_score, risk_level)), network_metrics, related_claims = await asyncio.gather(
+            author_stages(),
+            connection_stages(),
+            timed_stage(timings, "related_claims", find_related_claims(request))
+        )
         
         # Generate insights
         insights = generate_network_insights(author, request)
@@ -321,8 +512,11 @@ async def analyze_network(request: NetworkAnalysisRequest):
         # Risk assessment
         risk_assessment = assess_risk_patterns(author, request)
         
-        # Find related claims
-        related_claims = await find_related_claims(request)
+        # Keep flagged posts so they show up as related claims for this author's neighbours
+        if is_flagged(request, risk_level, risk_assessment):
+            background_tasks.add_task(record_flagged_content, [
+                flagged_content_document(author_handle, request, risk_level, risk_assessment, viral_score)
+            ])
         
         # Create source update
         source_update = SourceUpdate(
@@ -333,86 +527,202 @@ async def analyze_network(request: NetworkAnalysisRequest):
             totalPosts=author["total_posts"],
             avgReach=author["total_reach"] / max(author["total_posts"], 1)
         )
+        timings["total"] = (time.perf_counter() - start) * 1000
         
         return NetworkAnalysisResponse(
             viralScore=viral_score,
             sourceUpdate=source_update,
             networkInsights=insights,
             riskAssessment=risk_assessment,
-            relatedClaims=related_claims
+            relatedClaims=related_claims,
+            stageTimings=timings
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Network analysis failed: {str(e)}")
 
-@app.post("/search/news")
-async def search_news(request: NewsSearchRequest):
-    """Search for news articles using NewsAPI.ai"""
+@app.post("/analyze/network/batch")
+async def analyze_network_batch(requests: List[NetworkAnalysisRequest], background_tasks: BackgroundTasks):
+    """Analyze many posts at once with a handful of bulk writes
+
+    Authors are loaded with one query, each post is scored in order against
+    the in-memory author, and the batch's author and edge deltas are written
+    with one bulk_write per collection
+    """
+    if len(requests) > NETWORK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {NETWORK_BATCH_MAX_ITEMS} posts")
+    
     try:
-        async with httpx.AsyncClient() as client:
-            params = {
-                "query": request.query,
-                "apikey": NEWS_API_KEY,
-                "articlesCount": request.max_results,
-                "lang": request.language,
-                "sortBy": "rel"  # Relevance
-            }
-            
-            if request.country:
-                params["sourceLocationUri"] = f"http://en.wikipedia.org/wiki/{request.country.upper()}"
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        handles = [clean_handle(request.authorHandle) for request in requests]
+        await timed_stage(timings, "author_fetch", preload_authors(set(handles)))
+        
+        scoring_start = time.perf_counter()
+        edges: Dict[tuple, List[float]] = {}
+        flagged = []
+        results = []
+        for handle, request in zip(handles, requests):
+            # Preloaded authors are cached, so these stages stay in memory
+            await update_author_stats(handle, request)
+            author = await get_or_create_author(handle)
+            if not author:
+                results.append({"handle": handle, "error": "Failed to get author data"})
+                continue
             
-            if request.category:
-                params["categoryUri"] = f"http://en.wikipedia.org/wiki/{request.category}"
+            targets = collect_edges(edges, handle, request)
+            coordination_detector.record(handle, targets)
+            news_prefetcher.note(request.hashtags or [])
             
-            response = await client.get(
-                f"{NEWS_API_BASE_URL}/article/getArticles",
-                params=params,
-                timeout=15.0
-            )
+            viral_score = await calculate_viral_score(author, request)
+            credibility_score, risk_level = await update_credibility_score(author, request)
+            risk_assessment = assess_risk_patterns(author, request)
+            if is_flagged(request, risk_level, risk_assessment):
+                flagged.append(flagged_content_document(handle, request, risk_level, risk_assessment, viral_score))
             
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get("articles", {}).get("results", [])
-                
-                processed_articles = []
-                for article in articles:
-                    processed_articles.append({
-                        "title": article.get("title", ""),
-                        "body": article.get("body", "")[:500],  # First 500 chars
-                        "url": article.get("url", ""),
-                        "source": article.get("source", {}).get("title", "Unknown"),
-                        "published_date": article.get("dateTime", ""),
-                        "relevance": article.get("rel", 0),
-                        "sentiment": article.get("sentiment", 0),
-                        "language": article.get("lang", "en")
-                    })
-                
-                return {
-                    "query": request.query,
-                    "total_results": len(processed_articles),
-                    "articles": processed_articles,
-                    "search_timestamp": datetime.utcnow().isoformat()
-                }
-            else:
-                raise HTTPException(status_code=502, detail=f"NewsAPI error: {response.status_code}")
-                
+            results.append({
+                "handle": handle,
+                "viralScore": viral_score,
+                "credibilityScore": credibility_score,
+                "riskLevel": risk_level,
+                "riskFactors": risk_assessment["risk_factors"],
+                "coordinationLikelihood": risk_assessment["coordination_likelihood"]
+            })
+        timings["scoring"] = (time.perf_counter() - scoring_start) * 1000
+        
+        if edges:
+            await timed_stage(timings, "connections", write_edges(edges))
+        await timed_stage(timings, "author_writes", author_updates.flush())
+        if flagged:
+            background_tasks.add_task(record_flagged_content, flagged)
+        timings["total"] = (time.perf_counter() - start) * 1000
+        
+        return {
+            "processed": len(results),
+            "authors": len(set(handles)),
+            "edges": len(edges),
+            "flagged": len(flagged),
+            "results": results,
+            "stageTimings": timings
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch network analysis failed: {str(e)}")
+
+async def timed_stage(timings: Dict[str, float], stage: str, awaitable):
+    """Await one analysis stage and record its duration in milliseconds"""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[stage] = (time.perf_counter() - start) * 1000
+
+@app.post("/search/news")
+async def search_news(request: NewsSearchRequest):
+    """Search for news articles using NewsAPI.ai"""
+    try:
+        results, status = await news_cache.get(news_cache_key(request), lambda: fetch_and_store_news(request))
+        return {**results, "cache": status}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"News search failed: {str(e)}")
 
+def news_cache_key(request: NewsSearchRequest) -> tuple:
+    """Cache key for a search; queries differing only in case or spacing share an entry"""
+    query = " ".join(request.query.lower().split())
+    return (query, request.language.lower(), request.country, request.category, request.max_results)
+
+def get_news_client() -> httpx.AsyncClient:
+    """Shared NewsAPI client, so searches reuse pooled connections"""
+    global news_client
+    if news_client is None:
+        news_client = httpx.AsyncClient(timeout=15.0)
+    return news_client
+
+async def fetch_news(request: NewsSearchRequest) -> Dict[str, Any]:
+    """Query NewsAPI.ai and normalize the articles"""
+    params = {
+        "query": request.query,
+        "apikey": NEWS_API_KEY,
+        "articlesCount": request.max_results,
+        "lang": request.language,
+        "sortBy": "rel"  # Relevance
+    }
+    
+    if request.country:
+        params["sourceLocationUri"] = f"http://en.wikipedia.org/wiki/{request.country.upper()}"
+    
+    if request.category:
+        params["categoryUri"] = f"http://en.wikipedia.org/wiki/{request.category}"
+    
+    response = await get_news_client().get(
+        f"{NEWS_API_BASE_URL}/article/getArticles",
+        params=params
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"NewsAPI error: {response.status_code}")
+    
+    data = response.json()
+    articles = data.get("articles", {}).get("results", [])
+    processed_articles = [normalize_article(article) for article in articles]
+    
+    return {
+        "query": request.query,
+        "total_results": len(processed_articles),
+        "articles": processed_articles,
+        "search_timestamp": datetime.utcnow().isoformat()
+    }
+
+async def fetch_and_store_news(request: NewsSearchRequest) -> Dict[str, Any]:
+    """NewsAPI search whose articles are also kept in the local store"""
+    results = await fetch_news(request)
+    news_store.add_many(results["articles"])
+    return results
+
+async def prefetch_news(keyword: str) -> List[Dict[str, Any]]:
+    """Articles for one trending keyword, for the prefetcher to store"""
+    results = await fetch_news(NewsSearchRequest(query=keyword, max_results=NEWS_PREFETCH_ARTICLES))
+    return results["articles"]
+
+async def find_news(query: str, max_results: int = 20) -> tuple[List[Dict[str, Any]], str]:
+    """Articles for a query from the local store, going to NewsAPI only when it has too few"""
+    local = news_store.search(query, limit=max_results)
+    if len(local) >= NEWS_LOCAL_MIN_RESULTS:
+        return local, "local"
+    
+    news_search = NewsSearchRequest(query=query, max_results=max_results)
+    try:
+        results = await search_news(news_search)
+    except HTTPException as e:
+        # Rate-limited or down: verify with whatever the local store has
+        print(f"NewsAPI unavailable, using {len(local)} local articles: {e.detail}")
+        return local, "local"
+    
+    urls = {article["url"] for article in local}
+    articles = local + [article for article in results["articles"] if article["url"] not in urls]
+    return articles[:max_results], "newsapi"
+
+@app.get("/news/local")
+async def search_local_news(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(20, ge=1, le=100)):
+    """BM25 search over the local news store"""
+    articles = news_store.search(q, limit=limit)
+    return {
+        "query": q,
+        "total_results": len(articles),
+        "articles": articles,
+        "search_timestamp": datetime.utcnow().isoformat()
+    }
+
 @app.post("/verify/claim")
-async def verify_claim_with_news(request: ClaimVerificationRequest):
+async def verify_claim_with_news(request: ClaimVerificationRequest, background_tasks: BackgroundTasks):
     """Verify claim against news sources and network analysis"""
     try:
         # Extract key terms from claim
         keywords = extract_keywords(request.claim_text) + request.context_keywords
         search_query = " OR ".join(keywords[:5])  # Use top 5 keywords
-        
-        # Search for related news
-        news_search = NewsSearchRequest(
-            query=search_query,
-            max_results=20
-        )
-        news_results = await search_news(news_search)
+        news_prefetcher.note(keywords[:5])
         
         # Analyze claim author's network
         network_request = NetworkAnalysisRequest(
@@ -420,12 +730,17 @@ async def verify_claim_with_news(request: ClaimVerificationRequest):
             reachEstimate=1000,  # Default estimate
             content=request.claim_text
         )
-        network_analysis = await analyze_network(network_request)
+        
+        # Related news (local store first) and the network analysis are independent
+        (articles, news_source), network_analysis = await asyncio.gather(
+            find_news(search_query, max_results=20),
+            analyze_network(network_request, background_tasks)
+        )
         
         # Cross-reference claim with news articles
         verification_score = calculate_verification_score(
             request.claim_text, 
-            news_results["articles"],
+            articles,
             network_analysis
         )
         
@@ -442,9 +757,10 @@ async def verify_claim_with_news(request: ClaimVerificationRequest):
                 "risk_level": network_analysis.sourceUpdate.riskLevel
             },
             "news_analysis": {
-                "related_articles_found": len(news_results["articles"]),
-                "top_sources": list(set([a["source"] for a in news_results["articles"][:5]])),
-                "avg_sentiment": np.mean([a.get("sentiment", 0) for a in news_results["articles"]]) if news_results["articles"] else 0
+                "related_articles_found": len(articles),
+                "top_sources": list(set([a["source"] for a in articles[:5]])),
+                "avg_sentiment": np.mean([a.get("sentiment", 0) for a in articles]) if articles else 0,
+                "news_source": news_source
             },
             "viral_potential": network_analysis.viralScore,
             "risk_assessment": network_analysis.riskAssessment,
@@ -454,70 +770,336 @@ async def verify_claim_with_news(request: ClaimVerificationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Claim verification failed: {str(e)}")
 
-@app.get("/network/graph")
-async def get_network_graph():
-    """Get current network graph structure from MongoDB"""
+# Node fields the graph export can project
+GRAPH_NODE_FIELDS = (
+    "credibility_score", "total_posts", "total_reach", "network_centrality",
+    "clustering_coefficient", "risk_indicators", "followers_estimate"
+)
+NODE_FIELD_DEFAULTS = {"credibility_score": 0.5, "network_centrality": 0.0, "clustering_coefficient": 0.0}
+
+def parse_time_filter(value: Optional[str], name: str) -> Optional[datetime]:
+    if value is None:
+        return None
     try:
-        nodes = []
-        edges = []
-        
-        # Get all authors as nodes
-        async for author in db.authors.find({}):
-            nodes.append({
-                "id": author["handle"],
-                "credibility_score": author.get("credibility_score", 0.5),
-                "total_posts": author.get("total_posts", 0),
-                "total_reach": author.get("total_reach", 0),
-                "network_centrality": author.get("network_centrality", 0.0),
-                "risk_indicators": author.get("risk_indicators", 0),
-                "followers_estimate": author.get("followers_estimate", 0)
-            })
-        
-        # Get all connections as edges
-        async for connection in db.connections.find({}):
-            edges.append({
-                "source": connection["source"],
-                "target": connection["target"],
-                "weight": connection.get("weight", 1),
-                "type": connection.get("type", "unknown"),
-                "interaction_count": connection.get("interaction_count", 1)
-            })
-        
-        # Calculate network statistics
-        total_nodes = len(nodes)
-        total_edges = len(edges)
-        
-        # Calculate density (actual edges / possible edges)
-        max_possible_edges = total_nodes * (total_nodes - 1) if total_nodes > 1 else 0
-        density = total_edges / max_possible_edges if max_possible_edges > 0 else 0
-        
-        # Count connected components (simplified - just check if any isolated nodes)
-        connected_nodes = set()
-        for edge in edges:
-            connected_nodes.add(edge["source"])
-            connected_nodes.add(edge["target"])
-        
-        isolated_nodes = total_nodes - len(connected_nodes)
-        connected_components = len(connected_nodes) + isolated_nodes if connected_nodes else total_nodes
-        
-        network_stats = {
-            "total_nodes": total_nodes,
-            "total_edges": total_edges,
-            "density": density,
-            "clustering": 0.0,  # Would need complex calculation
-            "connected_components": connected_components,
-            "isolated_nodes": isolated_nodes
-        }
-        
-        return {
-            "nodes": nodes,
-            "edges": edges,
-            "statistics": network_stats,
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp: {value}")
+    # Stored timestamps are naive UTC, so offsets are converted rather than dropped
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def network_statistics() -> dict:
+    """Whole-graph statistics from the in-memory graph, without scanning MongoDB"""
+    total_nodes = connection_graph.node_count
+    total_edges = connection_graph.edge_count
+    max_possible_edges = total_nodes * (total_nodes - 1) if total_nodes > 1 else 0
+    components = connection_graph.component_summary()
+    return {
+        "total_nodes": total_nodes,
+        "total_edges": total_edges,
+        "density": total_edges / max_possible_edges if max_possible_edges > 0 else 0,
+        "clustering": centrality_job.average_clustering,
+        "connected_components": components["connected_components"],
+        "isolated_nodes": components["isolated_nodes"],
+        "largest_component_size": components["largest_component"]["size"]
+    }
+
+async def stream_graph_records(edge_query: dict, sort: list, limit: int, fields: List[str],
+                               min_credibility: Optional[float], max_credibility: Optional[float], page: dict,
+                               include_isolated: bool = False):
+    """Yield ("node" | "edge", record) pairs chunk by chunk
+
+    Edges are read from a MongoDB cursor; each chunk's not-yet-seen endpoints are
+    fetched with a single $in query, so memory is bounded by the page size.
+    page["last_id"] and page["scanned"] advance only once a chunk's records are
+    all yielded, so a stream cut short still records where to resume. With
+    include_isolated, the last page also carries the authors that have no edges
+    """
+    credibility_filter = {}
+    if min_credibility is not None:
+        credibility_filter["$gte"] = min_credibility
+    if max_credibility is not None:
+        credibility_filter["$lte"] = max_credibility
+
+    projection = {"_id": 0, "handle": 1, **{field: 1 for field in fields}}
+    accepted: Set[str] = set()
+    seen: Set[str] = set()
+    cursor = db.connections.find(edge_query, {"created_at": 0, "first_interaction": 0}).sort(sort).limit(limit)
+    chunk = []
+
+    async def fetch_nodes(handles):
+        seen.update(handles)
+        author_query = {"handle": {"$in": list(handles)}}
+        if credibility_filter:
+            author_query["credibility_score"] = credibility_filter
+        records = []
+        if handles:
+            async for author in db.authors.find(author_query, projection):
+                accepted.add(author["handle"])
+                records.append(("node", {
+                    "id": author["handle"],
+                    **{field: author.get(field, NODE_FIELD_DEFAULTS.get(field, 0)) for field in fields}
+                }))
+        return records
+
+    async def flush_chunk(chunk):
+        handles = {handle for edge in chunk for handle in (edge["source"], edge["target"])} - seen
+        records = await fetch_nodes(handles)
+        for edge in chunk:
+            if edge["source"] in accepted and edge["target"] in accepted:
+                records.append(("edge", {
+                    "source": edge["source"],
+                    "target": edge["target"],
+                    "weight": edge.get("weight", 1),
+                    "type": edge.get("type", "unknown"),
+                    "interaction_count": edge.get("interaction_count", 1),
+                    "last_interaction": edge["last_interaction"].isoformat() if edge.get("last_interaction") else None
+                }))
+        return records
+
+    async for edge in cursor:
+        chunk.append(edge)
+        if len(chunk) >= GRAPH_EXPORT_CHUNK_SIZE:
+            for record in await flush_chunk(chunk):
+                yield record
+            page["last_id"] = chunk[-1]["_id"]
+            page["scanned"] += len(chunk)
+            chunk = []
+    if chunk:
+        for record in await flush_chunk(chunk):
+            yield record
+        page["last_id"] = chunk[-1]["_id"]
+        page["scanned"] += len(chunk)
+
+    if include_isolated and page["scanned"] < limit:
+        # Last page: authors without edges never show up as an endpoint above
+        isolated = [handle for handle in connection_graph.isolated_handles() if handle not in seen]
+        for start in range(0, len(isolated), GRAPH_EXPORT_CHUNK_SIZE):
+            for record in await fetch_nodes(set(isolated[start:start + GRAPH_EXPORT_CHUNK_SIZE])):
+                yield record
+
+@app.get("/network/graph")
+async def get_network_graph(
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(5000, ge=1, le=50000, description="Edges scanned per page"),
+    fields: Optional[str] = Query(None, description="Comma-separated node fields to include"),
+    min_weight: Optional[float] = Query(None, ge=0),
+    min_credibility: Optional[float] = Query(None, ge=0, le=1),
+    max_credibility: Optional[float] = Query(None, ge=0, le=1),
+    since: Optional[str] = Query(None, description="Only edges active at or after this ISO time"),
+    until: Optional[str] = Query(None, description="Only edges active before this ISO time"),
+    top_k: Optional[int] = Query(None, ge=1, le=50000, description="Only the K heaviest matching edges"),
+    include_isolated: bool = Query(True, description="Add authors without edges to the last page")
+):
+    """Stream the network graph from MongoDB, one cursor page at a time
+
+    Nodes are the authors at either end of the page's edges, each emitted once
+    per page, plus authors without edges on the last page of an unfiltered
+    export. Whole-graph statistics come from the in-memory graph. A stream that
+    fails partway ends with an error and a next_cursor to resume from
+    """
+    node_fields = [field.strip() for field in fields.split(",") if field.strip()] if fields else list(GRAPH_NODE_FIELDS)
+    unknown = [field for field in node_fields if field not in GRAPH_NODE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown node fields: {', '.join(unknown)}")
+
+    edge_query: Dict[str, Any] = {}
+    if min_weight is not None:
+        edge_query["weight"] = {"$gte": min_weight}
+    time_range = {}
+    since_time = parse_time_filter(since, "since")
+    until_time = parse_time_filter(until, "until")
+    if since_time:
+        time_range["$gte"] = since_time
+    if until_time:
+        time_range["$lt"] = until_time
+    if time_range:
+        edge_query["last_interaction"] = time_range
+
+    # Authors without edges belong to the whole graph, not to an edge-filtered subgraph
+    include_isolated = include_isolated and not edge_query and not top_k
+
+    page: Dict[str, Any] = {"last_id": None, "scanned": 0}
+    if top_k:
+        # Top-K sampling is a single page of the heaviest edges
+        sort = [("weight", -1), ("_id", 1)]
+        limit = top_k
+    else:
+        sort = [("_id", 1)]
+        if cursor:
+            try:
+                page["last_id"] = ObjectId(cursor)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            edge_query["_id"] = {"$gt": page["last_id"]}
+
+    records = stream_graph_records(
+        edge_query, sort, limit, node_fields, min_credibility, max_credibility, page, include_isolated
+    )
+
+    def page_info(error: Optional[str] = None) -> dict:
+        # A failed page resumes after the last edge whose records were all sent
+        more = not top_k and (error is not None or page["scanned"] == limit)
+        info = {
+            "next_cursor": str(page["last_id"]) if more and page["last_id"] is not None else None,
+            "statistics": network_statistics(),
             "generated_at": datetime.utcnow().isoformat()
         }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Graph generation failed: {str(e)}")
+        if error is not None:
+            info["error"] = error
+        return info
+
+    if format == "ndjson":
+        async def ndjson_body():
+            try:
+                async for kind, record in records:
+                    yield json.dumps({kind: record}) + "\n"
+            except Exception as e:
+                error = f"Graph generation failed: {str(e)}"
+                yield json.dumps({"error": error}) + "\n"
+                yield json.dumps({"page": page_info(error)}) + "\n"
+            else:
+                yield json.dumps({"page": page_info()}) + "\n"
+
+        return StreamingResponse(ndjson_body(), media_type="application/x-ndjson")
+
+    async def json_body():
+        # Nodes and edges interleave on the wire, so buffer edges per chunk and emit them in a second array
+        yield '{"nodes": ['
+        edge_count = 0
+        node_count = 0
+        pending_edges = []
+        error = None
+        try:
+            async for kind, record in records:
+                if kind == "node":
+                    yield ("," if node_count else "") + json.dumps(record)
+                    node_count += 1
+                else:
+                    pending_edges.append(record)
+        except Exception as e:
+            error = f"Graph generation failed: {str(e)}"
+            print(error)
+        yield '], "edges": ['
+        for record in pending_edges:
+            yield ("," if edge_count else "") + json.dumps(record)
+            edge_count += 1
+        info = page_info(error)
+        yield '], "statistics": ' + json.dumps(info["statistics"])
+        yield ', "next_cursor": ' + json.dumps(info["next_cursor"])
+        if error is not None:
+            yield ', "error": ' + json.dumps(error)
+        yield ', "generated_at": ' + json.dumps(info["generated_at"]) + '}'
+
+    return StreamingResponse(json_body(), media_type="application/json")
+
+@app.get("/network/ego/{handle}")
+async def get_ego_network(
+    handle: str,
+    hops: int = Query(2, ge=1),
+    fan_out: int = Query(25, ge=1, le=1000, description="Heaviest neighbours expanded per node and hop"),
+    max_nodes: int = Query(500, ge=1),
+    max_edges: int = Query(2000, ge=0),
+    direction: str = Query("both", pattern="^(both|out|in)$"),
+    profiles: bool = Query(True, description="Attach credibility from MongoDB in one batched query")
+):
+    """k-hop neighbourhood around one author from the in-memory graph"""
+    author_handle = clean_handle(handle)
+    ego = connection_graph.ego_network(
+        author_handle,
+        hops=min(hops, EGO_MAX_HOPS),
+        fan_out=fan_out,
+        max_nodes=min(max_nodes, EGO_MAX_NODES),
+        max_edges=min(max_edges, EGO_MAX_EDGES),
+        direction=direction
+    )
+    if ego is None:
+        raise HTTPException(status_code=404, detail="Author not found in network")
+
+    for node in ego["nodes"]:
+        network_centrality, clustering = centrality_job.scores(node["id"]) or (0.0, 0.0)
+        node["network_centrality"] = network_centrality
+        node["clustering_coefficient"] = clustering
+
+    if profiles and db is not None:
+        try:
+            found = {
+                author["handle"]: author
+                async for author in db.authors.find(
+                    {"handle": {"$in": [node["id"] for node in ego["nodes"]]}},
+                    {"_id": 0, "handle": 1, "credibility_score": 1, "risk_indicators": 1, "total_posts": 1}
+                )
+            }
+            for node in ego["nodes"]:
+                author = dict(found.get(node["id"], {}))
+                pending = author_updates.pending(node["id"])
+                if pending:
+                    apply_update(author, pending)
+                node["credibility_score"] = author.get("credibility_score", 0.5)
+                node["risk_indicators"] = author.get("risk_indicators", 0)
+                node["total_posts"] = author.get("total_posts", 0)
+        except Exception as e:
+            print(f"Error loading ego network profiles for {author_handle}: {e}")
+
+    return {
+        **ego,
+        "node_count": len(ego["nodes"]),
+        "edge_count": len(ego["edges"]),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@app.get("/network/components")
+async def get_network_components():
+    """Connected component count, size histogram and largest component"""
+    return {
+        **connection_graph.component_summary(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+@app.get("/network/components/{handle}")
+async def get_author_component(handle: str):
+    """Component id and size for one author"""
+    component = connection_graph.component_of(clean_handle(handle))
+    if component is None:
+        raise HTTPException(status_code=404, detail="Author not found in network")
+    return {"handle": clean_handle(handle), **component}
+
+@app.get("/network/authors/{handle}")
+async def get_author_profile(handle: str):
+    """Stored credibility, risk level and network position of one author, without recording anything"""
+    author_handle = clean_handle(handle)
+    author = author_cache.get(author_handle)
+    if author is None and db is not None:
+        author = await db.authors.find_one({"handle": author_handle})
+        if author is not None:
+            pending = author_updates.pending(author_handle)
+            if pending:
+                apply_update(author, pending)
+    if author is None:
+        raise HTTPException(status_code=404, detail="Author not found")
+
+    credibility_score = author.get("credibility_score", 0.5)
+    return {
+        "handle": author_handle,
+        "known": True,
+        "credibilityScore": credibility_score,
+        "riskLevel": risk_level_for(credibility_score),
+        "totalPosts": author.get("total_posts", 0),
+        "networkMetrics": await calculate_network_metrics(author_handle),
+        "coordination": coordination_detector.account_flag(author_handle)
+    }
+
+@app.get("/network/coordination")
+async def get_coordinated_clusters(limit: int = Query(50, ge=1, le=200)):
+    """Most recently detected clusters of coordinated accounts"""
+    return {
+        "clusters": coordination_detector.recent_clusters(limit),
+        "window_seconds": coordination_detector.window_seconds,
+        "statistics": coordination_detector.stats(),
+        "generated_at": datetime.utcnow().isoformat()
+    }
 
 def clean_handle(handle: str) -> str:
     """Clean and normalize social media handle"""
@@ -597,36 +1179,32 @@ async def update_credibility_score(author: dict, request: NetworkAnalysisRequest
     
     # Update in database
     try:
-        await db.authors.update_one(
-            {"handle": author["handle"]},
-            {
-                "$set": {
-                    "credibility_score": new_score,
-                    "updated_at": datetime.utcnow()
-                },
-                "$inc": {"risk_indicators": risk_indicators}
-            }
-        )
+        updates = {
+            "$set": {
+                "credibility_score": new_score,
+                "updated_at": datetime.utcnow()
+            },
+            "$inc": {"risk_indicators": risk_indicators}
+        }
+        author_updates.add(author["handle"], updates)
         
-        # Update cache
-        if author["handle"] in author_cache:
-            author_cache[author["handle"]]["credibility_score"] = new_score
-            author_cache[author["handle"]]["risk_indicators"] += risk_indicators
+        # Write through to the cache with the same operators
+        author_cache.apply(author["handle"], updates)
             
     except Exception as e:
         print(f"Error updating credibility score: {e}")
     
-    # Determine risk level
-    if new_score < 0.3:
-        risk_level = "critical"
-    elif new_score < 0.5:
-        risk_level = "high"
-    elif new_score < 0.7:
-        risk_level = "medium"
-    else:
-        risk_level = "low"
-    
-    return new_score, risk_level
+    return new_score, risk_level_for(new_score)
+
+def risk_level_for(credibility_score: float) -> str:
+    """Risk level implied by an author's credibility score"""
+    if credibility_score < 0.3:
+        return "critical"
+    elif credibility_score < 0.5:
+        return "high"
+    elif credibility_score < 0.7:
+        return "medium"
+    return "low"
 
 def generate_network_insights(author: dict, request: NetworkAnalysisRequest) -> Dict[str, Any]:
     """Generate insights about the network analysis"""
@@ -680,52 +1258,140 @@ def assess_risk_patterns(author: dict, request: NetworkAnalysisRequest) -> Dict[
         risk_factors.append("excessive_mentions")
         risk_score += 0.15
     
-    # Check for amplification networks
-    if author.get("network_centrality", 0) > 0.8:
+    # Check for amplification networks; normalized centrality is always 1.0 for the top author
+    if author.get("relative_pagerank", 0) >= NETWORK_HUB_MIN_RELATIVE_PAGERANK:
         risk_factors.append("network_hub")
         risk_score += 0.1
     
-    return {
+    # Co-amplification with other accounts, from the coordination detector
+    coordination = coordination_detector.account_flag(author.get("handle", ""))
+    if coordination:
+        risk_factors.append("coordinated_amplification")
+        risk_score += 0.3
+    
+    assessment = {
         "overall_risk_score": min(risk_score, 1.0),
         "risk_factors": risk_factors,
-        "coordination_likelihood": min(len(risk_factors) * 0.3, 1.0),
+        "coordination_likelihood": coordination["score"] if coordination else 0.0,
         "bot_probability": min(risk_score * 0.8, 1.0)
     }
+    if coordination:
+        assessment["coordination_cluster"] = coordination["cluster_id"]
+    return assessment
 
-async def find_related_claims(request: NetworkAnalysisRequest) -> List[Dict[str, Any]]:
-    """Find related claims using content similarity and network connections"""
-    related_claims = []
-    
+async def find_related_claims(request: NetworkAnalysisRequest, limit: int = RELATED_CLAIMS_LIMIT) -> List[Dict[str, Any]]:
+    """Strongest, most recent neighbours of the author with their credibility and flagged posts"""
     try:
-        # Get network connections for this author
         author_handle = clean_handle(request.authorHandle)
         
-        # Find connected accounts
-        connections = await db.connections.find({
-            "$or": [
-                {"source": author_handle},
-                {"target": author_handle}
-            ]
-        }).limit(5).to_list(5)
-        
-        for connection in connections:
-            related_handle = connection["target"] if connection["source"] == author_handle else connection["source"]
-            related_author = await db.authors.find_one({"handle": related_handle})
-            
-            if related_author:
-                related_claims.append({
-                    "related_author": related_handle,
-                    "connection_strength": connection.get("weight", 1),
-                    "credibility_score": related_author.get("credibility_score", 0.5),
-                    "claim_type": "network_connected"
-                })
+        # One aggregation merges both directions and every connection type per neighbour
+        neighbours = await db.connections.aggregate([
+            {"$match": {"$or": [{"source": author_handle}, {"target": author_handle}]}},
+            {"$group": {
+                "_id": {"$cond": [{"$eq": ["$source", author_handle]}, "$target", "$source"]},
+                "weight": {"$sum": "$weight"},
+                "last_interaction": {"$max": "$last_interaction"},
+                "types": {"$addToSet": "$type"}
+            }},
+            {"$sort": {"weight": -1, "last_interaction": -1}},
+            {"$limit": limit}
+        ]).to_list(limit)
+        if not neighbours:
+            return []
         
+        handles = [neighbour["_id"] for neighbour in neighbours]
+        profiles, flagged = await asyncio.gather(
+            load_author_profiles(handles),
+            load_flagged_content(handles)
+        )
+        
+        related_claims = []
+        for neighbour in neighbours:
+            handle = neighbour["_id"]
+            last_interaction = neighbour.get("last_interaction")
+            related_claims.append({
+                "related_author": handle,
+                "connection_strength": neighbour.get("weight", 1),
+                "connection_types": sorted(neighbour.get("types", [])),
+                "last_interaction": last_interaction.isoformat() if isinstance(last_interaction, datetime) else last_interaction,
+                "credibility_score": profiles.get(handle, {}).get("credibility_score", 0.5),
+                "flagged_content": flagged.get(handle, []),
+                "claim_type": "network_connected"
+            })
         return related_claims
         
     except Exception as e:
         print(f"Error finding related claims: {e}")
         return []
 
+async def load_author_profiles(handles: List[str]) -> Dict[str, dict]:
+    """Authors by handle, from the cache where possible and one $in query for the rest"""
+    profiles = {}
+    missing = []
+    for handle in handles:
+        author = author_cache.get(handle, count=False)
+        if author is not None:
+            profiles[handle] = author
+        else:
+            missing.append(handle)
+    if missing:
+        async for author in db.authors.find(
+            {"handle": {"$in": missing}},
+            {"_id": 0, "handle": 1, "credibility_score": 1, "risk_indicators": 1}
+        ):
+            pending = author_updates.pending(author["handle"])
+            if pending:
+                apply_update(author, pending)
+            profiles[author["handle"]] = author
+    return profiles
+
+async def load_flagged_content(handles: List[str]) -> Dict[str, List[dict]]:
+    """Most recent flagged posts of each handle within the related-claims window"""
+    since = datetime.utcnow() - timedelta(days=RELATED_CLAIMS_WINDOW_DAYS)
+    groups = await db.claims.aggregate([
+        {"$match": {"author_handle": {"$in": handles}, "created_at": {"$gte": since}}},
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": "$author_handle", "claims": {"$push": {
+            "content": "$content",
+            "risk_level": "$risk_level",
+            "risk_factors": "$risk_factors",
+            "viral_score": "$viral_score",
+            "created_at": "$created_at"
+        }}}},
+        {"$project": {"claims": {"$slice": ["$claims", RELATED_CLAIMS_PER_AUTHOR]}}}
+    ]).to_list(len(handles))
+    flagged = {}
+    for group in groups:
+        for claim in group["claims"]:
+            claim["created_at"] = claim["created_at"].isoformat()
+        flagged[group["_id"]] = group["claims"]
+    return flagged
+
+def is_flagged(request: NetworkAnalysisRequest, risk_level: str, risk_assessment: Dict[str, Any]) -> bool:
+    """Whether a post is kept as flagged content for related-claim lookups"""
+    return bool(request.content) and (risk_level in ("high", "critical") or bool(risk_assessment["risk_factors"]))
+
+def flagged_content_document(handle: str, request: NetworkAnalysisRequest, risk_level: str,
+                             risk_assessment: Dict[str, Any], viral_score: float) -> dict:
+    """claims collection document for a flagged post"""
+    return {
+        "author_handle": handle,
+        "content": request.content[:1000],
+        "hashtags": request.hashtags or [],
+        "platform": request.platform,
+        "risk_level": risk_level,
+        "risk_factors": risk_assessment["risk_factors"],
+        "viral_score": viral_score,
+        "created_at": datetime.utcnow()
+    }
+
+async def record_flagged_content(documents: List[dict]):
+    """Store flagged posts for related-claim lookups"""
+    try:
+        await db.claims.insert_many(documents, ordered=False)
+    except Exception as e:
+        print(f"Error recording {len(documents)} flagged posts: {e}")
+
 def extract_keywords(text: str) -> List[str]:
     """Extract keywords from text for news search"""
     # Simple keyword extraction (could be enhanced with NLP)
@@ -776,6 +1442,10 @@ async def startup_event():
     """Initialize MongoDB connection and register agent"""
     global mongo_client, db
     
+    # Coordination detection and news prefetching need no database
+    coordination_detector.start()
+    news_prefetcher.start()
+    
     try:
         # Initialize MongoDB connection
         mongo_client = AsyncIOMotorClient(MONGO_URI)
@@ -788,6 +1458,13 @@ async def startup_event():
         # Create indexes for better performance
         await create_indexes()
         
+        # Build the in-memory graph used for network metrics
+        await load_connection_graph()
+        centrality_job.start()
+        
+        # Start flushing buffered author updates
+        author_updates.start()
+        
     except Exception as e:
         print(f"❌ Failed to connect to MongoDB: {e}")
         print("   Network analysis will work with limited functionality")
@@ -833,6 +1510,10 @@ async def create_indexes():
         await db.connections.create_index("source")
         await db.connections.create_index("target")
         await db.connections.create_index("weight")
+        await db.connections.create_index("last_interaction")
+        
+        # Flagged posts per author, newest first
+        await db.claims.create_index([("author_handle", 1), ("created_at", -1)])
         
         # Index for viral patterns
         await db.viral_patterns.create_index("pattern")
@@ -848,6 +1529,15 @@ async def shutdown_event():
     """Clean up MongoDB connection on shutdown"""
     global mongo_client
     
+    # Write out buffered author updates before the connection goes away
+    centrality_job.stop()
+    coordination_detector.stop()
+    news_prefetcher.stop()
+    await author_updates.stop()
+    
+    if news_client is not None:
+        await news_client.aclose()
+    
     if mongo_client:
         mongo_client.close()
         print("✅ MongoDB connection closed")
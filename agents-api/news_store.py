@@ -0,0 +1,191 @@
+"""
+CivicShield News Store
+Local corpus of news articles for claim verification. Articles are
+deduplicated by URL and BM25-indexed over title and body with the same
+inverted index the agents API uses for claims; a background prefetcher keeps
+it filled with articles for trending keywords and JSONL drops, so
+verification rarely has to wait on NewsAPI
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from search_index import InvertedIndex
+
+
+def normalize_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """Article in the /search/news shape, from either a raw NewsAPI.ai result or an already normalized one"""
+    source = article.get("source", "Unknown")
+    if isinstance(source, dict):
+        source = source.get("title", "Unknown")
+    return {
+        "title": article.get("title", "") or "",
+        "body": (article.get("body", "") or "")[:500],  # First 500 chars
+        "url": article.get("url", "") or "",
+        "source": source or "Unknown",
+        "published_date": article.get("published_date") or article.get("dateTime", ""),
+        "relevance": article.get("relevance", article.get("rel", 0)),
+        "sentiment": article.get("sentiment", 0),
+        "language": article.get("language") or article.get("lang", "en")
+    }
+
+
+class NewsStore:
+    """Deduplicated, BM25-searchable article corpus with age and size bounds"""
+
+    def __init__(self, retention_seconds: float = 7 * 86400, max_documents: int = 200000):
+        self.index = InvertedIndex(retention_seconds=retention_seconds, max_documents=max_documents)
+        self.max_documents = max_documents
+        self.doc_ids: Dict[str, int] = {}  # url (or title) -> index document id
+        self.added = 0
+        self.duplicates = 0
+        self.searches = 0
+
+    def __len__(self) -> int:
+        return len(self.index.documents)
+
+    def add(self, article: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Index a normalized article unless it is already stored; returns whether it was added"""
+        key = article.get("url") or article.get("title")
+        if not key:
+            return False
+        doc_id = self.doc_ids.get(key)
+        if doc_id is not None and doc_id in self.index.documents:
+            self.duplicates += 1
+            return False
+        # The title is indexed twice so title matches outrank passing mentions in the body
+        self.doc_ids[key] = self.index.add(
+            f"{article['title']} {article['body']}", article, extra_terms=[article["title"]], now=now
+        )
+        self.added += 1
+        if len(self.doc_ids) > 2 * self.max_documents:
+            self.doc_ids = {key: doc_id for key, doc_id in self.doc_ids.items() if doc_id in self.index.documents}
+        return True
+
+    def add_many(self, articles: List[Dict[str, Any]], now: Optional[float] = None) -> int:
+        return sum(self.add(article, now) for article in articles)
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Stored articles matching query, best BM25 score first, with the score as relevance"""
+        self.searches += 1
+        return [
+            {**result["document"], "relevance": result["score"]}
+            for result in self.index.search(query, limit=limit)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.index.stats(),
+            "added": self.added,
+            "duplicates": self.duplicates,
+            "searches": self.searches
+        }
+
+
+class NewsPrefetcher:
+    """Fills a NewsStore from JSONL drops and NewsAPI searches for trending keywords"""
+
+    def __init__(self, store: NewsStore, fetch: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+                 interval_seconds: float = 900, max_keywords: int = 10, seed_keywords: Optional[List[str]] = None,
+                 drop_path: Optional[str] = None):
+        self.store = store
+        self.fetch = fetch
+        self.interval_seconds = interval_seconds
+        self.max_keywords = max_keywords
+        self.seed_keywords = seed_keywords or []
+        self.drop_path = drop_path
+        self.drop_offset = 0
+        self.keyword_counts: Counter = Counter()
+        self.runs = 0
+        self.fetched = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_keywords: List[str] = []
+        self.last_run = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def note(self, keywords: List[str]):
+        """Count keywords seen in claims and posts towards the trending set"""
+        self.keyword_counts.update(keyword.lower().lstrip("#") for keyword in keywords if keyword)
+
+    def trending(self) -> List[str]:
+        trending = [keyword for keyword, _ in self.keyword_counts.most_common(self.max_keywords)]
+        return list(dict.fromkeys(self.seed_keywords + trending))[:max(self.max_keywords, len(self.seed_keywords))]
+
+    def read_drop(self) -> List[Dict[str, Any]]:
+        """Articles appended to the JSONL drop file since the last read"""
+        if not self.drop_path or not os.path.exists(self.drop_path):
+            return []
+        if os.path.getsize(self.drop_path) < self.drop_offset:
+            self.drop_offset = 0  # File was replaced; read it again from the start
+        articles = []
+        with open(self.drop_path, "r", encoding="utf-8") as drop:
+            drop.seek(self.drop_offset)
+            while True:
+                line = drop.readline()
+                if not line.endswith("\n"):
+                    break  # Stop before a line that is still being written
+                self.drop_offset = drop.tell()
+                try:
+                    articles.append(normalize_article(json.loads(line)))
+                except (ValueError, AttributeError):
+                    continue
+        return articles
+
+    async def load_drop(self) -> int:
+        """Index new drop-file articles; the file is read off the event loop"""
+        return self.store.add_many(await asyncio.to_thread(self.read_drop))
+
+    async def run_once(self):
+        """Load the drop file, then fetch articles for each trending keyword"""
+        self.dropped += await self.load_drop()
+        keywords = self.trending()
+        for keyword in keywords:
+            try:
+                articles = await self.fetch(keyword)
+            except Exception as e:
+                # Most likely rate-limited; the rest of the keywords wait for the next run
+                self.failures += 1
+                print(f"Error prefetching news for '{keyword}': {e}")
+                break
+            self.fetched += self.store.add_many(articles)
+
+        # Decay counts so keywords stop trending once they go quiet
+        self.keyword_counts = Counter({
+            keyword: count // 2 for keyword, count in self.keyword_counts.items() if count > 1
+        })
+        self.last_keywords = keywords
+        self.last_run = time.time()
+        self.runs += 1
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Error prefetching news: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "last_run": self.last_run,
+            "last_keywords": self.last_keywords,
+            "articles_fetched": self.fetched,
+            "articles_dropped": self.dropped,
+            "failures": self.failures,
+            "tracked_keywords": len(self.keyword_counts)
+        }
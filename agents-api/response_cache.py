@@ -0,0 +1,103 @@
+"""
+CivicShield Response Cache
+Bounded LRU cache for slow upstream lookups such as NewsAPI searches.
+Entries are fresh for a TTL and then served stale for a while longer while a
+single background refresh runs; concurrent misses for the same key share
+one upstream call instead of each making their own
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class ResponseCache:
+    """LRU + TTL cache with single-flight loads and stale-while-revalidate"""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300, stale_seconds: float = 1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()  # key -> (fresh_until, stale_until, value)
+        self.in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Cached value for key, loading it with fetch on a miss; returns (value, "hit"|"stale"|"miss")"""
+        now = time.monotonic()
+        entry = self.entries.get(key)
+        if entry is not None and now < entry[1]:
+            self.entries.move_to_end(key)
+            if now < entry[0]:
+                self.hits += 1
+                return entry[2], "hit"
+            # Serve the stale copy now and refresh it once in the background
+            self.stale_hits += 1
+            if key not in self.in_flight:
+                self.refreshes += 1
+                self._start(key, fetch).add_done_callback(self._refresh_done)
+            return entry[2], "stale"
+
+        self.misses += 1
+        task = self.in_flight.get(key)
+        if task is None:
+            task = self._start(key, fetch)
+        else:
+            self.coalesced += 1
+        # A caller that goes away must not cancel the load the other callers are waiting on
+        return await asyncio.shield(task), "miss"
+
+    def _start(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(self._load(key, fetch))
+        self.in_flight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+            now = time.monotonic()
+            self.entries[key] = (now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+            return value
+        finally:
+            self.in_flight.pop(key, None)
+
+    def _refresh_done(self, task: asyncio.Task):
+        # Failed refreshes keep the stale copy; nobody awaits this task, so consume its error here
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_failures += 1
+            print(f"Error refreshing cached response: {task.exception()!r}")
+
+    def invalidate(self, key: Hashable):
+        self.entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "stale_seconds": self.stale_seconds,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,297 @@
+"""
+CivicShield Search Index
+Time-windowed in-memory inverted index with BM25 ranking. Documents are
+grouped into time segments, which also roll over once they hold a fraction
+of max_documents; each segment keeps its postings as delta/varint encoded
+byte strings, and whole segments are dropped once they age out of the
+retention window or the index is full, so eviction never has to touch
+individual postings. Sealed segments never change, so their decoded postings
+are kept in a bounded LRU and queries are scored with numpy per segment
+"""
+
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOP_WORDS = {
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did",
+    "will", "would", "should", "could", "can", "may", "might", "this", "that", "it", "its"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stop words or single characters"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOP_WORDS]
+
+
+def encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings_arrays(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode (doc_id delta, term frequency) varint pairs into doc id and tf arrays, without a Python loop"""
+    raw = np.frombuffer(bytes(data), dtype=np.uint8)
+    if not len(raw):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(raw < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Each byte carries 7 bits, shifted by its position within its varint
+    shifts = (np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)) * 7
+    values = np.bitwise_or.reduceat((raw & 0x7F).astype(np.int64) << shifts, starts)
+    return np.cumsum(values[0::2]), values[1::2]
+
+
+def decode_postings(data: bytes) -> List[Tuple[int, int]]:
+    """Decode (doc_id delta, term frequency) varint pairs back into (doc_id, tf)"""
+    doc_ids, counts = decode_postings_arrays(data)
+    return list(zip(doc_ids.tolist(), counts.tolist()))
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """Split a query into OR-ed clauses of AND-ed terms ("a b OR c" -> [[a, b], [c]])"""
+    clauses = []
+    for part in re.split(r"\s+OR\s+", query.strip()):
+        terms = tokenize(re.sub(r"\bAND\b", " ", part))
+        if terms:
+            clauses.append(terms)
+    return clauses
+
+
+class Segment:
+    """Documents indexed during one time slice; their ids are consecutive from first_id"""
+
+    def __init__(self, start: float, first_id: int):
+        self.start = start
+        self.first_id = first_id
+        self.count = 0
+        self.sealed = False
+        self.postings: Dict[str, bytearray] = {}
+        self.last_doc: Dict[str, int] = {}
+        self.doc_freq: Dict[str, int] = {}
+        # Per-document length and index time, by doc_id - first_id
+        self.lengths = np.zeros(64, dtype=np.float64)
+        self.times = np.zeros(64, dtype=np.float64)
+        self.cached_terms: Set[str] = set()
+
+    @property
+    def doc_ids(self) -> range:
+        return range(self.first_id, self.first_id + self.count)
+
+    def add(self, doc_id: int, term_counts: Dict[str, int], length: int, now: float):
+        if self.count == len(self.lengths):
+            self.lengths = np.concatenate([self.lengths, np.zeros(self.count, dtype=np.float64)])
+            self.times = np.concatenate([self.times, np.zeros(self.count, dtype=np.float64)])
+        self.lengths[self.count] = length
+        self.times[self.count] = now
+        self.count += 1
+        for term, count in term_counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = bytearray()
+            encode_varint(doc_id - self.last_doc.get(term, 0), postings)
+            encode_varint(count, postings)
+            self.last_doc[term] = doc_id
+            self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+
+    def seal(self):
+        """Freeze the segment once a newer one takes the writes"""
+        self.postings = {term: bytes(data) for term, data in self.postings.items()}
+        self.last_doc = {}
+        self.lengths = self.lengths[:self.count].copy()
+        self.times = self.times[:self.count].copy()
+        self.sealed = True
+
+    def lookup(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        return decode_postings_arrays(self.postings.get(term, b""))
+
+
+class InvertedIndex:
+    """Bounded, age-evicted inverted index ranked with BM25"""
+
+    def __init__(self, retention_seconds: float = 48 * 3600, segment_seconds: float = 3600,
+                 max_documents: int = 500000, segment_documents: Optional[int] = None,
+                 max_cached_postings: int = 2000000, k1: float = 1.2, b: float = 0.75):
+        self.retention_seconds = retention_seconds
+        self.segment_seconds = segment_seconds
+        self.max_documents = max_documents
+        # Small segments keep max_documents enforceable even within one busy time slice
+        self.segment_documents = max(1, min(segment_documents or max_documents // 16, max_documents))
+        self.max_cached_postings = max_cached_postings
+        self.k1 = k1
+        self.b = b
+        self.segments: deque = deque()
+        self.documents: Dict[int, Tuple[float, int, Any]] = {}  # doc_id -> (indexed_at, length, payload)
+        self.doc_freq: Dict[str, int] = {}
+        self.total_length = 0
+        self.next_id = 1
+        # Decoded postings of sealed segments, least recently used first: (first_id, term) -> (doc_ids, tfs)
+        self.decoded: OrderedDict = OrderedDict()
+        self.cached_postings = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _evict(self, now: float):
+        """Drop whole segments that aged out, or the oldest ones beyond max_documents"""
+        cutoff = now - self.retention_seconds
+        while self.segments and (
+            self.segments[0].start + self.segment_seconds <= cutoff
+            or (len(self.documents) > self.max_documents and len(self.segments) > 1)
+        ):
+            segment = self.segments.popleft()
+            for term, count in segment.doc_freq.items():
+                remaining = self.doc_freq[term] - count
+                if remaining:
+                    self.doc_freq[term] = remaining
+                else:
+                    del self.doc_freq[term]
+            for term in segment.cached_terms:
+                doc_ids, _ = self.decoded.pop((segment.first_id, term))
+                self.cached_postings -= len(doc_ids)
+            for doc_id in segment.doc_ids:
+                self.total_length -= self.documents.pop(doc_id)[1]
+
+    def _postings(self, segment: Segment, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """A segment's postings for term; sealed segments never change, so theirs are decoded once and cached"""
+        if not segment.sealed:
+            return segment.lookup(term)
+        key = (segment.first_id, term)
+        postings = self.decoded.get(key)
+        if postings is not None:
+            self.cache_hits += 1
+            self.decoded.move_to_end(key)
+            return postings
+        self.cache_misses += 1
+        postings = segment.lookup(term)
+        self.decoded[key] = postings
+        segment.cached_terms.add(term)
+        self.cached_postings += len(postings[0])
+        while self.cached_postings > self.max_cached_postings and len(self.decoded) > 1:
+            (first_id, old_term), (doc_ids, _) = self.decoded.popitem(last=False)
+            self.cached_postings -= len(doc_ids)
+            for cached in self.segments:
+                if cached.first_id == first_id:
+                    cached.cached_terms.discard(old_term)
+                    break
+        return postings
+
+    def add(self, text: str, payload: Any, extra_terms: Optional[List[str]] = None,
+            now: Optional[float] = None) -> int:
+        """Index text (plus optional extra terms such as tags) and return the document id"""
+        now = now if now is not None else time.time()
+        tokens = tokenize(text)
+        if extra_terms:
+            tokens.extend(tokenize(" ".join(extra_terms)))
+
+        term_counts: Dict[str, int] = {}
+        for token in tokens:
+            term_counts[token] = term_counts.get(token, 0) + 1
+
+        doc_id = self.next_id
+        self.next_id += 1
+        if (not self.segments or now >= self.segments[-1].start + self.segment_seconds
+                or self.segments[-1].count >= self.segment_documents):
+            if self.segments:
+                self.segments[-1].seal()
+            self.segments.append(Segment(now - now % self.segment_seconds, doc_id))
+
+        self.segments[-1].add(doc_id, term_counts, len(tokens), now)
+        self.documents[doc_id] = (now, len(tokens), payload)
+        self.total_length += len(tokens)
+        for term in term_counts:
+            self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+
+        self._evict(now)
+        return doc_id
+
+    def search(self, query: str, limit: int = 20, window_seconds: Optional[float] = None,
+               now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """BM25-ranked documents matching any clause of the query"""
+        now = now if now is not None else time.time()
+        self._evict(now)
+        clauses = parse_query(query)
+        if not clauses or not self.documents:
+            return []
+
+        since = now - window_seconds if window_seconds else None
+        terms = {term for clause in clauses for term in clause}
+        doc_count = len(self.documents)
+        avg_length = self.total_length / doc_count if doc_count else 0
+        idf = {
+            term: math.log(1 + (doc_count - self.doc_freq.get(term, 0) + 0.5) / (self.doc_freq.get(term, 0) + 0.5))
+            for term in terms
+        }
+
+        # A document lives in exactly one segment, so clauses and scores are evaluated per segment
+        found_scores, found_times, found_ids = [], [], []
+        for segment in self.segments:
+            if since is not None and segment.start + self.segment_seconds <= since:
+                continue
+            # Dense per-document term frequencies over the segment's contiguous id range
+            postings = {term: self._postings(segment, term) for term in terms}
+            if not any(len(doc_ids) for doc_ids, _ in postings.values()):
+                continue
+            frequencies = {}
+            for term, (doc_ids, counts) in postings.items():
+                frequencies[term] = np.zeros(segment.count, dtype=np.float64)
+                frequencies[term][doc_ids - segment.first_id] = counts
+            matched = np.zeros(segment.count, dtype=bool)
+            for clause in clauses:
+                clause_docs = frequencies[clause[0]] > 0
+                for term in clause[1:]:
+                    clause_docs &= frequencies[term] > 0
+                matched |= clause_docs
+            if since is not None:
+                matched &= segment.times[:segment.count] >= since
+            offsets = np.flatnonzero(matched)
+            if not len(offsets):
+                continue
+
+            times = segment.times[offsets]
+            lengths = segment.lengths[offsets]
+            norm = self.k1 * (1 - self.b + self.b * lengths / avg_length) if avg_length else self.k1
+            scores = np.zeros(len(offsets))
+            for term in terms:
+                tf = frequencies[term][offsets]
+                scores += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            found_scores.append(scores)
+            found_times.append(times)
+            found_ids.append(offsets + segment.first_id)
+
+        if not found_ids:
+            return []
+        scores = np.concatenate(found_scores)
+        times = np.concatenate(found_times)
+        doc_ids = np.concatenate(found_ids)
+        if len(scores) > limit:
+            # Only documents scoring at least the limit-th best can make the page
+            threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            best = scores >= threshold
+            scores, times, doc_ids = scores[best], times[best], doc_ids[best]
+        order = np.lexsort((times, scores))[::-1][:limit]
+        return [
+            {"score": round(float(scores[i]), 4), "indexed_at": float(times[i]),
+             "document": self.documents[int(doc_ids[i])][2]}
+            for i in order
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self.documents),
+            "terms": len(self.doc_freq),
+            "segments": len(self.segments),
+            "postings_bytes": sum(len(data) for segment in self.segments for data in segment.postings.values()),
+            "cached_postings": self.cached_postings,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses
+        }
@@ -0,0 +1,81 @@
+"""
+Tests for the incremental agent aggregates
+"""
+
+import time
+from types import SimpleNamespace
+
+import msgpack
+from fastapi.testclient import TestClient
+
+import main
+from agent_stats import AgentAggregates, RateWindow
+
+
+def agent(status="active", processed=0, errors=0, agent_type="twitter_monitor"):
+    return SimpleNamespace(status=status, processed_items=processed, error_count=errors, agent_type=agent_type)
+
+
+def test_rate_window_drops_counts_older_than_the_window():
+    window = RateWindow(window_seconds=10)
+    start = int(time.time()) + 1
+    window.add(5, now=start)
+    window.add(3, now=start + 5)
+    assert window.count(now=start + 9) == 8
+    assert window.count(now=start + 10) == 3
+    assert window.count(now=start + 30) == 0
+
+
+def test_rate_window_per_minute_scales_to_the_window():
+    window = RateWindow(window_seconds=30)
+    start = int(time.time()) + 1
+    window.add(15, now=start)
+    assert window.per_minute(now=start + 1) == 30
+
+
+def test_replace_moves_totals_and_records_processed_delta():
+    aggregates = AgentAggregates()
+    first = agent(status="active", processed=10, errors=1)
+    aggregates.add(first)
+    second = agent(status="error", processed=25, errors=3)
+    aggregates.replace(first, second)
+
+    assert aggregates.total == 1
+    assert aggregates.count("active") == 0
+    assert aggregates.count("error") == 1
+    assert aggregates.total_processed == 25
+    assert aggregates.total_errors == 3
+    assert aggregates.processed_rates["twitter_monitor"].count() == 15
+    assert aggregates.items_per_minute() == {}
+
+
+def test_change_status_matches_a_full_recount():
+    aggregates = AgentAggregates()
+    for status in ["active", "active", "idle"]:
+        aggregates.add(agent(status=status))
+    aggregates.change_status("active", "offline")
+    aggregates.change_status("idle", "idle")
+    assert dict(aggregates.by_status) == {"active": 1, "idle": 1, "offline": 1}
+
+
+def test_submissions_feed_the_items_per_minute_rate(monkeypatch):
+    monkeypatch.setattr(main, "forward_claim_batch", lambda claims: None)
+    monkeypatch.setattr(main, "forward_claim", lambda claim: None)
+    monkeypatch.setattr(main, "agent_aggregates", AgentAggregates())
+    monkeypatch.setitem(main.agent_statuses, "monitor-1", main.AgentStatus(
+        agent_id="monitor-1", agent_type="twitter_monitor", status="active", last_activity="2024-01-01T00:00:00"
+    ))
+    client = TestClient(main.app)
+
+    claims = [{"text": f"claim {i}", "platform": "twitter"} for i in range(3)]
+    client.post("/submit/batch/claims", json=claims, headers={"X-Agent-ID": "monitor-1"})
+    client.post("/submit/claim", json=claims[0], headers={"X-Agent-ID": "monitor-1"})
+    client.post("/submit/claim", json=claims[1])
+    with client.websocket_connect("/ws/agent/monitor-1") as websocket:
+        websocket.send_bytes(msgpack.packb({"seq": 1, "reset": True, "ack": True, "claims": claims[:2]}))
+        websocket.receive_bytes()
+
+    rates = main.agent_aggregates.rates
+    assert rates["twitter_monitor"].count() == 6
+    assert rates["unidentified"].count() == 1
+    assert main.agent_aggregates.items_per_minute()["twitter_monitor"] == 6 * 60 / main.RATE_WINDOW_SECONDS
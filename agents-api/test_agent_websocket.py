@@ -0,0 +1,123 @@
+"""
+Tests for binary submission frames on the agent WebSocket
+"""
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def forwarded(monkeypatch):
+    batches = []
+    monkeypatch.setattr(main, "forward_claim_batch", lambda claims: batches.append(claims))
+    monkeypatch.setattr(main, "publish_claim", lambda claim: None)
+    main.agent_sequences.entries.clear()
+    return batches
+
+
+def claim(text):
+    return {"text": text, "platform": "twitter"}
+
+
+def send(websocket, frame):
+    websocket.send_bytes(msgpack.packb({**frame, "ack": True}))
+    return msgpack.unpackb(websocket.receive_bytes(), raw=False)
+
+
+def test_frames_resent_after_reconnect_are_not_forwarded_twice(forwarded):
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-test") as websocket:
+        for seq in (1, 2, 3):
+            send(websocket, {"seq": seq, "claims": [claim(f"claim {seq}")]})
+
+    with client.websocket_connect("/ws/agent/ws-test") as websocket:
+        ack = send(websocket, {"seq": 3, "claims": [claim("claim 3")]})
+        assert ack["seq"] == 3
+        send(websocket, {"seq": 4, "claims": [claim("claim 4")]})
+
+    assert [batch[0]["text"] for batch in forwarded] == ["claim 1", "claim 2", "claim 3", "claim 4"]
+
+
+def test_reset_starts_a_new_sequence(forwarded):
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-reset") as websocket:
+        send(websocket, {"seq": 5, "claims": [claim("before restart")]})
+        ack = send(websocket, {"seq": 1, "reset": True, "claims": [claim("after restart")]})
+    assert ack["seq"] == 1
+    assert len(forwarded) == 2
+
+
+def test_frame_with_non_list_items_is_rejected_without_closing(forwarded):
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-bad") as websocket:
+        ack = send(websocket, {"seq": 1, "claims": {"text": "not a list"}})
+        assert ack["rejected"][0]["kind"] == "frame"
+        ack = send(websocket, {"seq": 2, "claims": [claim("still connected")]})
+        assert ack["accepted"] == 1
+
+
+def test_claims_per_frame_are_capped_like_the_rest_batch(forwarded):
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-cap") as websocket:
+        ack = send(websocket, {"seq": 1, "claims": [claim(f"c{i}") for i in range(main.MAX_BATCH_CLAIMS + 1)]})
+    assert ack["accepted"] == 0
+    assert "claims" in ack["rejected"][0]["error"]
+    assert forwarded == []
+
+
+def test_restart_without_reset_is_rejected_not_acknowledged(forwarded, monkeypatch):
+    monkeypatch.setattr(main, "WS_REPLAY_WINDOW", 3)
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-restart") as websocket:
+        for seq in range(1, 6):
+            send(websocket, {"seq": seq, "claims": [claim(f"claim {seq}")]})
+
+    with client.websocket_connect("/ws/agent/ws-restart") as websocket:
+        reply = send(websocket, {"seq": 1, "claims": [claim("after silent restart")]})
+        assert reply["type"] == "error"
+        assert reply["code"] == "sequence_regressed"
+        assert reply["last_seq"] == 5
+    assert [batch[0]["text"] for batch in forwarded][-1] == "claim 5"
+
+
+def test_new_session_starts_a_new_sequence(forwarded):
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-session") as websocket:
+        send(websocket, {"seq": 7, "session": "boot-1", "claims": [claim("first boot")]})
+    with client.websocket_connect("/ws/agent/ws-session") as websocket:
+        ack = send(websocket, {"seq": 1, "session": "boot-2", "claims": [claim("second boot")]})
+        assert ack["seq"] == 1 and ack["accepted"] == 1
+        # Same session again: a replay, acknowledged but not forwarded
+        ack = send(websocket, {"seq": 1, "session": "boot-2", "claims": [claim("second boot")]})
+        assert ack["accepted"] == 0
+    assert [batch[0]["text"] for batch in forwarded] == ["first boot", "second boot"]
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    agent = main.AgentStatus(agent_id="ws-status", agent_type="twitter_monitor", status="active",
+                             last_activity="2024-01-01T00:00:00")
+    monkeypatch.setitem(main.agent_statuses, "ws-status", agent)
+    monkeypatch.setattr(main, "agent_aggregates", main.AgentAggregates())
+    main.agent_aggregates.add(agent)
+    return agent
+
+
+def test_status_updates_are_validated_and_acknowledged_cumulatively(forwarded, registered):
+    client = TestClient(main.app)
+    with client.websocket_connect("/ws/agent/ws-status") as websocket:
+        websocket.send_json({"type": "status_update", "status": "idle", "processed_items": 12})
+        websocket.send_json({"type": "status_update", "status": "sleeping"})
+        ack = msgpack.unpackb(websocket.receive_bytes(), raw=False)
+        assert ack["type"] == "ack"
+        assert ack["status_updates"] == 1
+        assert ack["rejected"][0]["kind"] == "status"
+        assert main.agent_statuses["ws-status"].status == "idle"
+        assert main.agent_statuses["ws-status"].processed_items == 12
+
+        ack = send(websocket, {"seq": 1, "reset": True, "status": {"status": "active"}, "claims": [claim("x")]})
+        assert ack["accepted"] == 1 and ack["status_updates"] == 1
+        assert main.agent_aggregates.count("active") == 1
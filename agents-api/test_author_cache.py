@@ -0,0 +1,43 @@
+"""
+Tests for the network analyzer author cache
+"""
+
+from author_cache import AuthorCache, apply_update
+
+
+def test_apply_update_matches_mongodb_operators():
+    document = {"total_posts": 2, "followers_estimate": 50}
+    apply_update(document, {
+        "$inc": {"total_posts": 1, "total_mentions": 3},
+        "$max": {"followers_estimate": 40, "peak": 7},
+        "$set": {"credibility_score": 0.4}
+    })
+    assert document == {"total_posts": 3, "total_mentions": 3, "followers_estimate": 50, "peak": 7, "credibility_score": 0.4}
+
+
+def test_least_recently_used_author_is_evicted():
+    cache = AuthorCache(max_entries=2)
+    cache.put("a", {"handle": "a"})
+    cache.put("b", {"handle": "b"})
+    cache.get("a")
+    cache.put("c", {"handle": "c"})
+    assert "a" in cache and "c" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_authors_are_dropped():
+    cache = AuthorCache(ttl_seconds=0)
+    cache.put("a", {"handle": "a"})
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_updates_write_through_only_to_cached_authors():
+    cache = AuthorCache()
+    cache.put("a", {"handle": "a", "total_posts": 1})
+    cache.apply("a", {"$inc": {"total_posts": 1}})
+    cache.apply("missing", {"$inc": {"total_posts": 1}})
+    assert cache.get("a")["total_posts"] == 2
+    assert "missing" not in cache
+    assert cache.stats()["hits"] == 1
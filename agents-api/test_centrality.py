@@ -0,0 +1,115 @@
+"""
+Tests for PageRank, clustering coefficients and the centrality job
+"""
+
+import asyncio
+import itertools
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import network_analyzer
+from centrality import CentralityJob, clustering_coefficients, pagerank
+from graph_engine import CSRGraph
+
+
+def matrix_of(n, edges):
+    sources, targets = zip(*edges)
+    return sparse.csr_matrix((np.ones(len(edges)), (sources, targets)), shape=(n, n))
+
+
+def test_pagerank_of_a_cycle_is_uniform():
+    ranks, _ = pagerank(matrix_of(4, [(0, 1), (1, 2), (2, 3), (3, 0)]))
+    assert ranks == pytest.approx([0.25] * 4)
+
+
+def test_pagerank_favours_the_hub_of_an_inward_star():
+    ranks, _ = pagerank(matrix_of(4, [(1, 0), (2, 0), (3, 0)]))
+    assert ranks.sum() == pytest.approx(1.0)
+    # Leaves get the teleport and dangling share; solving the two equations gives 0.8875 / 1.6375
+    assert ranks[0] == pytest.approx(0.8875 / 1.6375, abs=1e-5)
+    assert ranks[1] == pytest.approx(ranks[3])
+
+
+def test_pagerank_warm_start_converges_faster():
+    matrix = matrix_of(5, [(0, 1), (1, 2), (2, 0), (3, 0), (4, 3)])
+    ranks, cold_iterations = pagerank(matrix)
+    warm, warm_iterations = pagerank(matrix, previous=ranks)
+    assert warm == pytest.approx(ranks, abs=1e-5)
+    assert warm_iterations < cold_iterations
+
+
+def test_clustering_of_known_graphs():
+    triangle = matrix_of(3, [(0, 1), (1, 2), (2, 0)])
+    assert clustering_coefficients(triangle).tolist() == [1.0, 1.0, 1.0]
+
+    star = matrix_of(4, [(0, 1), (0, 2), (0, 3)])
+    assert clustering_coefficients(star).tolist() == [0.0, 0.0, 0.0, 0.0]
+
+    # Square 0-1-2-3 with diagonal 0-2: nodes 0 and 2 close 2 of 3 neighbour pairs
+    square = matrix_of(4, [(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)])
+    assert clustering_coefficients(square) == pytest.approx([2 / 3, 1.0, 2 / 3, 1.0])
+
+
+def test_chunked_clustering_matches_brute_force():
+    rng = np.random.default_rng(7)
+    n = 40
+    edges = {(int(a), int(b)) for a, b in rng.integers(0, n, size=(200, 2)) if a != b}
+    matrix = matrix_of(n, sorted(edges))
+    neighbours = [set() for _ in range(n)]
+    for a, b in edges:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+    expected = []
+    for node in range(n):
+        pairs = list(itertools.combinations(neighbours[node], 2))
+        expected.append(sum(b in neighbours[a] for a, b in pairs) / len(pairs) if pairs else 0.0)
+
+    assert clustering_coefficients(matrix, chunk_entries=1) == pytest.approx(expected)
+    assert clustering_coefficients(matrix) == pytest.approx(expected)
+
+
+def test_job_writes_a_bounded_number_of_scores_per_check():
+    graph = CSRGraph()
+    graph.load([], [(f"user{i}", f"user{(i + 1) % 10}", 1.0) for i in range(10)])
+    writes = []
+
+    async def write(operations):
+        writes.append(len(operations))
+
+    job = CentralityJob(graph, write, write_batch_size=2, max_writes_per_check=4)
+
+    async def scenario():
+        await job.run_once()
+        assert writes == [2, 2]
+        assert job.stats()["pending_writes"] == 6
+        while len(job.pending_writes):
+            await job.write_pending()
+        await job.run_once()
+
+    asyncio.run(scenario())
+    assert sum(writes) == 10
+    assert job.scores("user3") == pytest.approx((1.0, 0.0))
+
+
+def test_relative_pagerank_is_one_for_every_author_of_a_cycle():
+    graph = CSRGraph()
+    graph.load([], [(f"user{i}", f"user{(i + 1) % 5}", 1.0) for i in range(5)])
+
+    async def write(operations):
+        pass
+
+    job = CentralityJob(graph, write)
+    asyncio.run(job.run_once())
+    # Normalized centrality still puts (tied) authors at 1.0; the relative score does not single anyone out
+    assert job.scores("user0") == pytest.approx((1.0, 0.0))
+    assert job.pagerank_scores("user0") == pytest.approx((0.2, 1.0))
+
+
+def test_only_prominent_authors_are_network_hubs():
+    request = network_analyzer.NetworkAnalysisRequest(authorHandle="someone", reachEstimate=10)
+    top_of_small_graph = {"handle": "someone", "network_centrality": 1.0, "relative_pagerank": 2.5}
+    assert "network_hub" not in network_analyzer.assess_risk_patterns(top_of_small_graph, request)["risk_factors"]
+    hub = {"handle": "someone", "network_centrality": 1.0, "relative_pagerank": 45.0}
+    assert "network_hub" in network_analyzer.assess_risk_patterns(hub, request)["risk_factors"]
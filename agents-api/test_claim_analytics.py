@@ -0,0 +1,48 @@
+"""
+Tests for the rolling claim aggregates
+"""
+
+from claim_analytics import ClaimAggregates, MinuteRing
+
+NOW = 1_700_000_000 - 1_700_000_000 % 60
+
+
+def claim(platform="twitter", category="evm", risk="high"):
+    return {"source": {"platform": platform}, "category": category, "riskLevel": risk}
+
+
+def test_ring_ignores_slots_left_over_from_an_earlier_lap():
+    ring = MinuteRing(horizon_minutes=5)
+    ring.add(100, 3)
+    ring.add(105)  # same slot, next lap
+    assert ring.series(105, 5, 1) == [0, 0, 0, 0, 1]
+
+
+def test_series_buckets_by_step():
+    ring = MinuteRing(horizon_minutes=60)
+    for minute in (10, 11, 12, 14):
+        ring.add(minute)
+    assert ring.series(14, 6, 3) == [2, 2]
+
+
+def test_query_groups_by_dimension_and_drops_empty_values():
+    aggregates = ClaimAggregates(horizon_minutes=60)
+    aggregates.record(claim("twitter"), now=NOW)
+    aggregates.record(claim("twitter"), now=NOW - 60)
+    aggregates.record(claim("telegram", risk=None), now=NOW - 600)
+
+    result = aggregates.query(window_minutes=5, group_by="platform", now=NOW)
+    assert result["totals"] == {"twitter": 2}
+    assert result["series"]["twitter"] == [0, 0, 0, 1, 1]
+
+    hour = aggregates.query(window_minutes=60, step_minutes=60, group_by="risk_level", now=NOW)
+    assert hour["totals"] == {"high": 2, "medium": 1}
+
+
+def test_query_clamps_the_window_to_the_horizon():
+    aggregates = ClaimAggregates(horizon_minutes=10)
+    aggregates.record(claim(), now=NOW)
+    result = aggregates.query(window_minutes=1000, step_minutes=0, now=NOW)
+    assert result["window_minutes"] == 10
+    assert result["step_minutes"] == 1
+    assert result["totals"] == {"all": 1}
@@ -0,0 +1,67 @@
+"""
+Tests for coordinated amplification detection
+"""
+
+import asyncio
+import random
+
+from coordination import CoordinationDetector, find_coordinated_clusters
+
+NOW = 1_700_000_000
+
+
+def synthetic_window(seed=1):
+    """Background accounts mentioning random targets, plus a ring of five sharing four targets"""
+    rng = random.Random(seed)
+    interactions = [(f"user{i}", f"target{rng.randrange(500)}") for i in range(200) for _ in range(3)]
+    ring = [f"ring{i}" for i in range(5)]
+    interactions += [(account, f"campaign{j}") for account in ring for j in range(4)]
+    # Everyone amplifies the viral post, which must not link them
+    interactions += [(f"user{i}", "viral") for i in range(200)] + [(account, "viral") for account in ring]
+    return interactions, ring
+
+
+def test_ring_in_a_noisy_window_is_the_only_cluster():
+    interactions, ring = synthetic_window()
+    accounts, targets = zip(*interactions)
+    clusters = find_coordinated_clusters(list(accounts), list(targets), max_target_accounts=100)
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert sorted(cluster["accounts"]) == ring
+    assert cluster["pair_density"] == 1.0
+    assert {target["target"] for target in cluster["shared_targets"]} == {f"campaign{j}" for j in range(4)}
+
+
+def test_pairs_below_min_shared_targets_are_ignored():
+    accounts = ["a", "b", "c"] * 2
+    targets = ["x"] * 3 + ["y"] * 3
+    assert find_coordinated_clusters(accounts, targets, min_shared_targets=3) == []
+    assert find_coordinated_clusters([], []) == []
+
+
+def test_detector_flags_ring_members_until_the_flag_expires():
+    interactions, ring = synthetic_window()
+    detector = CoordinationDetector(window_seconds=300, hop_seconds=60, max_target_accounts=100, flag_ttl_seconds=600)
+    for offset, (account, target) in enumerate(interactions):
+        detector.record(account, [target], now=NOW + offset % 120)
+
+    clusters = asyncio.run(detector.analyze_window(now=NOW + 120))
+    assert len(clusters) == 1
+    flag = detector.account_flag("ring0", now=NOW + 130)
+    assert flag["cluster_id"] == clusters[0]["cluster_id"]
+    assert detector.account_flag("user0", now=NOW + 130) is None
+    assert detector.account_flag("ring0", now=NOW + 800) is None
+
+    # Re-detecting the same accounts keeps the cluster id
+    again = asyncio.run(detector.analyze_window(now=NOW + 180))
+    assert again[0]["cluster_id"] == clusters[0]["cluster_id"]
+    assert detector.recent_clusters()[0]["accounts"] == ring
+
+
+def test_interactions_leave_the_window():
+    detector = CoordinationDetector(window_seconds=120, hop_seconds=60)
+    detector.record("a", ["x"], now=NOW)
+    detector.record("a", ["a"], now=NOW)  # self-mentions are ignored
+    asyncio.run(detector.analyze_window(now=NOW + 600))
+    assert detector.stats()["window_interactions"] == 0
+    assert detector.stats()["interactions"] == 1
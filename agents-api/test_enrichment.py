@@ -0,0 +1,103 @@
+"""
+Tests for claim enrichment and its media fetch guards
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import main
+from enrichment import ClaimEnricher, check_public_url, escalate, merge_enrichment
+
+PUBLIC = "http://93.184.216.34"
+
+
+def enricher_with(handler, **kwargs) -> ClaimEnricher:
+    enricher = ClaimEnricher("http://text", "http://network", "http://deepfake", **kwargs)
+    enricher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return enricher
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "gopher://93.184.216.34/",
+    "http://127.0.0.1/admin",
+    "http://10.0.0.5/",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/",
+    "http://[::ffff:127.0.0.1]/"
+])
+def test_non_public_media_urls_are_rejected(url):
+    with pytest.raises(ValueError):
+        asyncio.run(check_public_url(url))
+
+
+def test_public_media_url_is_allowed():
+    asyncio.run(check_public_url(f"{PUBLIC}/image.jpg"))
+
+
+def test_redirects_are_checked_again():
+    def handler(request):
+        return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data/"})
+
+    with pytest.raises(ValueError, match="non-public"):
+        asyncio.run(enricher_with(handler).fetch_media(f"{PUBLIC}/image.jpg"))
+
+
+def test_public_redirect_is_followed():
+    def handler(request):
+        if request.url.path == "/old.jpg":
+            return httpx.Response(301, headers={"location": "/new.jpg"})
+        return httpx.Response(200, content=b"jpeg", headers={"content-type": "image/jpeg"})
+
+    assert asyncio.run(enricher_with(handler).fetch_media(f"{PUBLIC}/old.jpg")) == (b"jpeg", "image/jpeg")
+
+
+def test_oversized_media_is_abandoned():
+    def handler(request):
+        return httpx.Response(200, content=b"x" * 2048)
+
+    with pytest.raises(ValueError, match="exceeds"):
+        asyncio.run(enricher_with(handler, media_max_bytes=1024).fetch_media(f"{PUBLIC}/big.mp4"))
+
+
+def test_network_branch_uses_the_read_only_lookup():
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.path))
+        return httpx.Response(404)
+
+    claim = {"text": "t", "source": {"author": "@someone"}}
+    assert asyncio.run(enricher_with(handler).analyze_network(claim)) == {"known": False}
+    assert seen == [("GET", "/network/authors/someone")]
+
+
+def test_merge_escalates_to_the_highest_reported_risk():
+    claim = {"text": "t", "riskLevel": "low", "source": {}}
+    text = {"status": "ok", "result": {"label": "fake", "confidence": 0.9}}
+    network = {"status": "ok", "result": {"riskLevel": "medium", "credibilityScore": 0.6}}
+    deepfake = {"status": "timeout"}
+    enriched = merge_enrichment(claim, text, network, deepfake)
+    assert enriched["riskLevel"] == "high"
+    assert enriched["enrichment"]["network"]["author_credibility"] == 0.6
+    assert enriched["enrichment"]["deepfake"] == {"status": "timeout"}
+    assert claim["riskLevel"] == "low"
+    assert escalate("critical", "low") == "critical"
+
+
+def test_gateway_publishes_claims_after_enrichment(monkeypatch):
+    published, queued = [], []
+
+    async def enrich(claim_data):
+        return {**claim_data, "riskLevel": "critical"}
+
+    monkeypatch.setattr(main.enricher, "enrich", enrich)
+    monkeypatch.setattr(main, "publish_claim", lambda claim_data: published.append(claim_data["riskLevel"]))
+    monkeypatch.setattr(main, "queue_claim_batch", lambda claims: queued.extend(claims))
+    claim_data = main.build_claim_data(main.ClaimSubmission(text="t", platform="twitter", risk_level="low"))
+
+    asyncio.run(main.enrich_and_forward("/api/claims/batch", [claim_data]))
+    assert published == ["critical"]
+    assert "media" not in queued[0]
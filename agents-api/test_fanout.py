@@ -0,0 +1,61 @@
+"""
+Tests for live event fan-out to dashboard subscribers
+"""
+
+import asyncio
+
+from fanout import EventFilter, FanoutHub
+
+
+def test_filters_match_regardless_of_case():
+    hub = FanoutHub()
+    subscriber = hub.subscribe(EventFilter.from_params(types="alert", platform="Twitter", severity="HIGH"))
+    hub.publish("alert", {"id": 1}, severity="high", platform="twitter")
+    hub.publish("alert", {"id": 2}, severity="High", platform="TWITTER")
+    hub.publish("alert", {"id": 3}, severity="high", platform="telegram")
+    hub.publish("claim", {"id": 4}, severity="high", platform="twitter")
+    assert [event["data"]["id"] for event in subscriber.buffer] == [1, 2]
+
+
+def test_slow_subscriber_drops_its_oldest_events():
+    hub = FanoutHub(buffer_size=3)
+    slow = hub.subscribe(EventFilter())
+    for index in range(5):
+        hub.publish("claim", {"id": index})
+    assert [event["data"]["id"] for event in slow.buffer] == [2, 3, 4]
+    assert hub.stats()["dropped"] == 2
+
+
+def test_next_batch_drains_buffer_and_times_out_when_idle():
+    async def run():
+        hub = FanoutHub()
+        subscriber = hub.subscribe(EventFilter())
+        hub.publish("claim", {"id": 1})
+        hub.publish("claim", {"id": 2})
+        first = await subscriber.next_batch(timeout=0.1)
+        second = await subscriber.next_batch(timeout=0.01)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert [event["data"]["id"] for event in first] == [1, 2]
+    assert second == []
+
+
+def test_published_counts_every_event_and_deliveries_are_separate():
+    async def run():
+        hub = FanoutHub()
+        hub.publish("claim", {"id": 0})
+        first = hub.subscribe(EventFilter())
+        alerts = hub.subscribe(EventFilter.from_params(types="alert"))
+        hub.publish("claim", {"id": 1})
+        hub.publish("alert", {"id": 2})
+        await first.next_batch(timeout=0.1)
+        hub.unsubscribe(first)
+        hub.unsubscribe(alerts)
+        return hub.stats()
+
+    stats = asyncio.run(run())
+    assert stats["published"] == 3
+    assert stats["offered"] == 3
+    assert stats["delivered"] == 2
+    assert stats["subscribers"] == 0
@@ -0,0 +1,60 @@
+"""
+Tests for the trusted batch fast path
+"""
+
+import pytest
+from pydantic import ValidationError
+
+import main
+from fast_path import TRUSTED_CLAIMS_ADAPTER, compile_transform, dumps_json, loads_json, transform_claim
+
+CLAIMS = [
+    {"text": "minimal", "platform": "twitter"},
+    {
+        "text": "full",
+        "platform": "telegram",
+        "source_url": "https://t.me/post/1",
+        "author": "someone",
+        "author_id": "42",
+        "risk_level": "critical",
+        "region": {"state": "KA"},
+        "engagement": {"likes": 3},
+        "tags": ["evm"],
+        "category": "evm",
+        "media_url": "https://example.com/a.mp4",
+        "media_type": "video"
+    },
+    {"text": "explicit nulls", "platform": "other", "region": None, "tags": None, "engagement": None}
+]
+
+
+@pytest.mark.parametrize("claim", CLAIMS)
+def test_transform_matches_build_claim_data(claim):
+    assert transform_claim(claim) == main.build_claim_data(main.ClaimSubmission(**claim))
+
+
+def test_adapter_rejects_what_the_model_rejects():
+    for invalid in [{"text": "", "platform": "twitter"}, {"text": "x", "platform": "myspace"},
+                    {"text": "x", "platform": "twitter", "risk_level": "urgent"}]:
+        with pytest.raises(ValidationError):
+            TRUSTED_CLAIMS_ADAPTER.validate_python([invalid])
+        with pytest.raises(ValidationError):
+            main.ClaimSubmission(**invalid)
+
+
+def test_compiled_transform_modes():
+    transform = compile_transform({"a": ("x", "required", None), "b": {"c": ("y", "default", 1), "d": ("z", "or", [])}})
+    assert transform({"x": 0, "z": None}) == {"a": 0, "b": {"c": 1, "d": []}}
+
+
+def test_defaults_are_not_shared_between_claims():
+    first = transform_claim({"text": "a", "platform": "twitter"})
+    first["region"]["state"] = "KA"
+    first["tags"].append("evm")
+    second = transform_claim({"text": "b", "platform": "twitter"})
+    assert second["region"] == {} and second["tags"] == []
+
+
+def test_json_round_trip():
+    data = {"claims": [{"text": "ünïcode", "n": 1}]}
+    assert loads_json(dumps_json(data)) == data
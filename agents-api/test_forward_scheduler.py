@@ -0,0 +1,151 @@
+"""
+Tests for the priority forwarding lanes
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from forward_scheduler import LaneFull, PriorityForwarder, lane_for
+
+
+async def ignore(endpoint, data):
+    pass
+
+
+def backlog(forwarder, per_lane=30, age=0.0):
+    enqueued_at = time.monotonic() - age
+    for lane in forwarder.lanes:
+        for i in range(per_lane):
+            forwarder.lanes[lane].append((enqueued_at, "/api/alerts", {"lane": lane, "i": i}))
+
+
+def served(forwarder, count):
+    return [forwarder._dequeue()[1]["lane"] for _ in range(count)]
+
+
+def test_lane_for_defaults_unknown_levels_to_medium():
+    assert lane_for("critical") == "critical"
+    assert lane_for(None) == "medium"
+    assert lane_for("urgent") == "medium"
+
+
+def test_weighted_round_robin_favours_critical_without_starving_low():
+    forwarder = PriorityForwarder(ignore, starvation_seconds=60)
+    backlog(forwarder)
+    order = served(forwarder, 15)
+    assert order[0] == "critical"
+    assert {lane: order.count(lane) for lane in forwarder.lanes} == {"critical": 8, "high": 4, "medium": 2, "low": 1}
+
+
+def test_aged_backlog_does_not_pre_empt_queued_critical_work():
+    forwarder = PriorityForwarder(ignore, starvation_seconds=1)
+    backlog(forwarder, age=30)
+    # Low-priority items were enqueued first, yet critical keeps its share
+    forwarder.lanes["low"][0] = (time.monotonic() - 60, "/api/alerts", {"lane": "low", "i": -1})
+    order = served(forwarder, 15)
+    assert order[0] == "critical"
+    assert order.count("critical") == 8
+    assert forwarder.starvation_promotions == 0
+
+
+def test_aging_boosts_lower_lanes_once_critical_is_empty():
+    forwarder = PriorityForwarder(ignore, starvation_seconds=1)
+    backlog(forwarder, per_lane=20)
+    forwarder.lanes["critical"].clear()
+    fresh = served(forwarder, 14)
+
+    aged = PriorityForwarder(ignore, starvation_seconds=1)
+    backlog(aged, per_lane=20)
+    aged.lanes["critical"].clear()
+    for lane in ("medium", "low"):
+        aged.lanes[lane] = deque(
+            (time.monotonic() - 10, endpoint, data) for _, endpoint, data in aged.lanes[lane]
+        )
+    boosted = served(aged, 14)
+
+    assert boosted.count("low") > fresh.count("low")
+    assert aged.starvation_promotions > 0
+
+
+def test_stop_awaits_in_flight_sends():
+    completed = []
+
+    async def slow_send(endpoint, data):
+        await asyncio.sleep(0.2)
+        completed.append(data["i"])
+
+    async def scenario():
+        forwarder = PriorityForwarder(slow_send, workers=2)
+        forwarder.start()
+        for i in range(2):
+            forwarder.submit("/api/claims", {"i": i}, "high")
+        await asyncio.sleep(0.05)
+        await forwarder.stop(drain_seconds=0)
+        return forwarder
+
+    forwarder = asyncio.run(scenario())
+    assert sorted(completed) == [0, 1]
+    assert forwarder.workers == []
+
+
+def test_stop_drains_queued_jobs_within_the_deadline():
+    sent = []
+
+    async def send(endpoint, data):
+        sent.append(data["i"])
+
+    async def scenario():
+        forwarder = PriorityForwarder(send, workers=1)
+        forwarder.start()
+        for i in range(5):
+            forwarder.submit("/api/claims", {"i": i}, "low")
+        await forwarder.stop(drain_seconds=1)
+
+    asyncio.run(scenario())
+    assert sorted(sent) == [0, 1, 2, 3, 4]
+
+
+def test_full_lane_refuses_jobs_and_counts_them_without_touching_other_lanes():
+    forwarder = PriorityForwarder(ignore, max_lane_items=2)
+    for i in range(2):
+        forwarder.submit("/api/alerts", {"i": i}, "low")
+    with pytest.raises(LaneFull):
+        forwarder.submit("/api/alerts", {"i": 2}, "low")
+    forwarder.submit("/api/alerts", {"i": 3}, "critical")
+
+    lanes = forwarder.snapshot()["lanes"]
+    assert lanes["low"]["depth"] == 2 and lanes["low"]["dropped"] == 1
+    assert lanes["critical"]["depth"] == 1 and lanes["critical"]["dropped"] == 0
+
+
+def test_submit_all_queues_nothing_when_one_lane_is_full():
+    forwarder = PriorityForwarder(ignore, max_lane_items=1)
+    forwarder.submit("/api/claims/batch", {"i": 0}, "low")
+    with pytest.raises(LaneFull):
+        forwarder.submit_all([("/api/claims/batch", {"i": 1}, "high"), ("/api/claims/batch", {"i": 2}, "low")])
+    assert forwarder.depth() == 1
+    assert {lane: stats["dropped"] for lane, stats in forwarder.snapshot()["lanes"].items()} == {
+        "critical": 0, "high": 1, "medium": 0, "low": 1
+    }
+
+
+def test_submission_to_a_full_lane_gets_503_and_can_be_retried(monkeypatch):
+    forwarder = PriorityForwarder(ignore, max_lane_items=1)
+    monkeypatch.setattr(main, "forwarder", forwarder)
+    client = TestClient(main.app)
+    alert = {"title": "Booth capture", "description": "Reported at booth 12", "severity": "low", "category": "other"}
+    headers = {"Idempotency-Key": "lane-full-alert"}
+
+    assert client.post("/submit/alert", json={**alert, "title": "first"}).status_code == 200
+    refused = client.post("/submit/alert", json=alert, headers=headers)
+    assert refused.status_code == 503
+    assert refused.headers["Retry-After"] == str(main.FORWARD_RETRY_AFTER_SECONDS)
+
+    forwarder.lanes["low"].clear()
+    assert client.post("/submit/alert", json=alert, headers=headers).status_code == 200
+    assert forwarder.snapshot()["lanes"]["low"]["dropped"] == 1
@@ -0,0 +1,51 @@
+"""
+Tests for the geohash heatmap grid
+"""
+
+import pytest
+
+from geo_grid import GeoGrid, cell_center, claim_coordinates, geohash_encode, precision_for_zoom, tile_bounds
+
+NOW = 1_700_000_000
+
+
+def test_geohash_matches_known_values():
+    assert geohash_encode(57.64911, 10.40744, 7) == "u4pruyd"
+    lat, lng = cell_center("u4pruyd")
+    assert lat == pytest.approx(57.64911, abs=1e-3)
+    assert lng == pytest.approx(10.40744, abs=1e-3)
+
+
+def test_claim_coordinates_accepts_flat_and_nested_regions():
+    assert claim_coordinates({"lat": 12.9, "lng": 77.6}) == (12.9, 77.6)
+    assert claim_coordinates({"coordinates": {"latitude": "12.9", "longitude": "77.6"}}) == (12.9, 77.6)
+    assert claim_coordinates({"lat": 120, "lng": 0}) is None
+    assert claim_coordinates({"state": "KA"}) is None
+
+
+def test_precision_grows_with_zoom():
+    assert precision_for_zoom(0) < precision_for_zoom(8) <= precision_for_zoom(16)
+
+
+def test_query_counts_claims_per_cell_and_risk():
+    grid = GeoGrid()
+    grid.record({"lat": 12.97, "lng": 77.59}, "critical", now=NOW)
+    grid.record({"lat": 12.97, "lng": 77.59}, "low", now=NOW)
+    grid.record({"lat": 28.61, "lng": 77.20}, "high", now=NOW)
+    grid.record({"state": "KA"}, "high", now=NOW)
+
+    result = grid.query(12, 77, 14, 78, precision=5, now=NOW)
+    assert [cell["total"] for cell in result["cells"]] == [2]
+    assert result["cells"][0]["by_risk"] == {"low": 1, "medium": 0, "high": 0, "critical": 1}
+    assert grid.unlocated == 1
+
+
+def test_query_coarsens_large_viewports_and_skips_expired_buckets():
+    grid = GeoGrid(bucket_seconds=3600, bucket_count=2, max_cells_per_query=64)
+    grid.record({"lat": 12.97, "lng": 77.59}, "high", now=NOW)
+    wide = grid.query(*tile_bounds(0, 0, 0), precision=7, now=NOW)
+    assert wide["precision"] < 7
+    assert sum(cell["total"] for cell in wide["cells"]) == 1
+
+    later = grid.query(12, 77, 14, 78, precision=5, now=NOW + 3 * 3600)
+    assert later["cells"] == []
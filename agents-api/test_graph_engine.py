@@ -0,0 +1,136 @@
+"""
+Tests for the in-memory CSR connection graph
+"""
+
+import asyncio
+
+import numpy as np
+
+from graph_engine import CSRGraph, UnionFind, build_csr
+
+
+def neighbor_weights(graph, handle, transpose=False):
+    ids, weights = graph.neighbors(graph.ids[handle], transpose)
+    return {graph.handles[node]: float(weight) for node, weight in zip(ids.tolist(), weights.tolist())}
+
+
+def test_build_csr_sums_duplicates_in_both_directions():
+    indptr, indices, weights, t_indptr, t_indices, t_weights = build_csr(
+        3, np.array([0, 0, 2, 0]), np.array([1, 2, 1, 1]), np.array([1.0, 2.0, 3.0, 4.0])
+    )
+    assert indptr.tolist() == [0, 2, 2, 3]
+    assert indices.tolist() == [1, 2, 1]
+    assert weights.tolist() == [5.0, 2.0, 3.0]
+    assert t_indptr.tolist() == [0, 0, 2, 3]
+    assert t_indices.tolist() == [0, 2, 0]
+    assert t_weights.tolist() == [5.0, 3.0, 2.0]
+
+
+def test_compaction_preserves_edges_and_degrees():
+    graph = CSRGraph()
+    graph.load([("a", 10), ("b", 0)], [("a", "b", 1.0)])
+
+    async def scenario():
+        graph.add_edge("a", "b", 2.0)
+        graph.add_edge("b", "c", 1.0)
+        before = neighbor_weights(graph, "a"), neighbor_weights(graph, "c", transpose=True)
+        await graph.compact()
+        return before
+
+    before = asyncio.run(scenario())
+    assert before == (neighbor_weights(graph, "a"), neighbor_weights(graph, "c", transpose=True))
+    assert neighbor_weights(graph, "a") == {"b": 3.0}
+    assert graph.stats()["pending_edges"] == 0
+    assert graph.edge_count == 2
+    assert int(graph.out_degree[graph.ids["a"]]) == 1
+
+
+def test_edges_added_during_a_compaction_are_kept():
+    graph = CSRGraph(compact_threshold=2)
+
+    async def scenario():
+        graph.add_edge("a", "b", 1.0)
+        graph.add_edge("a", "c", 1.0)  # reaches the threshold and schedules a background compaction
+        assert graph.compaction_task is not None
+        await asyncio.sleep(0)  # let the compaction freeze the delta and start its worker thread
+        graph.add_edge("a", "d", 1.0)
+        graph.add_edge("a", "b", 1.0)
+        assert neighbor_weights(graph, "a") == {"b": 2.0, "c": 1.0, "d": 1.0}
+        while graph.compaction_task is not None:
+            await asyncio.sleep(0.01)
+        await graph.compact()
+
+    asyncio.run(scenario())
+    assert neighbor_weights(graph, "a") == {"b": 2.0, "c": 1.0, "d": 1.0}
+    assert graph.edge_count == 3
+    assert graph.stats()["pending_edges"] == 0
+
+
+def test_snapshot_covers_nodes_without_edges():
+    graph = CSRGraph()
+    graph.load([], [("a", "b", 1.0)])
+    graph.add_node("isolated")
+    n, indptr, indices, weights = asyncio.run(graph.snapshot())
+    assert n == 3
+    assert len(indptr) == 4
+    assert indices.tolist() == [graph.ids["b"]]
+
+
+def test_ego_network_visit_marks_do_not_leak_between_calls():
+    graph = CSRGraph()
+    graph.load([], [("a", "b", 1.0), ("b", "c", 1.0), ("c", "d", 1.0)])
+    first = graph.ego_network("a", hops=2)
+    second = graph.ego_network("a", hops=2)
+    assert first == second
+    assert {node["id"]: node["hop"] for node in first["nodes"]} == {"a": 0, "b": 1, "c": 2}
+    assert graph.ego_network("d", hops=1)["nodes"][1]["id"] == "c"
+
+
+def test_union_find_tracks_sizes_and_histogram():
+    components = UnionFind()
+    for _ in range(5):
+        components.add()
+    components.union(0, 1)
+    components.union(2, 3)
+    components.union(1, 3)
+    components.union(0, 2)  # already joined
+    assert components.components == 2
+    assert components.histogram == {1: 1, 4: 1}
+    assert components.largest()[1] == 4
+    assert components.find(3) == components.find(0)
+
+
+def test_loaded_components_match_incremental_unions():
+    edges = [("a", "b", 1.0), ("c", "d", 1.0), ("d", "e", 1.0)]
+    loaded = CSRGraph()
+    loaded.load([("lonely", 0)], edges)
+    incremental = CSRGraph()
+    incremental.add_node("lonely")
+    for source, target, weight in edges:
+        incremental.add_edge(source, target, weight)
+
+    for graph in (loaded, incremental):
+        summary = graph.component_summary()
+        assert summary["connected_components"] == 3
+        assert summary["size_histogram"] == {1: 1, 2: 1, 3: 1}
+        assert summary["largest_component"]["size"] == 3
+        assert graph.component_of("e")["component_id"] == graph.component_of("c")["component_id"]
+
+
+def test_ego_network_keeps_the_heaviest_neighbours_within_limits():
+    graph = CSRGraph()
+    graph.load([], [("hub", f"leaf{i}", float(i)) for i in range(1, 11)] + [("leaf10", "far", 1.0)])
+    ego = graph.ego_network("hub", hops=2, fan_out=3, max_nodes=10, max_edges=2)
+    hop_one = {node["id"] for node in ego["nodes"] if node["hop"] == 1}
+    assert hop_one == {"leaf10", "leaf9", "leaf8"}
+    assert {node["id"]: node["hop"] for node in ego["nodes"]}["far"] == 2
+    assert [edge["weight"] for edge in ego["edges"]] == [10.0, 9.0]
+    assert ego["truncated"]
+
+
+def test_ego_network_follows_the_requested_direction():
+    graph = CSRGraph()
+    graph.load([], [("a", "b", 1.0), ("c", "a", 1.0)])
+    assert {node["id"] for node in graph.ego_network("a", hops=1, direction="out")["nodes"]} == {"a", "b"}
+    assert {node["id"] for node in graph.ego_network("a", hops=1, direction="in")["nodes"]} == {"a", "c"}
+    assert graph.ego_network("unknown") is None
@@ -0,0 +1,127 @@
+"""
+Tests for Idempotency-Key reservations and per-item keys
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import main
+from idempotency import IdempotencyStore
+
+
+@pytest.fixture
+def forwarded(monkeypatch):
+    batches = []
+    monkeypatch.setattr(main, "forward_claim", lambda claim: batches.append([claim]))
+    monkeypatch.setattr(main, "forward_claim_batch", lambda claims: batches.append(claims))
+    monkeypatch.setattr(main, "publish_claim", lambda claim: None)
+    main.request_keys.entries.clear()
+    main.item_keys.entries.clear()
+    return batches
+
+
+def test_store_expires_and_caps_entries():
+    store = IdempotencyStore(max_entries=2, ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        store.put(key, True)
+    assert store.get("a") is None
+    assert store.get("c") is True
+
+    expired = IdempotencyStore(ttl_seconds=0)
+    expired.put("a", True)
+    assert expired.get("a") is None
+
+
+def test_reserve_reports_in_flight_then_completed_response():
+    store = IdempotencyStore()
+    assert store.reserve("k", "hash") is None
+    assert store.reserve("k", "hash") == ("hash", None)
+    store.complete("k", {"ok": True})
+    assert store.reserve("k", "hash") == ("hash", {"ok": True})
+    store.discard("k")
+    assert store.reserve("k", "other") is None
+
+
+def test_replayed_request_is_not_forwarded_again(forwarded):
+    client = TestClient(main.app)
+    body = [{"text": "same batch", "platform": "twitter"}]
+    first = client.post("/submit/batch/claims", json=body, headers={"Idempotency-Key": "batch-1"})
+    second = client.post("/submit/batch/claims", json=body, headers={"Idempotency-Key": "batch-1"})
+    assert second.status_code == 200
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json() == first.json()
+    assert len(forwarded) == 1
+
+
+def test_key_reused_with_a_different_body_is_rejected(forwarded):
+    client = TestClient(main.app)
+    client.post("/submit/claim", json={"text": "one", "platform": "twitter"}, headers={"Idempotency-Key": "k"})
+    response = client.post("/submit/claim", json={"text": "two", "platform": "twitter"}, headers={"Idempotency-Key": "k"})
+    assert response.status_code == 422
+    assert len(forwarded) == 1
+
+
+def test_concurrent_retry_gets_409_while_the_original_is_in_flight(forwarded):
+    assert main.claim_request_key("claim", "slow", b"{}") is None
+    with pytest.raises(HTTPException) as retry:
+        main.claim_request_key("claim", "slow", b"{}")
+    assert retry.value.status_code == 409
+
+    main.remember_response("claim", "slow", {"status": "processing"})
+    assert main.claim_request_key("claim", "slow", b"{}").headers["Idempotent-Replayed"] == "true"
+
+
+def test_concurrent_requests_with_one_key_forward_once(forwarded):
+    async def scenario():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/submit/claim", json={"text": "race", "platform": "twitter"}, headers={"Idempotency-Key": "race"})
+                for _ in range(5)
+            ))
+
+    responses = asyncio.run(scenario())
+    assert all(response.status_code in (200, 409) for response in responses)
+    assert len(forwarded) == 1
+
+
+def test_failed_forwarding_releases_request_and_item_keys(forwarded, monkeypatch):
+    def fail(claims):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(main, "forward_claim_batch", fail)
+    client = TestClient(main.app)
+    body = [{"text": "retry me", "platform": "twitter", "idempotency_key": "item-1"}]
+    assert client.post("/submit/batch/claims", json=body, headers={"Idempotency-Key": "b"}).status_code == 500
+
+    monkeypatch.setattr(main, "forward_claim_batch", lambda claims: forwarded.append(claims))
+    response = client.post("/submit/batch/claims", json=body, headers={"Idempotency-Key": "b"})
+    assert response.json()["count"] == 1
+    assert len(forwarded) == 1
+
+
+def test_single_claim_honours_its_item_key(forwarded):
+    client = TestClient(main.app)
+    claim = {"text": "also in a batch", "platform": "twitter", "idempotency_key": "item-2"}
+    client.post("/submit/batch/claims", json=[claim])
+    response = client.post("/submit/claim", json=claim)
+    assert response.json()["status"] == "duplicate"
+    assert len(forwarded) == 1
+
+
+def test_trusted_path_shares_reservations(forwarded, monkeypatch):
+    monkeypatch.setattr(main, "AGENT_API_KEY", "secret")
+    client = TestClient(main.app)
+    headers = {"Authorization": "Bearer secret", "Idempotency-Key": "t"}
+    body = [{"text": "trusted", "platform": "twitter"}]
+    client.post("/submit/batch/claims/trusted", json=body, headers=headers)
+    replay = client.post("/submit/batch/claims/trusted", json=body, headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert len(forwarded) == 1
+
+    invalid = client.post("/submit/batch/claims/trusted", content=b"not json", headers={**headers, "Idempotency-Key": "bad"})
+    assert invalid.status_code == 400
+    assert "batch_claims:bad" not in main.request_keys.entries
@@ -0,0 +1,59 @@
+"""
+Tests for the heartbeat timing wheel
+"""
+
+import asyncio
+
+from liveness import HeartbeatMonitor, TimingWheel
+
+
+def fire_times(wheel, ticks):
+    fired = {}
+    for tick in range(1, ticks + 1):
+        for key, payload in wheel.advance():
+            fired[key] = (tick, payload)
+    return fired
+
+
+def test_timer_fires_on_its_tick_including_after_several_rounds():
+    wheel = TimingWheel(tick_seconds=1, slot_count=8)
+    wheel.schedule("short", 3, "idle")
+    wheel.schedule("long", 20, "offline")
+    fired = fire_times(wheel, 25)
+    assert fired == {"short": (3, "idle"), "long": (20, "offline")}
+    assert len(wheel) == 0
+
+
+def test_rescheduling_replaces_the_earlier_timer():
+    wheel = TimingWheel(tick_seconds=1, slot_count=8)
+    wheel.schedule("agent", 2)
+    fire_times(wheel, 1)
+    wheel.schedule("agent", 5)
+    fired = fire_times(wheel, 10)
+    assert fired == {"agent": (5, None)}
+
+
+def test_cancelled_timer_never_fires():
+    wheel = TimingWheel(tick_seconds=1, slot_count=8)
+    wheel.schedule("agent", 2)
+    wheel.cancel("agent")
+    wheel.cancel("unknown")
+    assert fire_times(wheel, 10) == {}
+
+
+def test_monitor_hands_expirations_to_the_callback():
+    expired = []
+
+    async def scenario():
+        monitor = HeartbeatMonitor(on_expire=lambda key, payload: expired.append((key, payload)), tick_seconds=0.01)
+        monitor.arm("agent-1", 0.02, "idle")
+        monitor.arm("agent-2", 0.02, "idle")
+        monitor.disarm("agent-2")
+        monitor.start()
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(scenario())
+    assert expired == [("agent-1", "idle")]
+    assert stats == {"tracked": 0, "expired": 1}
@@ -0,0 +1,94 @@
+"""
+Tests for author creation races in the network analyzer
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+import network_analyzer
+from author_cache import AuthorCache
+from graph_engine import CSRGraph
+
+
+class FakeAuthors:
+    """Just enough of a motor collection to script insert races"""
+
+    def __init__(self, stored=None, upsert_error=None, upserted=None):
+        self.stored = stored or {}
+        self.upsert_error = upsert_error
+        self.upserted = upserted
+        self.calls = []
+
+    async def find_one(self, query):
+        self.calls.append("find_one")
+        return self.stored.get(query["handle"])
+
+    async def find_one_and_update(self, query, update, upsert, return_document):
+        self.calls.append("find_one_and_update")
+        if self.upsert_error:
+            # Another request inserted the author between our find and upsert
+            self.stored[query["handle"]] = {**update["$setOnInsert"], "total_posts": 7}
+            raise self.upsert_error
+        self.stored[query["handle"]] = update["$setOnInsert"]
+        return self.stored[query["handle"]]
+
+    async def bulk_write(self, operations, ordered):
+        self.calls.append("bulk_write")
+        if self.upsert_error:
+            raise self.upsert_error
+        return SimpleNamespace(upserted_ids=self.upserted)
+
+
+@pytest.fixture
+def authors(monkeypatch):
+    def install(collection):
+        monkeypatch.setattr(network_analyzer, "db", SimpleNamespace(authors=collection))
+        return collection
+
+    monkeypatch.setattr(network_analyzer, "author_cache", AuthorCache())
+    monkeypatch.setattr(network_analyzer, "connection_graph", CSRGraph())
+    return install
+
+
+def test_new_author_is_upserted_and_cached(authors):
+    collection = authors(FakeAuthors())
+    author = asyncio.run(network_analyzer.get_or_create_author("newcomer"))
+    assert author["handle"] == "newcomer"
+    assert collection.calls == ["find_one", "find_one_and_update"]
+    assert "newcomer" in network_analyzer.author_cache
+    assert "newcomer" in network_analyzer.connection_graph.ids
+
+
+def test_lost_insert_race_reads_the_winner_instead_of_failing(authors):
+    authors(FakeAuthors(upsert_error=DuplicateKeyError("E11000 duplicate key")))
+    author = asyncio.run(network_analyzer.get_or_create_author("contested"))
+    assert author is not None
+    assert author["total_posts"] == 7
+
+
+def test_ensure_authors_caches_only_the_authors_it_created(authors):
+    authors(FakeAuthors(upserted={1: "id-b"}))
+    asyncio.run(network_analyzer.ensure_authors(["a", "b"]))
+    assert "b" in network_analyzer.author_cache
+    assert network_analyzer.author_cache.get("b")["_id"] == "id-b"
+    assert "a" not in network_analyzer.author_cache
+
+
+def test_duplicate_errors_in_bulk_upserts_are_tolerated(authors):
+    error = BulkWriteError({
+        "writeErrors": [{"index": 0, "code": 11000, "errmsg": "E11000 duplicate key"}],
+        "upserted": [{"index": 1, "_id": "id-b"}]
+    })
+    authors(FakeAuthors(upsert_error=error))
+    created = asyncio.run(network_analyzer.create_authors(["a", "b"]))
+    assert created == {"b"}
+
+
+def test_other_bulk_errors_still_raise(authors):
+    error = BulkWriteError({"writeErrors": [{"index": 0, "code": 121, "errmsg": "validation failed"}]})
+    authors(FakeAuthors(upsert_error=error))
+    with pytest.raises(BulkWriteError):
+        asyncio.run(network_analyzer.create_authors(["a"]))
@@ -0,0 +1,94 @@
+"""
+Tests for flagged-post background tasks on the network analysis endpoints
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import network_analyzer
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """Stub the database stages and capture every record_flagged_content run"""
+    runs = []
+
+    async def noop(*args):
+        return None
+
+    async def author(handle):
+        return {**network_analyzer.new_author_document(handle), "total_posts": 1, "total_reach": 100}
+
+    async def viral_score(author, request):
+        return 0.5
+
+    async def credibility(author, request):
+        return 0.2, "high"
+
+    async def metrics(handle):
+        return {}
+
+    async def related(request):
+        return []
+
+    async def preload(handles):
+        return None
+
+    async def record(documents):
+        runs.append([document["author_handle"] for document in documents])
+
+    monkeypatch.setattr(network_analyzer, "update_author_stats", noop)
+    monkeypatch.setattr(network_analyzer, "update_network_connections", noop)
+    monkeypatch.setattr(network_analyzer, "get_or_create_author", author)
+    monkeypatch.setattr(network_analyzer, "calculate_viral_score", viral_score)
+    monkeypatch.setattr(network_analyzer, "update_credibility_score", credibility)
+    monkeypatch.setattr(network_analyzer, "calculate_network_metrics", metrics)
+    monkeypatch.setattr(network_analyzer, "find_related_claims", related)
+    monkeypatch.setattr(network_analyzer, "preload_authors", preload)
+    monkeypatch.setattr(network_analyzer, "write_edges", noop)
+    monkeypatch.setattr(network_analyzer.author_updates, "flush", noop)
+    monkeypatch.setattr(network_analyzer, "record_flagged_content", record)
+    return runs
+
+
+def post(handle, content=None):
+    return {"authorHandle": handle, "reachEstimate": 100, "content": content}
+
+
+def test_flagged_post_is_recorded_once_per_request(recorded):
+    client = TestClient(network_analyzer.app)
+
+    assert client.post("/analyze/network", json=post("first", "suspicious claim")).status_code == 200
+    assert recorded == [["first"]]
+
+    # A request that flags nothing must not re-run the previous request's task
+    assert client.post("/analyze/network", json=post("quiet")).status_code == 200
+    assert recorded == [["first"]]
+
+    assert client.post("/analyze/network", json=post("second", "another claim")).status_code == 200
+    assert recorded == [["first"], ["second"]]
+
+
+def test_batch_records_its_own_flagged_posts_only(recorded):
+    client = TestClient(network_analyzer.app)
+
+    response = client.post("/analyze/network/batch", json=[post("a", "claim"), post("b")])
+    assert response.json()["flagged"] == 1
+    assert recorded == [["a"]]
+
+    client.post("/analyze/network/batch", json=[post("c")])
+    assert recorded == [["a"]]
+
+
+def test_claim_verification_runs_the_flagged_post_task(recorded, monkeypatch):
+    async def no_news(query, max_results=20):
+        return [], "local"
+
+    monkeypatch.setattr(network_analyzer, "find_news", no_news)
+    client = TestClient(network_analyzer.app)
+
+    claim = {"claim_text": "voting machines were tampered with", "author_handle": "verifier"}
+    assert client.post("/verify/claim", json=claim).status_code == 200
+    assert recorded == [["verifier"]]
+    assert client.post("/verify/claim", json=claim).status_code == 200
+    assert recorded == [["verifier"], ["verifier"]]
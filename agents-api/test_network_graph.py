@@ -0,0 +1,121 @@
+"""
+Tests for the streamed /network/graph export
+"""
+
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+import network_analyzer
+from graph_engine import CSRGraph
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, sort):
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+class FakeConnections:
+    def __init__(self, edges):
+        self.edges = edges
+
+    def find(self, query, projection):
+        after = query.get("_id", {}).get("$gt")
+        return FakeCursor([edge for edge in self.edges if after is None or edge["_id"] > after])
+
+
+class FakeAuthors:
+    def __init__(self, authors, fail_on_call=None):
+        self.authors = authors
+        self.fail_on_call = fail_on_call
+        self.calls = 0
+
+    def find(self, query, projection):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("connection reset")
+        handles = set(query["handle"]["$in"])
+        return FakeCursor([author for author in self.authors if author["handle"] in handles])
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    def install(edge_pairs, handles, fail_on_call=None):
+        edges = [
+            {"_id": ObjectId(), "source": source, "target": target, "weight": 1}
+            for source, target in edge_pairs
+        ]
+        authors = FakeAuthors([{"handle": handle, "credibility_score": 0.5} for handle in handles], fail_on_call)
+        memory = CSRGraph()
+        memory.load([(handle, 0) for handle in handles], [(source, target, 1) for source, target in edge_pairs])
+        monkeypatch.setattr(network_analyzer, "db", SimpleNamespace(connections=FakeConnections(edges), authors=authors))
+        monkeypatch.setattr(network_analyzer, "connection_graph", memory)
+        monkeypatch.setattr(network_analyzer, "GRAPH_EXPORT_CHUNK_SIZE", 2)
+        return edges
+
+    return install
+
+
+def node_ids(body):
+    return sorted(node["id"] for node in body["nodes"])
+
+
+def test_offset_timestamps_are_converted_to_utc():
+    parsed = network_analyzer.parse_time_filter("2024-05-01T10:00:00+05:30", "since")
+    assert parsed == datetime(2024, 5, 1, 4, 30)
+    assert network_analyzer.parse_time_filter("2024-05-01T10:00:00Z", "since") == datetime(2024, 5, 1, 10, 0)
+    assert network_analyzer.parse_time_filter("2024-05-01T10:00:00", "since") == datetime(2024, 5, 1, 10, 0)
+
+
+def test_isolated_authors_are_added_to_the_last_page_only(graph):
+    graph([("a", "b"), ("b", "c"), ("c", "a")], ["a", "b", "c", "loner"])
+    client = TestClient(network_analyzer.app)
+
+    first = client.get("/network/graph", params={"limit": 2}).json()
+    assert "loner" not in node_ids(first)
+    last = client.get("/network/graph", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert last["next_cursor"] is None
+    assert "loner" in node_ids(last)
+
+    filtered = client.get("/network/graph", params={"min_weight": 1}).json()
+    assert node_ids(filtered) == ["a", "b", "c"]
+    opted_out = client.get("/network/graph", params={"include_isolated": False}).json()
+    assert node_ids(opted_out) == ["a", "b", "c"]
+
+
+def test_failed_json_page_reports_the_error_and_where_to_resume(graph):
+    edges = graph([("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")], ["a", "b", "c", "d", "e"], fail_on_call=2)
+    client = TestClient(network_analyzer.app)
+
+    body = client.get("/network/graph").json()
+    assert "connection reset" in body["error"]
+    assert len(body["edges"]) == 2
+    assert body["next_cursor"] == str(edges[1]["_id"])
+
+
+def test_failed_ndjson_page_ends_with_an_error_and_a_resume_cursor(graph):
+    edges = graph([("a", "b"), ("b", "c"), ("c", "d")], ["a", "b", "c", "d"], fail_on_call=2)
+    client = TestClient(network_analyzer.app)
+
+    lines = [json.loads(line) for line in client.get("/network/graph", params={"format": "ndjson"}).text.splitlines()]
+    assert "connection reset" in lines[-2]["error"]
+    assert lines[-1]["page"]["next_cursor"] == str(edges[1]["_id"])
+    assert sum("edge" in line for line in lines) == 2
@@ -0,0 +1,80 @@
+"""
+Tests for the local news store and its prefetcher
+"""
+
+import asyncio
+import json
+
+from news_store import NewsPrefetcher, NewsStore, normalize_article
+
+NOW = 1_700_000_000
+
+
+def article(title, url, body="", source="Daily"):
+    return normalize_article({"title": title, "url": url, "body": body, "source": {"title": source}})
+
+
+def test_normalize_accepts_raw_and_normalized_articles():
+    raw = normalize_article({"title": "T", "url": "u", "body": "b" * 600, "source": {"title": "Wire"}, "dateTime": "2024-01-01", "lang": "hin"})
+    assert raw["source"] == "Wire"
+    assert len(raw["body"]) == 500
+    assert raw["language"] == "hin"
+    assert normalize_article(raw) == raw
+
+
+def test_articles_are_deduplicated_by_url():
+    store = NewsStore()
+    assert store.add(article("EVM tampering claim debunked", "https://news/1"), now=NOW)
+    assert not store.add(article("EVM tampering claim debunked (updated)", "https://news/1"), now=NOW)
+    assert not store.add({"title": "", "url": ""}, now=NOW)
+    assert len(store) == 1
+    assert store.stats()["duplicates"] == 1
+
+
+def test_title_matches_rank_above_body_mentions():
+    store = NewsStore()
+    store.add(article("Election commission audits EVM", "https://news/title"))
+    store.add(article("Weather report", "https://news/body", body="rain expected, no EVM news"))
+    results = store.search("evm")
+    assert [result["url"] for result in results] == ["https://news/title", "https://news/body"]
+    assert results[0]["relevance"] > results[1]["relevance"]
+
+
+def test_evicted_article_can_be_stored_again():
+    store = NewsStore(max_documents=1)
+    store.add(article("first story", "https://news/1"), now=NOW)
+    store.add(article("second story", "https://news/2"), now=NOW)
+    assert store.add(article("first story", "https://news/1"), now=NOW)
+
+
+def test_drop_file_is_read_incrementally(tmp_path):
+    drop = tmp_path / "articles.jsonl"
+    prefetcher = NewsPrefetcher(NewsStore(), fetch=None, drop_path=str(drop))
+    drop.write_text(json.dumps({"title": "one", "url": "u1"}) + "\nnot json\n" + json.dumps({"title": "partial"}))
+    assert [item["title"] for item in prefetcher.read_drop()] == ["one"]
+
+    with open(drop, "a") as handle:
+        handle.write("\n")  # the writer finishes the line
+    assert [item["title"] for item in prefetcher.read_drop()] == ["partial"]
+    assert prefetcher.read_drop() == []
+
+
+def test_run_once_fetches_trending_keywords_and_stops_on_failure():
+    fetched = []
+
+    async def fetch(keyword):
+        fetched.append(keyword)
+        if keyword == "booth":
+            raise RuntimeError("rate limited")
+        return [article(f"{keyword} story", f"https://news/{keyword}")]
+
+    store = NewsStore()
+    prefetcher = NewsPrefetcher(store, fetch, max_keywords=3, seed_keywords=["election"])
+    prefetcher.note(["#EVM", "evm", "booth", "booth", "booth", "results"])
+    asyncio.run(prefetcher.run_once())
+
+    assert fetched == ["election", "booth"]
+    assert prefetcher.stats()["failures"] == 1
+    assert len(store) == 1
+    # Counts halve every run, so quiet keywords drop out
+    assert prefetcher.keyword_counts == {"booth": 1, "evm": 1}
@@ -0,0 +1,117 @@
+"""
+Tests for the single-flight, stale-while-revalidate response cache
+"""
+
+import asyncio
+
+import pytest
+
+from response_cache import ResponseCache
+
+
+def counting_fetch(calls, value="fresh", delay=0.01, fail=False):
+    async def fetch():
+        calls.append(value)
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("rate limited")
+        return value
+    return fetch
+
+
+def test_concurrent_misses_share_one_upstream_call():
+    calls = []
+
+    async def scenario():
+        cache = ResponseCache()
+        results = await asyncio.gather(*(cache.get("q", counting_fetch(calls)) for _ in range(10)))
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert calls == ["fresh"]
+    assert results == [("fresh", "miss")] * 10
+    assert cache.stats()["coalesced"] == 9
+
+
+def test_fresh_entries_are_hits():
+    calls = []
+
+    async def scenario():
+        cache = ResponseCache(ttl_seconds=60)
+        await cache.get("q", counting_fetch(calls))
+        return await cache.get("q", counting_fetch(calls, "other"))
+
+    assert asyncio.run(scenario()) == ("fresh", "hit")
+    assert calls == ["fresh"]
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    calls = []
+
+    async def scenario():
+        cache = ResponseCache(ttl_seconds=0, stale_seconds=60)
+        await cache.get("q", counting_fetch(calls, "v1"))
+        stale = [await cache.get("q", counting_fetch(calls, "v2")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        return stale, cache.entries["q"][2], cache.stats()
+
+    stale, refreshed, stats = asyncio.run(scenario())
+    assert stale == [("v1", "stale")] * 3
+    assert calls == ["v1", "v2"]
+    assert refreshed == "v2"
+    assert stats["refreshes"] == 1
+
+
+def test_failed_refresh_keeps_the_stale_copy():
+    calls = []
+
+    async def scenario():
+        cache = ResponseCache(ttl_seconds=0, stale_seconds=60)
+        await cache.get("q", counting_fetch(calls, "v1"))
+        await cache.get("q", counting_fetch(calls, "v2", fail=True))
+        await asyncio.sleep(0.05)
+        return await cache.get("q", counting_fetch(calls, "v3", delay=1)), cache.stats()
+
+    (value, status), stats = asyncio.run(scenario())
+    assert (value, status) == ("v1", "stale")
+    assert stats["refresh_failures"] == 1
+
+
+def test_failed_load_is_raised_and_not_cached():
+    calls = []
+
+    async def scenario():
+        cache = ResponseCache()
+        with pytest.raises(RuntimeError):
+            await cache.get("q", counting_fetch(calls, fail=True))
+        return await cache.get("q", counting_fetch(calls, "retry"))
+
+    assert asyncio.run(scenario()) == ("retry", "miss")
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_load():
+    calls = []
+
+    async def scenario():
+        cache = ResponseCache()
+        first = asyncio.create_task(cache.get("q", counting_fetch(calls, delay=0.05)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get("q", counting_fetch(calls)))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == ("fresh", "miss")
+    assert calls == ["fresh"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def scenario():
+        cache = ResponseCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            await cache.get(key, counting_fetch([], key, delay=0))
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert list(cache.entries) == ["b", "c"]
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,122 @@
+"""
+Tests for the time-windowed BM25 index
+"""
+
+import math
+import random
+
+from search_index import InvertedIndex, decode_postings, encode_varint, parse_query, tokenize
+
+NOW = 1_700_000_000
+
+
+def test_varint_postings_round_trip():
+    data = bytearray()
+    last = 0
+    for doc_id, count in [(3, 1), (130, 2), (20000, 300)]:
+        encode_varint(doc_id - last, data)
+        encode_varint(count, data)
+        last = doc_id
+    assert decode_postings(bytes(data)) == [(3, 1), (130, 2), (20000, 300)]
+
+
+def test_query_parsing_drops_stop_words():
+    assert tokenize("The EVM was hacked!") == ["evm", "hacked"]
+    assert parse_query("evm AND hacked OR booth capture") == [["evm", "hacked"], ["booth", "capture"]]
+
+
+def test_search_ranks_and_honours_or_clauses():
+    index = InvertedIndex()
+    index.add("evm hacked in booth", "a", now=NOW)
+    index.add("evm evm hacked hacked", "b", now=NOW)
+    index.add("booth capture reported", "c", now=NOW)
+    index.add("weather update", "d", now=NOW)
+    results = [result["document"] for result in index.search("evm hacked OR capture", now=NOW)]
+    assert results[0] == "b"
+    assert set(results) == {"a", "b", "c"}
+
+
+def test_max_documents_is_enforced_within_one_time_slice():
+    index = InvertedIndex(max_documents=100, segment_documents=10)
+    for i in range(1000):
+        index.add(f"claim number {i}", i, now=NOW)
+    assert len(index.documents) <= 100
+    assert index.stats()["segments"] <= 10
+    # The newest documents survive and term statistics stay consistent
+    assert index.search("claim", limit=1, now=NOW)[0]["document"] >= 900
+    assert index.doc_freq["claim"] == len(index.documents)
+    assert index.total_length == sum(length for _, length, _ in index.documents.values())
+
+
+def test_default_segment_size_keeps_the_cap():
+    index = InvertedIndex(max_documents=64)
+    for i in range(500):
+        index.add(f"claim {i}", i, now=NOW)
+    assert len(index.documents) <= 64
+
+
+def test_segments_age_out_of_the_retention_window():
+    index = InvertedIndex(retention_seconds=2 * 3600, segment_seconds=3600)
+    index.add("old claim", "old", now=NOW - 4 * 3600)
+    index.add("new claim", "new", now=NOW)
+    assert [result["document"] for result in index.search("claim", now=NOW)] == ["new"]
+    assert "old" not in index.doc_freq
+
+
+def brute_force_scores(index, clauses):
+    """BM25 straight from the stored documents' token counts"""
+    terms = {term for clause in clauses for term in clause}
+    doc_count = len(index.documents)
+    avg_length = index.total_length / doc_count
+    scores = {}
+    for doc_id, (_, length, text) in index.documents.items():
+        tokens = tokenize(text)
+        if not any(all(term in tokens for term in clause) for clause in clauses):
+            continue
+        norm = index.k1 * (1 - index.b + index.b * length / avg_length)
+        score = 0.0
+        for term in terms:
+            count = tokens.count(term)
+            if count:
+                df = index.doc_freq[term]
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                score += idf * count * (index.k1 + 1) / (count + norm)
+        scores[text] = round(score, 4)
+    return scores
+
+
+def test_scores_match_a_brute_force_bm25_across_sealed_and_open_segments():
+    rng = random.Random(7)
+    vocabulary = ["evm", "booth", "rigged", "vote", "count", "fake", "video", "poll", "ballot", "queue"]
+    # Payloads are the text so the brute force can re-tokenize them
+    index = InvertedIndex(max_documents=1000, segment_documents=50)
+    texts = [" ".join(rng.choices(vocabulary, k=rng.randint(1, 8))) + f" doc{i}" for i in range(400)]
+    for i, text in enumerate(texts):
+        index.add(text, text, now=NOW + i)
+
+    for query in ["evm rigged", "fake video OR ballot", "vote", "queue poll count OR booth"]:
+        expected = brute_force_scores(index, parse_query(query))
+        results = index.search(query, limit=1000, now=NOW + 400)
+        assert {result["document"]: result["score"] for result in results} == expected
+        assert [result["score"] for result in results] == sorted(expected.values(), reverse=True)
+
+
+def test_sealed_segment_postings_are_decoded_once():
+    index = InvertedIndex(max_documents=1000, segment_documents=10)
+    for i in range(35):
+        index.add(f"claim {i}", i, now=NOW)
+    index.search("claim", now=NOW)
+    misses = index.cache_misses
+    assert misses == 3  # three sealed segments; the open one is decoded per query
+    index.search("claim", now=NOW)
+    assert index.cache_misses == misses
+    assert index.cache_hits == 3
+
+
+def test_decoded_postings_stay_within_the_cache_budget():
+    index = InvertedIndex(max_documents=1000, segment_documents=10, max_cached_postings=15)
+    for i in range(100):
+        index.add(f"claim {i}", i, now=NOW)
+    index.search("claim", now=NOW)
+    assert index.cached_postings <= 15
+    assert len(index.search("claim", limit=100, now=NOW)) == 100
@@ -0,0 +1,85 @@
+"""
+Tests for the write-behind update buffer
+"""
+
+import asyncio
+
+from write_behind import WriteBehindBuffer, merge_update
+
+
+def test_merge_sums_increments_keeps_max_and_latest_set():
+    pending = {}
+    merge_update(pending, {"$inc": {"posts": 1}, "$max": {"followers": 10}, "$set": {"score": 0.5}})
+    merge_update(pending, {"$inc": {"posts": 2}, "$max": {"followers": 5}, "$set": {"score": 0.4}})
+    assert pending == {"$inc": {"posts": 3}, "$max": {"followers": 10}, "$set": {"score": 0.4}}
+
+
+def test_flush_coalesces_updates_into_one_operation_per_key():
+    writes = []
+
+    async def write(operations):
+        writes.append([(operation._filter, operation._doc) for operation in operations])
+
+    buffer = WriteBehindBuffer(write, key_field="handle")
+    for _ in range(5):
+        buffer.add("alice", {"$inc": {"total_posts": 1}})
+    buffer.add("bob", {"$set": {"credibility_score": 0.3}})
+    asyncio.run(buffer.flush())
+
+    assert writes == [[
+        ({"handle": "alice"}, {"$inc": {"total_posts": 5}}),
+        ({"handle": "bob"}, {"$set": {"credibility_score": 0.3}})
+    ]]
+    assert buffer.stats()["coalescing_ratio"] == 3.0
+    assert len(buffer) == 0
+
+
+def test_failed_flush_is_retried_under_newer_updates():
+    attempts = []
+
+    async def write(operations):
+        attempts.append([operation._doc for operation in operations])
+        if len(attempts) == 1:
+            buffer.add("alice", {"$inc": {"total_posts": 2}, "$set": {"score": 0.2}})
+            raise RuntimeError("primary stepped down")
+
+    buffer = WriteBehindBuffer(write, key_field="handle")
+    buffer.add("alice", {"$inc": {"total_posts": 1}, "$set": {"score": 0.9}})
+
+    async def scenario():
+        await buffer.flush()
+        assert buffer.pending("alice") == {"$inc": {"total_posts": 3}, "$set": {"score": 0.2}}
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert attempts[-1] == [{"$inc": {"total_posts": 3}, "$set": {"score": 0.2}}]
+    assert buffer.stats()["failures"] == 1
+
+
+def test_pending_includes_updates_being_flushed():
+    seen = {}
+
+    async def write(operations):
+        buffer.add("alice", {"$inc": {"total_posts": 1}})
+        seen["pending"] = buffer.pending("alice")
+
+    buffer = WriteBehindBuffer(write, key_field="handle")
+    buffer.add("alice", {"$inc": {"total_posts": 2}})
+    asyncio.run(buffer.flush())
+    assert seen["pending"] == {"$inc": {"total_posts": 3}}
+
+
+def test_stop_writes_out_pending_updates():
+    writes = []
+
+    async def write(operations):
+        writes.append(len(operations))
+
+    async def scenario():
+        buffer = WriteBehindBuffer(write, flush_interval=60)
+        buffer.start()
+        buffer.add("alice", {"$inc": {"total_posts": 1}})
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert writes == [1]
@@ -478,6 +478,7 @@ async def report_analysis_to_agents_api(text: str, analysis: TextAnalysisRespons
                 await client.post(
                     f"{AGENTS_API_URL}/submit/claim",
                     json=claim_data,
+                    headers={"X-Agent-ID": AGENT_ID},
                     timeout=10.0
                 )
         
@@ -287,6 +287,7 @@ async def submit_tweet_as_claim(tweet: TweetData, analysis: Dict, risk_level: st
             response = await client.post(
                 f"{AGENTS_API_URL}/submit/claim",
                 json=claim_data,
+                headers={"X-Agent-ID": AGENT_ID},
                 timeout=15.0
             )
             
@@ -321,6 +322,7 @@ async def create_critical_alert(tweet: TweetData, analysis: Dict, claim_data: Di
             response = await client.post(
                 f"{AGENTS_API_URL}/submit/alert",
                 json=alert_data,
+                headers={"X-Agent-ID": AGENT_ID},
                 timeout=15.0
             )
             
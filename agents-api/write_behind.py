@@ -0,0 +1,128 @@
+"""
+CivicShield Write-Behind Buffer
+Coalesces MongoDB update documents per key in memory and writes them out as
+one unordered bulk_write per flush. $inc deltas are summed, $max keeps the
+largest value and $set keeps the latest, so a hot document receives one
+update per flush interval no matter how often it changes
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+
+def merge_update(pending: Dict[str, dict], update: Dict[str, dict]):
+    """Fold a MongoDB update document into an already pending one"""
+    for field, value in update.get("$inc", {}).items():
+        increments = pending.setdefault("$inc", {})
+        increments[field] = increments.get(field, 0) + value
+    for field, value in update.get("$max", {}).items():
+        maxima = pending.setdefault("$max", {})
+        if field not in maxima or value > maxima[field]:
+            maxima[field] = value
+    for field, value in update.get("$set", {}).items():
+        pending.setdefault("$set", {})[field] = value
+
+
+class WriteBehindBuffer:
+    """Per-key update coalescing, flushed on an interval or when too many keys are dirty"""
+
+    def __init__(self, write: Callable[[List[UpdateOne]], Awaitable[Any]], key_field: str = "_id",
+                 flush_interval: float = 1.0, max_dirty: int = 1000):
+        self.write = write
+        self.key_field = key_field
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.dirty: Dict[Any, Dict[str, dict]] = {}
+        self.in_flight: Dict[Any, Dict[str, dict]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.running = False
+        self.wakeup = asyncio.Event()
+        self.lock = asyncio.Lock()
+        self.updates = 0
+        self.flushes = 0
+        self.written = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self.dirty)
+
+    def add(self, key: Any, update: Dict[str, dict]):
+        """Queue an update for key, merging it with any update already pending"""
+        merge_update(self.dirty.setdefault(key, {}), update)
+        self.updates += 1
+        if len(self.dirty) >= self.max_dirty:
+            self.wakeup.set()
+
+    def pending(self, key: Any) -> Optional[Dict[str, dict]]:
+        """Update not yet written for key (including one being flushed), if any"""
+        flushing = self.in_flight.get(key)
+        queued = self.dirty.get(key)
+        if flushing is None or queued is None:
+            return queued or flushing
+        combined: Dict[str, dict] = {}
+        merge_update(combined, flushing)
+        merge_update(combined, queued)
+        return combined
+
+    async def flush(self):
+        """Write every pending update in one bulk_write"""
+        async with self.lock:
+            if not self.dirty:
+                return
+            batch, self.dirty = self.dirty, {}
+            self.in_flight = batch
+            start = time.perf_counter()
+            try:
+                await self.write([UpdateOne({self.key_field: key}, update) for key, update in batch.items()])
+                self.flushes += 1
+                self.written += len(batch)
+            except Exception as e:
+                self.failures += 1
+                print(f"Error flushing {len(batch)} buffered updates: {e}")
+                # Put the batch back underneath anything queued meanwhile so it is retried
+                for key, update in batch.items():
+                    newer = self.dirty.get(key)
+                    self.dirty[key] = update
+                    if newer:
+                        merge_update(update, newer)
+            self.in_flight = {}
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def _run(self):
+        while self.running:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self.task is None:
+            self.running = True
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out whatever is still pending"""
+        if self.task is not None:
+            # Let an in-progress flush finish rather than cancelling it mid-write
+            self.running = False
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dirty": len(self.dirty),
+            "updates": self.updates,
+            "flushes": self.flushes,
+            "documents_written": self.written,
+            "coalescing_ratio": self.updates / self.written if self.written else 0.0,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms
+        }